@@ -16,3 +16,7 @@ PLACE_PIECE = 0
 MOVE_PIECE = 1
 REMOVE_PIECE = 2
 CHANGE_TURN = 3
+CONNECT = 4  # The first message of a client, which tells the server its id
+JOIN_ROOM = 5  # To a RoomServer: the digits of a room code, or none for a new room; back: the seat and the code
+ROOM_NOT_FOUND = 6  # From a RoomServer: there's no room with that code and a free seat
+NEW_GAME = 7  # In a RoomServer room: the game starts again from the empty board, with seat 0 as WHITE
@@ -0,0 +1,310 @@
+"""The rules of the game, without any windows.
+
+A GameState is the position, who is to move and what came before that still counts for the rules. It makes and takes
+back moves, and it knows when the game is over. It doesn't need Tk, so the server and the simulations can use it too.
+Board draws one and asks it about everything the players do.
+
+The pieces are two masks where bit i stands for node i, like in the engine. A move is a tuple (src, dest, take) of
+node ids. src is -1 when putting a new piece and take is -1 when no windmill is formed. legal_moves() and apply() work
+with whole moves and don't check anything, so they are fast enough for simulations.
+
+The players and the network make a move in two steps: the piece, and then the piece to take if that formed a
+windmill. put(), move() and remove() take those steps and raise IllegalMoveError for the ones that break the rules.
+
+The rules:
+    - Both players put their 9 pieces and then move them to neighboring nodes; with 3 pieces left, they can jump
+      anywhere.
+    - A windmill takes a piece of the opponent that isn't in a windmill, or any piece if they all are.
+    - In the moving phase, a player with fewer than 3 pieces or without moves loses.
+    - It's a tie when a position comes up for the third time or after more than MAX_TURNS_WO_MILLS moves without a
+      windmill. Both count again from zero after every windmill.
+
+"""
+
+from typing import Optional
+
+from src.topology import BIT, FULL_BOARD, NEIGHBOR_MASKS, NODE_MILL_PAIRS, get_nodes, popcount, get_nodes_pieces_to_take
+from src.constants import PLAYER1, PLAYER2, PHASE1, PHASE2, TIE
+
+PIECES_PER_PLAYER = 9
+MAX_TURNS_WO_MILLS = 100
+
+_PLAYERS = (PLAYER1, PLAYER2)  # By side; 0 is WHITE, who starts
+
+
+class IllegalMoveError(ValueError):
+    pass
+
+
+class GameState:
+
+    __slots__ = ("pieces", "pieces_to_put", "side", "plies", "turns_without_windmills", "history", "pending",
+                 "game_over", "winner", "reason", "_undo_records")
+
+    def __init__(self):
+        self.pieces = [0, 0]  # The masks of WHITE and BLACK
+        self.pieces_to_put = [PIECES_PER_PLAYER, PIECES_PER_PLAYER]
+        self.side = 0  # The player to move: 0 for WHITE (PLAYER1) and 1 for BLACK (PLAYER2)
+        self.plies = 0
+
+        self.turns_without_windmills = 0
+        self.history = {}  # Position to how many times it came up since the last windmill
+
+        self.pending = None  # The (src, dest) of a move that formed a windmill and waits for the piece to take
+
+        self.game_over = False
+        self.winner = TIE
+        self.reason = None  # Why the game is over
+
+        self._undo_records = []  # The move and what it changed, for every move made
+
+    @property
+    def turn(self) -> int:
+        return _PLAYERS[self.side]
+
+    @property
+    def phase(self) -> int:
+        return PHASE1 if self.pieces_to_put[0] or self.pieces_to_put[1] else PHASE2
+
+    @property
+    def must_remove(self) -> bool:
+        return self.pending is not None
+
+    @property
+    def can_jump(self) -> bool:
+        """If the player to move can put its pieces on any empty node."""
+        return not self.pieces_to_put[self.side] and popcount(self.pieces[self.side]) == 3
+
+    @property
+    def moves(self) -> list:
+        return [record[0] for record in self._undo_records]
+
+    def count_pieces(self, player: int) -> int:
+        """
+        Returns:
+            int: The pieces of the player on the board.
+
+        """
+        return popcount(self.pieces[_PLAYERS.index(player)])
+
+    def get_current_state(self) -> list:
+        """
+        Returns:
+            list: The position as 24 numbers, as the engine takes it: 0 for no piece, 1 for WHITE and 2 for BLACK.
+
+        """
+        white, black = self.pieces
+        return [1 if white & bit else 2 if black & bit else 0 for bit in BIT]
+
+    def legal_moves(self) -> list:
+        """
+        Returns:
+            list: The moves of the player to move, none if the game is over.
+
+        """
+        if self.game_over:
+            return []
+
+        side = self.side
+        pieces = self.pieces[side]
+        empty = ~(pieces | self.pieces[1 - side]) & FULL_BOARD
+        nodes_to_take = None  # Only find them if there is a windmill
+
+        if self.pieces_to_put[side]:
+            sources = (-1,)
+            can_jump = True  # Anywhere empty
+        else:
+            sources = get_nodes(pieces)
+            can_jump = len(sources) == 3
+
+        moves = []
+        for src in sources:
+            remaining_pieces = pieces if src == -1 else pieces & ~BIT[src]
+            for dest in get_nodes(empty if can_jump else NEIGHBOR_MASKS[src] & empty):
+                pair1, pair2 = NODE_MILL_PAIRS[dest]
+                if remaining_pieces & pair1 == pair1 or remaining_pieces & pair2 == pair2:
+                    if nodes_to_take is None:
+                        nodes_to_take = self.nodes_to_take()
+                    for take in nodes_to_take:
+                        moves.append((src, dest, take))
+                else:
+                    moves.append((src, dest, -1))
+
+        return moves
+
+    def is_legal(self, move: tuple) -> bool:
+        return move in self.legal_moves()
+
+    def nodes_to_take(self) -> tuple:
+        """
+        Returns:
+            tuple: The nodes of the opponent from which a windmill could take a piece.
+
+        """
+        return get_nodes_pieces_to_take(self.pieces[1 - self.side])
+
+    def apply(self, move: tuple):
+        """Makes a move of the player to move, without checking it, and checks if the game is over."""
+        src, dest, take = move
+        side = self.side
+        opponent = 1 - side
+
+        if src == -1:
+            self.pieces[side] |= BIT[dest]
+            self.pieces_to_put[side] -= 1
+        else:
+            self.pieces[side] = self.pieces[side] & ~BIT[src] | BIT[dest]
+
+        repetitions = 0
+        if take != -1:  # A windmill; the positions before it can't come up again
+            self.pieces[opponent] &= ~BIT[take]
+            self._undo_records.append((move, self.turns_without_windmills, self.history))
+            self.turns_without_windmills = 0
+            self.history = {}
+        else:
+            self._undo_records.append((move, self.turns_without_windmills, None))
+            if src != -1:
+                position = self.pieces[0] | self.pieces[1] << 24
+                repetitions = self.history.get(position, 0) + 1
+                self.history[position] = repetitions
+                self.turns_without_windmills += 1
+
+        self.side = opponent
+        self.plies += 1
+
+        if not self.pieces_to_put[0] and not self.pieces_to_put[1]:  # Check the next player
+            if popcount(self.pieces[opponent]) < 3:
+                self._game_over(_PLAYERS[side], "two pieces left")
+                return
+            if not self._can_move(opponent):
+                self._game_over(_PLAYERS[side], "blocked")
+                return
+
+        if repetitions == 3:
+            self._game_over(TIE, "threefold repetition")
+        elif self.turns_without_windmills > MAX_TURNS_WO_MILLS:
+            self._game_over(TIE, "too many turns without windmills")
+
+    def undo(self) -> Optional[tuple]:
+        """Takes back the last move, or the first step of a move that waits for the piece to take.
+
+        Returns:
+            tuple: The move taken back, or None if there are no moves.
+
+        """
+        if self.pending is not None:
+            src, dest = self.pending
+            self.pending = None
+            return src, dest, -1
+        if not self._undo_records:
+            return None
+
+        move, turns_without_windmills, history = self._undo_records.pop()
+        src, dest, take = move
+        self.side = side = 1 - self.side
+        self.plies -= 1
+
+        if take != -1:
+            self.pieces[1 - side] |= BIT[take]
+            self.history = history
+        elif src != -1:
+            position = self.pieces[0] | self.pieces[1] << 24
+            if self.history[position] == 1:
+                del self.history[position]
+            else:
+                self.history[position] -= 1
+        self.turns_without_windmills = turns_without_windmills
+
+        if src == -1:
+            self.pieces[side] &= ~BIT[dest]
+            self.pieces_to_put[side] += 1
+        else:
+            self.pieces[side] = self.pieces[side] & ~BIT[dest] | BIT[src]
+
+        self.game_over = False
+        self.winner = TIE
+        self.reason = None
+
+        return move
+
+    def put(self, dest: int):
+        """Puts a new piece of the player to move; if that forms a windmill, remove() has to follow.
+
+        Raises:
+            IllegalMoveError: If the player can't put a piece there.
+
+        """
+        self._check_can_step()
+        if not self.pieces_to_put[self.side]:
+            raise IllegalMoveError("There are no more pieces to put")
+        self._check_is_empty(dest)
+
+        self._step(-1, dest)
+
+    def move(self, src: int, dest: int):
+        """Moves a piece of the player to move; if that forms a windmill, remove() has to follow.
+
+        Raises:
+            IllegalMoveError: If the player can't move that piece there.
+
+        """
+        self._check_can_step()
+        if self.pieces_to_put[self.side]:
+            raise IllegalMoveError("The pieces can't be moved before they are all put")
+        if src not in range(24) or not self.pieces[self.side] & BIT[src]:
+            raise IllegalMoveError(f"There is no piece of the player on node {src}")
+        self._check_is_empty(dest)
+        if not self.can_jump and not NEIGHBOR_MASKS[src] & BIT[dest]:
+            raise IllegalMoveError(f"Node {dest} isn't a neighbor of node {src}")
+
+        self._step(src, dest)
+
+    def remove(self, take: int):
+        """Takes a piece of the opponent, after a move that formed a windmill.
+
+        Raises:
+            IllegalMoveError: If no windmill was formed or that piece can't be taken.
+
+        """
+        if self.pending is None:
+            raise IllegalMoveError("No windmill was formed, so no piece can be taken")
+        if take not in self.nodes_to_take():
+            raise IllegalMoveError(f"The piece on node {take} can't be taken")
+
+        src, dest = self.pending
+        self.pending = None
+        self.apply((src, dest, take))
+
+    def _step(self, src: int, dest: int):
+        remaining_pieces = self.pieces[self.side] if src == -1 else self.pieces[self.side] & ~BIT[src]
+        pair1, pair2 = NODE_MILL_PAIRS[dest]
+        if remaining_pieces & pair1 == pair1 or remaining_pieces & pair2 == pair2:
+            self.pending = (src, dest)
+        else:
+            self.apply((src, dest, -1))
+
+    def _check_can_step(self):
+        if self.game_over:
+            raise IllegalMoveError("The game is over")
+        if self.pending is not None:
+            raise IllegalMoveError("A piece has to be taken first")
+
+    def _check_is_empty(self, node: int):
+        if node not in range(24) or (self.pieces[0] | self.pieces[1]) & BIT[node]:
+            raise IllegalMoveError(f"Node {node} isn't empty")
+
+    def _can_move(self, side: int) -> bool:
+        pieces = self.pieces[side]
+        empty = ~(pieces | self.pieces[1 - side]) & FULL_BOARD
+        if popcount(pieces) == 3:
+            return empty != 0
+
+        for node in get_nodes(pieces):
+            if NEIGHBOR_MASKS[node] & empty:
+                return True
+        return False
+
+    def _game_over(self, winner: int, reason: str):
+        self.game_over = True
+        self.winner = winner
+        self.reason = reason
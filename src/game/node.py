@@ -102,53 +102,3 @@ class Node:
         if self.piece is not None:
             self.piece.x = x
             self.piece.y = y
-
-    def search_neighbors(self, nodes: tuple) -> tuple:
-        if self.id == 0:
-            return nodes[1], nodes[9]
-        elif self.id == 1:
-            return nodes[0], nodes[2], nodes[4]
-        elif self.id == 2:
-            return nodes[1], nodes[14]
-        elif self.id == 3:
-            return nodes[4], nodes[10]
-        elif self.id == 4:
-            return nodes[1], nodes[3], nodes[5], nodes[7]
-        elif self.id == 5:
-            return nodes[4], nodes[13]
-        elif self.id == 6:
-            return nodes[7], nodes[11]
-        elif self.id == 7:
-            return nodes[4], nodes[6], nodes[8]
-        elif self.id == 8:
-            return nodes[7], nodes[12]
-        elif self.id == 9:
-            return nodes[0], nodes[10], nodes[21]
-        elif self.id == 10:
-            return nodes[3], nodes[9], nodes[11], nodes[18]
-        elif self.id == 11:
-            return nodes[6], nodes[10], nodes[15]
-        elif self.id == 12:
-            return nodes[8], nodes[13], nodes[17]
-        elif self.id == 13:
-            return nodes[5], nodes[12], nodes[14], nodes[20]
-        elif self.id == 14:
-            return nodes[2], nodes[13], nodes[23]
-        elif self.id == 15:
-            return nodes[11], nodes[16]
-        elif self.id == 16:
-            return nodes[15], nodes[17], nodes[19]
-        elif self.id == 17:
-            return nodes[12], nodes[16]
-        elif self.id == 18:
-            return nodes[10], nodes[19]
-        elif self.id == 19:
-            return nodes[16], nodes[18], nodes[20], nodes[22]
-        elif self.id == 20:
-            return nodes[13], nodes[19]
-        elif self.id == 21:
-            return nodes[9], nodes[22]
-        elif self.id == 22:
-            return nodes[19], nodes[21], nodes[23]
-        else:
-            return nodes[14], nodes[22]
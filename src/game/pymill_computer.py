@@ -1,10 +1,15 @@
+import threading
 import tkinter as tk
+from tkinter import messagebox
 from typing import Callable
 
 from src.game.game import Game
 from src.constants import *
-# from src.minimax.minimax import ai_place_piece_at, ai_remove_piece, ai_move_piece
-from minimax import ai_place_piece_at, ai_remove_piece, ai_move_piece
+from src.log import get_logger
+from src.minimax.minimax import Engine  # Searches within a time budget
+# from minimax import Engine
+
+logger = get_logger(__name__)
 
 
 class PyMillComputer(Game):
@@ -12,9 +17,22 @@ class PyMillComputer(Game):
     def __init__(self, top_level: tk.Toplevel, on_game_exit: Callable):
         super().__init__(top_level, on_game_exit)
         self.top_level.title("PyMill Computer")
+        self.engine = Engine()
+        self.ponder = True  # Search the human's replies while they think
+
+        # The computer's move is searched in a separate thread, so that the window doesn't freeze, and it's made in
+        # the main thread in check_computer_move
+        self.lock = threading.Lock()
+        self.searching = False
+        self.search_result = None
+        self.closed = False
+
+        self.start_pondering()
         self.update_piece_animation()
 
     def on_mouse_pressed(self, event):
+        if self.searching:  # Wait for the computer
+            return
         if self.board.mouse_over_any_node():
             self.board.node_pressed = True
         if not self.board.game_over:  # This is for when it's a tie
@@ -23,6 +41,8 @@ class PyMillComputer(Game):
                     self.board.pick_up_piece()
 
     def on_mouse_released(self, event):
+        if self.searching:
+            return
         if not self.board.game_over:  # This is for when it's a tie
             if self.board.must_remove_piece:
                 if self.board.node_pressed:
@@ -35,33 +55,92 @@ class PyMillComputer(Game):
 
         self.board.node_pressed = False
 
-        self.update_gui()
-        self.top_level.config(cursor="watch")  # Change the cursor to busy
-        self.canvas.update_idletasks()
-        self.make_computer_move()
-
         self.check_for_game_over()
         self.update_gui()
-        self.top_level.config(cursor="")
+        self.start_computer_move()
 
     def on_mouse_moved(self, event):
         self.board.update(event.x, event.y)
 
-    def make_computer_move(self):
+    def start_computer_move(self):
         if self.board.turn == PLAYER2 and not self.board.game_over:
+            print("Making a move...")
             if self.board.phase == PHASE1:
-                print("Making a move...")
-                self.board.put_new_piece_alone(ai_place_piece_at(self.board.get_current_state()), BLACK)
-                if self.board.must_remove_piece:
-                    self.board.remove_opponent_piece_alone(ai_remove_piece())
+                search = self.engine.place_piece_at
             else:
-                print("Making a move...")
-                self.board.change_piece_location(*ai_move_piece(self.board.get_current_state()))
-                if self.board.must_remove_piece:
-                    self.board.remove_opponent_piece_alone(ai_remove_piece())
+                search = self.engine.move_piece
+
+            self.searching = True
+            self.top_level.config(cursor="watch")  # Change the cursor to busy
+            threading.Thread(target=self.search_computer_move, daemon=True,
+                             args=(search, self.board.get_current_state())).start()
+            self.after(50, self.check_computer_move)
+
+    def start_pondering(self):
+        if self.ponder and self.board.turn == PLAYER1 and not self.board.game_over:
+            self.engine.ponder(self.board.get_current_state(), self.board.phase == PHASE2)
+
+    def search_computer_move(self, search: Callable, position: list):
+        # This runs in the search thread
+        try:
+            result = search(position)
+        except Exception as error:  # Handed to the main thread, which reports it; otherwise it would wait forever
+            result = error
+        with self.lock:
+            self.search_result = result
+            if self.closed:  # The window was closed while searching, so nobody is going to use the engine anymore
+                self.engine.close()
+
+    def check_computer_move(self):
+        if self.closed:
+            return
+
+        with self.lock:
+            result = self.search_result
+            self.search_result = None
+        if result is None:  # Still searching
+            self.after(50, self.check_computer_move)
+            return
+
+        self.searching = False
+        if isinstance(result, Exception):
+            self.top_level.config(cursor="")
+            logger.error("The search of the computer's move failed", exc_info=result)
+            messagebox.showerror("Computer Error", f"The computer couldn't find a move: {result}",
+                                 parent=self.top_level)
+            return
+
+        self.make_computer_move(result)
+
+        self.check_for_game_over()
+        self.update_gui()
+        self.top_level.config(cursor="")
+        self.start_pondering()
+
+    def make_computer_move(self, result: tuple):
+        if self.board.phase == PHASE1:
+            node_id, node_id_to_take = result
+            self.board.put_new_piece_alone(node_id, BLACK)
+            if self.board.must_remove_piece:
+                self.board.remove_opponent_piece_alone(node_id_to_take)
+        else:
+            node_id_src, node_id_dest, node_id_to_take = result
+            self.board.change_piece_location(node_id_src, node_id_dest)
+            if self.board.must_remove_piece:
+                self.board.remove_opponent_piece_alone(node_id_to_take)
 
     def update_piece_animation(self):
         for node in self.board.nodes:
             if node.piece is not None and not node.piece.reached_position:
                 node.piece.update(0, 0)
         self.after(25, self.update_piece_animation)
+
+    def exit(self):
+        # Closing the window (which is also the way to start a new game) aborts the search
+        with self.lock:
+            self.closed = True
+            if self.searching and self.search_result is None:
+                self.engine.stop()  # The search thread closes the engine when the search returns
+            else:
+                self.engine.close()
+        super().exit()
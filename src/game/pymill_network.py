@@ -1,4 +1,3 @@
-import pickle
 import threading
 import tkinter as tk
 from tkinter import messagebox
@@ -6,6 +5,7 @@ from typing import Callable
 
 from src.networking.server import Server
 from src.networking.client import Client
+from src.networking.protocol import ProtocolError
 from src.game.game import Game
 from src.constants import *
 
@@ -83,7 +83,8 @@ class PyMillNetwork(Game):
                 except tk.TclError:  # This was the client which was closed with the server
                     pass
                 continue
-            except pickle.UnpicklingError:
+            except ProtocolError:  # The other end doesn't speak the protocol, so there's nothing more to hear from it
+                self.listen_events = False
                 continue
             with self.lock:
                 self.message = message
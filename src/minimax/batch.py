@@ -0,0 +1,84 @@
+"""Evaluation of many positions at once with NumPy, for analysis and tuning.
+
+NumPy is only needed for this module; the game and the engine don't use it. The positions are the rows of an (N, 24)
+array of NO_PIECE, WHITE and BLACK, like the states of Board.get_current_state(), and every term of the evaluation is
+counted for all of them together: the mills with the index array of the mill lines and the free moves with the index
+array of the neighbors of every node. The evaluations are exactly the ones of Engine.evaluate(), except where that
+returns an infinity (in the moving phase, when a player is down to two pieces), which here is the largest or the
+smallest int32, like in the C extension.
+
+"""
+
+import numpy as np
+
+from src.topology import MILLS, NEIGHBORS
+from src.minimax.minimax import NO_PIECE, WHITE, BLACK, weights as default_weights
+
+WIN = np.iinfo(np.int32).max  # For WHITE; stands for inf
+LOSS = np.iinfo(np.int32).min  # For WHITE; stands for -inf
+
+_MILL_INDICES = np.array(MILLS, dtype=np.intp)  # (16, 3)
+
+# The neighbors of every node, padded with node 24, which is never empty, to four per node
+_NEIGHBOR_INDICES = np.array([neighbors + (24,) * (4 - len(neighbors)) for neighbors in NEIGHBORS], dtype=np.intp)
+
+_CHUNK_SIZE = 1 << 16  # Positions evaluated together, so that the temporary arrays stay small
+
+
+def evaluate_positions(positions, phase2: bool = False, weights: dict = None) -> np.ndarray:
+    """
+    Args:
+        positions: An (N, 24) array of positions (anything np.asarray takes, like a list of states).
+        phase2 (bool): If the pieces are moved instead of put.
+        weights (dict): The weights of the terms, which are integers, like Engine.weights; the defaults for new engines
+            if None.
+
+    Returns:
+        np.ndarray: The evaluation of every position, as int32; positive is good for WHITE and negative is good for
+            BLACK.
+
+    """
+    positions = np.asarray(positions, dtype=np.uint8)
+    if positions.ndim != 2 or positions.shape[1] != 24:
+        raise ValueError(f"The positions must be an (N, 24) array, not {positions.shape}")
+    if weights is None:
+        weights = default_weights
+
+    evaluations = np.empty(len(positions), dtype=np.int32)
+    for start in range(0, len(positions), _CHUNK_SIZE):
+        chunk = positions[start:start + _CHUNK_SIZE]
+        evaluations[start:start + len(chunk)] = _evaluate_chunk(chunk, phase2, weights)
+
+    return evaluations
+
+
+def _evaluate_chunk(positions: np.ndarray, phase2: bool, weights: dict) -> np.ndarray:
+    white = positions == WHITE
+    black = positions == BLACK
+    empty = positions == NO_PIECE
+
+    white_pieces = white.sum(axis=1, dtype=np.int64)
+    black_pieces = black.sum(axis=1, dtype=np.int64)
+
+    white_mills = white[:, _MILL_INDICES].all(axis=2).sum(axis=1, dtype=np.int64)
+    black_mills = black[:, _MILL_INDICES].all(axis=2).sum(axis=1, dtype=np.int64)
+
+    # The free moves of the pieces, as if they couldn't jump: the empty neighbors of every node, where there's a piece
+    empty_neighbors = np.pad(empty, ((0, 0), (0, 1)))[:, _NEIGHBOR_INDICES].sum(axis=2, dtype=np.int64)
+    white_mobility = (empty_neighbors * white).sum(axis=1)
+    black_mobility = (empty_neighbors * black).sum(axis=1)
+
+    if phase2:  # With three pieces they can jump
+        empty_nodes = 24 - white_pieces - black_pieces
+        white_mobility = np.where(white_pieces == 3, 3 * empty_nodes, white_mobility)
+        black_mobility = np.where(black_pieces == 3, 3 * empty_nodes, black_mobility)
+
+    evaluations = (white_pieces - black_pieces) * weights["piece"]
+    evaluations += (white_mills - black_mills) * weights["mill"]
+    evaluations += (white_mobility - black_mobility) * weights["free_move"]
+
+    if phase2:
+        evaluations = np.where(black_pieces == 2, WIN, evaluations)
+        evaluations = np.where(white_pieces == 2, LOSS, evaluations)  # Checked first by the engine, so it goes last
+
+    return evaluations.astype(np.int32)
@@ -0,0 +1,314 @@
+"""Benchmarks of the engines over a fixed set of positions.
+
+Measures the move generation (with perft), the evaluation and the search at fixed depths, for the Python engine and
+for the C extension, if it's built and can be imported as minimax. Run it from the game folder with:
+
+    python -m src.minimax.benchmark                            # Print the results
+    python -m src.minimax.benchmark --output results.json      # Also save them as JSON
+    python -m src.minimax.benchmark --compare baseline.json    # Flag what got slower than in a saved run
+    python -m src.minimax.benchmark --move-ordering            # Nodes searched with and without move ordering
+
+When comparing, it exits with status 1 if something got slower by more than the threshold or if a result changed.
+
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from timeit import default_timer
+
+from src.minimax import minimax as py_minimax
+from src.minimax.tablebase import Tablebase
+from src.minimax.book import Book
+
+try:
+    import minimax as c_minimax
+except ImportError:
+    c_minimax = None
+
+# (name, phase2, position) where position is a state as returned by Board.get_current_state()
+POSITIONS = (
+    ("empty board", False, [0] * 24),
+    ("opening", False, [0, 1, 0, 0, 2, 0, 0, 0, 0, 0, 1, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]),
+    ("placement", False, [1, 0, 0, 0, 2, 0, 0, 1, 2, 0, 1, 0, 0, 2, 0, 0, 1, 0, 0, 2, 0, 0, 0, 0]),
+    ("middlegame", True, [1, 0, 2, 0, 2, 1, 0, 1, 2, 1, 1, 0, 0, 2, 0, 2, 1, 0, 0, 2, 0, 1, 0, 0]),
+    ("endgame", True, [0, 1, 0, 2, 0, 1, 0, 0, 2, 1, 0, 0, 0, 0, 2, 0, 1, 0, 2, 0, 0, 0, 0, 0]),
+    ("flying", True, [0, 1, 0, 2, 0, 1, 0, 0, 2, 1, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+)
+
+# The known perft counts of the positions above, with WHITE to move, for depth 1, 2 and so on
+PERFT_COUNTS = {
+    "empty board": (24, 552, 12144, 255024),
+    "opening": (20, 380, 7056, 125688),
+    "placement": (16, 240, 3920, 60848),
+    "middlegame": (7, 82, 833, 8875),
+    "endgame": (11, 92, 841, 6810),
+    "flying": (54, 2916, 159576)
+}
+
+# The depths to which the root moves are searched; the C engine doesn't prune much, so keep them low
+SEARCH_DEPTHS = {
+    "empty board": 3,
+    "opening": 3,
+    "placement": 3,
+    "middlegame": 3,
+    "endgame": 3,
+    "flying": 2
+}
+
+EVALUATIONS = 2000  # How many times to evaluate each position for one measurement
+
+
+def run(engines: dict, repeat: int) -> dict:
+    """
+    Args:
+        engines (dict): The name of every engine and its module.
+        repeat (int): How many times to measure everything; the fastest time is kept.
+
+    Returns:
+        dict: The results, as saved in JSON.
+
+    """
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "engines": {}
+    }
+
+    for engine_name, module in engines.items():
+        engine_results = results["engines"][engine_name] = {}
+
+        for name, phase2, position in POSITIONS:
+            depth = len(PERFT_COUNTS[name])
+            seconds, count = _best_of(repeat, lambda: module.perft(position, depth, phase2))
+            engine_results[f"perft/{name}"] = {"depth": depth, "count": count, "seconds": seconds}
+            if count != PERFT_COUNTS[name][-1]:
+                print(f"{engine_name} perft {name} is wrong: {count} instead of {PERFT_COUNTS[name][-1]}")
+
+        for name, phase2, position in POSITIONS:
+            engine = _make_engine(module)
+            try:
+                seconds, evaluation = _best_of(repeat, lambda: _evaluate(engine, position, phase2))
+            finally:
+                engine.close()
+            engine_results[f"evaluate/{name}"] = {"evaluation": evaluation, "seconds": seconds / EVALUATIONS}
+
+        for name, phase2, position in POSITIONS:
+            depth = SEARCH_DEPTHS[name]
+            seconds, move = _best_of(repeat, lambda: _search(module, position, phase2, depth))
+            engine_results[f"search/{name}"] = {"depth": depth, "move": list(move), "seconds": seconds}
+
+    return results
+
+
+def print_results(results: dict):
+    for engine_name, engine_results in results["engines"].items():
+        print(f"{engine_name}:")
+        for key, result in engine_results.items():
+            details = ", ".join(f"{k} {v}" for k, v in result.items() if k != "seconds")
+            print(f"    {key:24} {_format_seconds(result['seconds']):>12}    {details}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Prints how the results compare to the baseline.
+
+    Args:
+        results (dict): The results of this run.
+        baseline (dict): The results of a previous run.
+        threshold (float): How much slower, as a fraction, a benchmark may be before it's flagged.
+
+    Returns:
+        int: The number of benchmarks that got slower or whose result changed.
+
+    """
+    print(f"Comparing to the baseline from {baseline.get('date')} ({baseline.get('machine')})")
+    problems = 0
+
+    for engine_name, engine_results in results["engines"].items():
+        baseline_results = baseline["engines"].get(engine_name)
+        if baseline_results is None:
+            print(f"{engine_name}: not in the baseline")
+            continue
+
+        print(f"{engine_name}:")
+        for key, result in engine_results.items():
+            old = baseline_results.get(key)
+            if old is None:
+                print(f"    {key:24} not in the baseline")
+                continue
+
+            ratio = result["seconds"] / old["seconds"]
+            changed = [k for k in result if k != "seconds" and result[k] != old.get(k)]
+
+            if changed:
+                verdict = "CHANGED " + ", ".join(f"{k} {old.get(k)} -> {result[k]}" for k in changed)
+                problems += 1
+            elif ratio > 1 + threshold:
+                verdict = "SLOWER"
+                problems += 1
+            elif ratio < 1 - threshold:
+                verdict = "faster"
+            else:
+                verdict = ""
+
+            print(f"    {key:24} {_format_seconds(old['seconds']):>12} -> {_format_seconds(result['seconds']):>12}"
+                  f" ({ratio:.2f}x)  {verdict}")
+
+    return problems
+
+
+def compare_move_ordering():
+    """Prints the nodes the Python engine searches at every depth with and without move ordering."""
+    for name, phase2, position in POSITIONS:
+        move_before, nodes_before, seconds_before = _search_with_move_ordering(position, phase2, False)
+        move_after, nodes_after, seconds_after = _search_with_move_ordering(position, phase2, True)
+
+        print(f"{name}:")
+        for depth, (before, after) in enumerate(zip(nodes_before, nodes_after)):
+            print(f"    depth {depth}: {before} -> {after} nodes ({before / after:.2f}x)")
+        print(f"    time: {seconds_before:.3f} -> {seconds_after:.3f} seconds")
+        if move_before != move_after:
+            print(f"    different moves: {move_before} -> {move_after}")
+
+
+def _search_with_move_ordering(position: list, phase2: bool, move_ordering: bool) -> tuple:
+    """
+    Returns:
+        tuple: The move, the nodes per depth and the time it took.
+
+    """
+    engine = _make_engine(py_minimax)
+    engine.use_move_ordering = move_ordering
+
+    try:
+        start = default_timer()
+        with _quiet():
+            if phase2:
+                move = engine.move_piece(position)
+            else:
+                move = engine.place_piece_at(position)
+        seconds = default_timer() - start
+    finally:
+        engine.close()
+
+    return move, engine.stats.nodes_per_depth, seconds
+
+
+def _make_engine(module):
+    if module is not py_minimax:  # The C engine doesn't have a time budget, a tablebase or a book
+        return module.Engine()
+
+    # Without the tablebase and the book, so that the results don't depend on what's saved in data
+    engine = module.Engine(tablebase=Tablebase(None), book=Book(None))
+    engine.search_limits["time_budget"] = float("inf")
+    return engine
+
+
+def _evaluate(engine, position: list, phase2: bool):
+    for _ in range(EVALUATIONS - 1):
+        engine.evaluate(position, phase2)
+    return engine.evaluate(position, phase2)
+
+
+def _search(module, position: list, phase2: bool, depth: int) -> tuple:
+    """Searches with a new engine, so that nothing is left in its tables from the previous searches."""
+    engine = _make_engine(module)
+    try:
+        with _quiet():
+            if phase2:
+                return engine.move_piece(position, max_depth=depth)
+            else:
+                return engine.place_piece_at(position, max_depth=depth)
+    finally:
+        engine.close()
+
+
+def _best_of(repeat: int, function) -> tuple:
+    """
+    Returns:
+        tuple: The fastest time of calling the function and what it returned.
+
+    """
+    best_seconds = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = default_timer()
+        result = function()
+        best_seconds = min(best_seconds, default_timer() - start)
+
+    return best_seconds, result
+
+
+@contextmanager
+def _quiet():
+    """Silences the output of the engines: the log of the Python one and whatever the C one prints, by pointing stdout
+    to nowhere."""
+    sys.stdout.flush()
+    stdout = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    level = py_minimax.logger.level
+    py_minimax.logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        py_minimax.logger.setLevel(level)
+        sys.stdout.flush()
+        os.dup2(stdout, 1)
+        os.close(stdout)
+        os.close(devnull)
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 0.001:
+        return f"{seconds * 1_000_000:.2f} us"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engines over a fixed set of positions.")
+    parser.add_argument("--engine", choices=("python", "c", "all"), default="all", help="which engines to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="measure everything this many times and keep the best")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="how much slower is a regression (0.1 is 10%%)")
+    parser.add_argument("--move-ordering", action="store_true",
+                        help="instead, compare the nodes searched with and without move ordering")
+    args = parser.parse_args()
+
+    if args.move_ordering:
+        compare_move_ordering()
+        return
+
+    engines = {}
+    if args.engine in ("python", "all"):
+        engines["python"] = py_minimax
+    if args.engine in ("c", "all"):
+        if c_minimax is not None:
+            engines["c"] = c_minimax
+        else:
+            print("The C extension isn't built, so skipping it")
+
+    results = run(engines, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold) > 0:
+            sys.exit(1)
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Opening book: the moves of BLACK in the first positions of the placing phase, searched deeply in advance.
+
+The file is a header followed by (key, move) records sorted by key, where the key is the canonical key of the
+position with BLACK to move and the move is for the canonical position, so symmetric positions are stored once.
+It's opened with mmap the first time it's needed and positions are found with a binary search, so nothing is read
+into memory. Build it with src.minimax.build_book.
+
+"""
+
+import mmap
+import os
+import struct
+from typing import Optional
+
+from src.log import get_logger
+from src.minimax.symmetry import INVERSES, canonicalize, transform_move
+
+logger = get_logger(__name__)
+
+PATH = os.path.join("data", "book.bin")
+
+_MAGIC = b"BOOK"
+_VERSION = 2
+_HEADER = struct.Struct("<4sBxxxI")  # Magic, version, number of records
+_RECORD = struct.Struct("<QH")  # Key, move
+
+
+class Book:
+    """An opening book file, opened the first time it's needed and read through mmap."""
+
+    def __init__(self, path: Optional[str] = PATH):
+        """
+        Args:
+            path (str): The book file; it's fine if it doesn't exist. None for no book at all.
+
+        """
+        self.path = path
+        self._file = None
+        self._size = 0
+        self._opened = False
+
+    def probe(self, white: int, black: int) -> Optional[int]:
+        """
+        Args:
+            white (int): The mask of the WHITE pieces.
+            black (int): The mask of the BLACK pieces.
+
+        Returns:
+            int: The move of BLACK in the placing phase, or None if the position isn't in the book.
+
+        """
+        if not self._opened:
+            self._open()
+        if self._file is None:
+            return None
+
+        key, symmetry = canonicalize(white, black)
+        low = 0
+        high = self._size
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, move = _RECORD.unpack_from(self._file, _HEADER.size + middle * _RECORD.size)
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return transform_move(move, INVERSES[symmetry])
+
+        return None
+
+    def __len__(self) -> int:
+        if not self._opened:
+            self._open()
+        return self._size
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._opened = False
+
+    def _open(self):
+        self._opened = True
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "rb") as file:
+                book = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError if it's empty
+            return
+
+        magic, version, size = _HEADER.unpack_from(book)
+        if magic != _MAGIC or version != _VERSION or len(book) != _HEADER.size + size * _RECORD.size:
+            logger.warning(f"Ignoring the opening book {self.path}; it's not valid")
+            book.close()
+            return
+
+        self._file = book
+        self._size = size
+
+
+def save_book(path: str, moves: dict):
+    """
+    Args:
+        path (str): Where to save the book.
+        moves (dict): The canonical key of every position, with BLACK to move in the placing phase, to its move
+            in the canonical position.
+
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(moves)))
+        for key in sorted(moves):
+            file.write(_RECORD.pack(key, moves[key]))
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,118 @@
+"""Builds the opening book. Run it from the game folder with:
+
+    python -m src.minimax.build_book --plies 4 --depth 6 --workers 4
+
+Starting from the empty board with WHITE to move, it follows every move of WHITE and, for BLACK, searches the
+position to the given depth and follows only the move found, as that's the one the engine will play. So the book
+covers whatever WHITE does in the first plies. Only one of the positions that are symmetric to each other is kept,
+and the searches of every ply are spread over the worker processes.
+
+"""
+
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+from timeit import default_timer
+
+from src.topology import BIT
+from src.minimax.book import PATH, save_book
+from src.minimax.minimax import Engine, NO_PIECE, WHITE, BLACK, NO_NODE, encode_move, logger, _generate_moves, \
+    _MOVE_BIT
+from src.minimax.symmetry import canonicalize, key_to_position
+
+_engine = None  # The engine of this process
+
+
+def build(plies: int, depth: int, path: str = PATH, workers: int = 1) -> dict:
+    """
+    Args:
+        plies (int): How many plies from the empty board to cover.
+        depth (int): The depth to which BLACK's positions are searched.
+        path (str): Where to save the book.
+        workers (int): The number of processes that search the positions.
+
+    Returns:
+        dict: The canonical key of every position in the book to its move.
+
+    """
+    start = default_timer()
+    moves = {}
+    positions = {0}  # The canonical keys of the positions at the current ply
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for ply in range(plies):
+            new_positions = set()
+
+            if ply % 2 == 0:  # WHITE plays anything
+                for key in positions:
+                    white, black = key_to_position(key)
+                    for move in _generate_moves(white, black, False):
+                        new_white, new_black = _apply_move(white, black, move)
+                        new_positions.add(canonicalize(new_white, new_black)[0])
+            else:
+                positions = sorted(positions)
+                if executor is not None:
+                    chunk_size = max(1, len(positions) // (workers * 4))
+                    best_moves = list(executor.map(_search, positions, [depth] * len(positions),
+                                                   chunksize=chunk_size))
+                else:
+                    best_moves = [_search(position, depth) for position in positions]
+
+                for key, move in zip(positions, best_moves):
+                    moves[key] = move
+                    white, black = key_to_position(key)
+                    new_black, new_white = _apply_move(black, white, move)
+                    new_positions.add(canonicalize(new_white, new_black)[0])
+
+            positions = new_positions
+            print(f"Ply {ply + 1}: {len(positions)} positions, {len(moves)} in the book, "
+                  f"{default_timer() - start:.1f} seconds")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    save_book(path, moves)
+    return moves
+
+
+def _search(key: int, depth: int) -> int:
+    """Runs in a worker process, if there are any.
+
+    Returns:
+        int: The move of BLACK.
+
+    """
+    global _engine
+    if _engine is None:
+        _engine = Engine()
+        _engine.use_book = False  # Don't build the book on top of an older one
+        _engine.search_limits["time_budget"] = inf
+        logger.setLevel(logging.WARNING)  # The stats of every search would be too much
+
+    white, black = key_to_position(key)
+    state = [WHITE if white & BIT[i] else BLACK if black & BIT[i] else NO_PIECE for i in range(24)]
+    dest, take = _engine.place_piece_at(state, max_depth=depth)
+
+    return encode_move(-1, dest, take)
+
+
+def _apply_move(pieces: int, opponent_pieces: int, move: int) -> tuple:
+    return pieces | BIT[move >> 5 & NO_NODE], opponent_pieces & ~_MOVE_BIT[move >> 10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book of the placing phase.")
+    parser.add_argument("--plies", type=int, default=4, help="how many plies from the empty board to cover")
+    parser.add_argument("--depth", type=int, default=6, help="the depth to which BLACK's positions are searched")
+    parser.add_argument("--output", default=PATH, help="where to save the book")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="the number of processes")
+    args = parser.parse_args()
+
+    build(args.plies, args.depth, args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
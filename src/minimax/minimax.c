@@ -1,9 +1,10 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
+#include <structmember.h>
 
-#include <stdio.h>
 #include <limits.h>
 #include "helpers.h"
+#include "topology.h"
 
 #if 1
     #undef NDEBUG
@@ -19,80 +20,88 @@
 #define WEIGHT_PIECE 24
 #define WEIGHT_FREE_MOVE 1
 
-int ai_place_piece_at(int*);
-int ai_remove_piece();
-Tuple ai_move_piece(int*);
-int _get_evaluation_of_position_phase1(int*);
-int _get_evaluation_of_position_phase2(int*);
-int _minimax_phase1(int*, int, int, int, int);
-int _minimax_phase2(int*, int, int, int, int);
+// Everything a search changes lives here, so that searches can run at the same time, each with its own context
+typedef struct {
+	int best_node_id_to_take;
+	int computation_count;
+	int depth;  // To which the moves of the root are searched
+	long long node_count;
+} SearchContext;
+
+int ai_place_piece_at(SearchContext*, int*);
+int ai_remove_piece(SearchContext*);
+Tuple ai_move_piece(SearchContext*, int*);
+int _get_evaluation_of_position_phase1(SearchContext*, int*);
+int _get_evaluation_of_position_phase2(SearchContext*, int*);
+int _minimax_phase1(SearchContext*, int*, int, int, int, int);
+int _minimax_phase2(SearchContext*, int*, int, int, int, int);
 int _check_is_windmill_formed(int*, int, int);
 Dict _where_can_go(int*, int, int, int);
 List _get_nodes_pieces_to_take(int*, int);
 Tuple _get_number_of_windmills(int*);
 int _is_game_over(int*);
 int _can_jump(int*, int);
+long long _perft(int*, int, int, int);
+long long _perft_after_put(int*, int, int, int, int);
 
-int _best_node_id_to_take = -1;
-int computation_count = 0;
+// For the old interface, where the piece to take is asked for in a second call
+static SearchContext default_context = { -1, 0, 4 };
 
 
-int ai_place_piece_at(int* position) {
+int ai_place_piece_at(SearchContext* ctx, int* position) {
 	int best_evaluation = INT_MAX;
 	int best_node_id = -1;
+	ctx->computation_count = 0;
+	ctx->node_count = 0;
 
 	for (int i = 0; i < 24; i++) {
 		if (position[i] == NO_PIECE) {
 			position[i] = BLACK;
 			int evaluation;
 			if (_check_is_windmill_formed(position, BLACK, i)) {
-				int best_eval_piece_to_take = INT_MAX;
 				List pieces_to_take = _get_nodes_pieces_to_take(position, WHITE);
 				for (int j = 0; j < pieces_to_take.count; j++) {
 					int j_ = pieces_to_take.items[j];
 					position[j_] = NO_PIECE;
-					evaluation = _minimax_phase1(position, 4, INT_MIN, INT_MAX, 1);
+					evaluation = _minimax_phase1(ctx, position, ctx->depth, INT_MIN, INT_MAX, 1);
 					position[j_] = WHITE;
-					if (evaluation < best_eval_piece_to_take) {
-						_best_node_id_to_take = j_;
-						best_eval_piece_to_take = evaluation;
-					}
-					if (evaluation < best_evaluation) {
+					if (evaluation < best_evaluation) {  // The piece to take goes with the best move
 						best_node_id = i;
+						ctx->best_node_id_to_take = j_;
 						best_evaluation = evaluation;
 					}
 				}
 			} else {
-				evaluation = _minimax_phase1(position, 4, INT_MIN, INT_MAX, 1);
+				evaluation = _minimax_phase1(ctx, position, ctx->depth, INT_MIN, INT_MAX, 1);
 				if (evaluation < best_evaluation) {
 					best_node_id = i;
+					ctx->best_node_id_to_take = -1;
 					best_evaluation = evaluation;
 				}
 			}
 			position[i] = NO_PIECE;
-			printf("Checked spot %d, evaluation is %d\n", i, evaluation);
 		}
 	}
-	printf("Nr. of computations is %d\n", computation_count);
-	computation_count = 0;
 
 	assert(best_node_id != -1);
 	return best_node_id;
 }
 
 
-int ai_remove_piece() {
-	assert(_best_node_id_to_take != -1);
-	int id = _best_node_id_to_take;
-	_best_node_id_to_take = -1;
+int ai_remove_piece(SearchContext* ctx) {
+	assert(ctx->best_node_id_to_take != -1);
+	int id = ctx->best_node_id_to_take;
+	ctx->best_node_id_to_take = -1;
 	return id;
 }
 
 
-Tuple ai_move_piece(int* position) {
+Tuple ai_move_piece(SearchContext* ctx, int* position) {
 	int best_evaluation = INT_MAX;
 	int best_node_id_src = -1;
 	int best_node_id_dest = -1;
+	ctx->computation_count = 0;
+	ctx->node_count = 0;
 
 	for (int i = 0; i < 24; i++) {
 		if (position[i] == BLACK) {
@@ -104,40 +113,34 @@ Tuple ai_move_piece(int* position) {
 					position[i] = NO_PIECE;
 					int evaluation;
 					if (_check_is_windmill_formed(position, BLACK, j_)) {
-						int best_eval_piece_to_take = INT_MAX;
 						List pieces_to_take = _get_nodes_pieces_to_take(position, WHITE);
 						for (int k = 0; k < pieces_to_take.count; k++) {
 							int k_ = pieces_to_take.items[k];
 							position[k_] = NO_PIECE;
-							evaluation = _minimax_phase2(position, 4, INT_MIN, INT_MAX, 1);
+							evaluation = _minimax_phase2(ctx, position, ctx->depth, INT_MIN, INT_MAX, 1);
 							position[k_] = WHITE;
-							if (evaluation < best_eval_piece_to_take) {
-								_best_node_id_to_take = k_;
-								best_eval_piece_to_take = evaluation;
-							}
-							if (evaluation < best_evaluation) {
+							if (evaluation < best_evaluation) {  // The piece to take goes with the best move
 								best_node_id_src = i;
 								best_node_id_dest = j_;
+								ctx->best_node_id_to_take = k_;
 								best_evaluation = evaluation;
 							}
 						}
 					} else {
-						evaluation = _minimax_phase2(position, 4, INT_MIN, INT_MAX, 1);
+						evaluation = _minimax_phase2(ctx, position, ctx->depth, INT_MIN, INT_MAX, 1);
 						if (evaluation < best_evaluation) {
 							best_node_id_src = i;
 							best_node_id_dest = j_;
+							ctx->best_node_id_to_take = -1;
 							best_evaluation = evaluation;
 						}
 					}
 					position[i] = BLACK;
 					position[j_] = NO_PIECE;
-					printf("Checked spot %d for piece node %d, evaluation is %d\n", j_, i, evaluation);
 				}
 			}
 		}
 	}
-	printf("Nr. of computations is %d\n", computation_count);
-	computation_count = 0;
 
 	assert(best_node_id_src != -1 && best_node_id_dest != -1);
 	Tuple t;
@@ -147,8 +150,8 @@ Tuple ai_move_piece(int* position) {
 }
 
 
-int _get_evaluation_of_position_phase1(int* position) {
-	computation_count++;
+int _get_evaluation_of_position_phase1(SearchContext* ctx, int* position) {
+	ctx->computation_count++;
 
 	int evaluation = 0;
 
@@ -188,8 +191,8 @@ int _get_evaluation_of_position_phase1(int* position) {
 }
 
 
-int _get_evaluation_of_position_phase2(int* position) {
-	computation_count++;
+int _get_evaluation_of_position_phase2(SearchContext* ctx, int* position) {
+	ctx->computation_count++;
 
 	int white_pieces = 0;
 	int black_pieces = 0;
@@ -242,9 +245,10 @@ int _get_evaluation_of_position_phase2(int* position) {
 }
 
 
-int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizing_player) {
+int _minimax_phase1(SearchContext* ctx, int* position, int depth, int alpha, int beta, int maximizing_player) {
+	ctx->node_count++;
 	if (depth == 0)
-		return _get_evaluation_of_position_phase1(position);
+		return _get_evaluation_of_position_phase1(ctx, position);
 
 	if (maximizing_player) {
 		int max_eval = INT_MIN;
@@ -256,7 +260,7 @@ int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizin
 					for (int j = 0; j < pieces_to_take.count; j++) {
 						int j_ = pieces_to_take.items[j];
 						position[j_] = NO_PIECE;
-						int eval = _minimax_phase1(position, depth - 1, alpha, beta, 0);
+						int eval = _minimax_phase1(ctx, position, depth - 1, alpha, beta, 0);
 						position[j_] = BLACK;
 						max_eval = MAX(max_eval, eval);
 						int new_alpha = MAX(alpha, eval);
@@ -266,7 +270,7 @@ int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizin
 						}
 					}
 				} else {
-					int eval = _minimax_phase1(position, depth - 1, alpha, beta, 0);
+					int eval = _minimax_phase1(ctx, position, depth - 1, alpha, beta, 0);
 					max_eval = MAX(max_eval, eval);
 					int new_alpha = MAX(alpha, eval);
 					if (beta <= new_alpha) {
@@ -288,7 +292,7 @@ int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizin
 					for (int j = 0; j < pieces_to_take.count; j++) {
 						int j_ = pieces_to_take.items[j];
 						position[j_] = NO_PIECE;
-						int eval = _minimax_phase1(position, depth - 1, alpha, beta, 1);
+						int eval = _minimax_phase1(ctx, position, depth - 1, alpha, beta, 1);
 						position[j_] = WHITE;
 						min_eval = MIN(min_eval, eval);
 						int new_beta = MIN(beta, eval);
@@ -298,7 +302,7 @@ int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizin
 						}
 					}
 				} else {
-					int eval = _minimax_phase1(position, depth - 1, alpha, beta, 1);
+					int eval = _minimax_phase1(ctx, position, depth - 1, alpha, beta, 1);
 					min_eval = MIN(min_eval, eval);
 					int new_beta = MIN(beta, eval);
 					if (new_beta <= alpha) {
@@ -314,9 +318,10 @@ int _minimax_phase1(int* position, int depth, int alpha, int beta, int maximizin
 }
 
 
-int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizing_player) {
+int _minimax_phase2(SearchContext* ctx, int* position, int depth, int alpha, int beta, int maximizing_player) {
+	ctx->node_count++;
 	if (depth == 0 || _is_game_over(position))
-		return _get_evaluation_of_position_phase2(position);
+		return _get_evaluation_of_position_phase2(ctx, position);
 
 	if (maximizing_player) {
 		int max_eval = INT_MIN;
@@ -333,7 +338,7 @@ int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizin
 							for (int k = 0; k < pieces_to_take.count; k++) {
 								int k_ = pieces_to_take.items[k];
 								position[k_] = NO_PIECE;
-								int eval = _minimax_phase2(position, depth - 1, alpha, beta, 0);
+								int eval = _minimax_phase2(ctx, position, depth - 1, alpha, beta, 0);
 								position[k_] = BLACK;
 								max_eval = MAX(max_eval, eval);
 								int new_alpha = MAX(alpha, eval);
@@ -344,7 +349,7 @@ int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizin
 								}
 							}
 						} else {
-							int eval = _minimax_phase2(position, depth - 1, alpha, beta, 0);
+							int eval = _minimax_phase2(ctx, position, depth - 1, alpha, beta, 0);
 							max_eval = MAX(max_eval, eval);
 							int new_alpha = MAX(alpha, eval);
 							if (beta <= new_alpha) {
@@ -375,7 +380,7 @@ int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizin
 							for (int k = 0; k < pieces_to_take.count; k++) {
 								int k_ = pieces_to_take.items[k];
 								position[k_] = NO_PIECE;
-								int eval = _minimax_phase2(position, depth - 1, alpha, beta, 1);
+								int eval = _minimax_phase2(ctx, position, depth - 1, alpha, beta, 1);
 								position[k_] = WHITE;
 								min_eval = MIN(min_eval, eval);
 								int new_beta = MIN(beta, eval);
@@ -386,7 +391,7 @@ int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizin
 								}
 							}
 						} else {
-							int eval = _minimax_phase2(position, depth - 1, alpha, beta, 1);
+							int eval = _minimax_phase2(ctx, position, depth - 1, alpha, beta, 1);
 							min_eval = MIN(min_eval, eval);
 							int new_beta = MIN(beta, eval);
 							if (new_beta <= alpha) {
@@ -407,56 +412,15 @@ int _minimax_phase2(int* position, int depth, int alpha, int beta, int maximizin
 
 
 int _check_is_windmill_formed(int* position, int color, int node) {
-	if (position[0] == color && position[1] == color && position[2] == color)
-		if (node == 0 || node == 1 || node == 2)
-			return 1;
-	if (position[0] == color && position[9] == color && position[21] == color)
-		if (node == 0 || node == 9 || node == 21)
-			return 1;
-	if (position[21] == color && position[22] == color && position[23] == color)
-		if (node == 21 || node == 22 || node == 23)
-			return 1;
-	if (position[23] == color && position[14] == color && position[2] == color)
-		if (node == 23 || node == 14 || node == 2)
-			return 1;
-	if (position[3] == color && position[4] == color && position[5] == color)
-		if (node == 3 || node == 4 || node == 5)
-			return 1;
-	if (position[3] == color && position[10] == color && position[18] == color)
-		if (node == 3 || node == 10 || node == 18)
-			return 1;
-	if (position[18] == color && position[19] == color && position[20] == color)
-		if (node == 18 || node == 19 || node == 20)
-			return 1;
-	if (position[20] == color && position[13] == color && position[5] == color)
-		if (node == 20 || node == 13 || node == 5)
-			return 1;
-	if (position[6] == color && position[7] == color && position[8] == color)
-		if (node == 6 || node == 7 || node == 8)
-			return 1;
-	if (position[6] == color && position[11] == color && position[15] == color)
-		if (node == 6 || node == 11 || node == 15)
-			return 1;
-	if (position[15] == color && position[16] == color && position[17] == color)
-		if (node == 15 || node == 16 || node == 17)
-			return 1;
-	if (position[17] == color && position[12] == color && position[8] == color)
-		if (node == 17 || node == 12 || node == 8)
-			return 1;
-	if (position[1] == color && position[4] == color && position[7] == color)
-		if (node == 1 || node == 4 || node == 7)
-			return 1;
-	if (position[9] == color && position[10] == color && position[11] == color)
-		if (node == 9 || node == 10 || node == 11)
-			return 1;
-	if (position[22] == color && position[19] == color && position[16] == color)
-		if (node == 22 || node == 19 || node == 16)
-			return 1;
-	if (position[12] == color && position[13] == color && position[14] == color)
-		if (node == 12 || node == 13 || node == 14)
-			return 1;
+	for (int i = 0; i < MILL_COUNT; i++) {
+		const int* mill = MILLS[i];
+
+		if (position[mill[0]] == color && position[mill[1]] == color && position[mill[2]] == color)
+			if (node == mill[0] || node == mill[1] || node == mill[2])
+				return 1;
+	}
 
-    return 0;
+	return 0;
 }
 
 
@@ -465,119 +429,12 @@ Dict _where_can_go(int* position, int node_id, int player, int phase1_evaluation
 		Dict d;
 		Dict_initialize(&d);
 
-		if (node_id == 0) {
-			Dict_put_pair(&d, 1, position[1]);
-			Dict_put_pair(&d, 9, position[9]);
-			return d;
-		} else if (node_id == 1) {
-			Dict_put_pair(&d, 0, position[0]);
-			Dict_put_pair(&d, 2, position[2]);
-			Dict_put_pair(&d, 4, position[4]);
-			return d;
-		} else if (node_id == 2) {
-			Dict_put_pair(&d, 1, position[1]);
-			Dict_put_pair(&d, 14, position[14]);
-			return d;
-		} else if (node_id == 3) {
-			Dict_put_pair(&d, 4, position[4]);
-			Dict_put_pair(&d, 10, position[10]);
-			return d;
-		} else if (node_id == 4) {
-			Dict_put_pair(&d, 1, position[1]);
-			Dict_put_pair(&d, 3, position[3]);
-			Dict_put_pair(&d, 5, position[5]);
-			Dict_put_pair(&d, 7, position[7]);
-			return d;
-		} else if (node_id == 5) {
-			Dict_put_pair(&d, 4, position[4]);
-			Dict_put_pair(&d, 13, position[13]);
-			return d;
-		} else if (node_id == 6) {
-			Dict_put_pair(&d, 7, position[7]);
-			Dict_put_pair(&d, 11, position[11]);
-			return d;
-		} else if (node_id == 7) {
-			Dict_put_pair(&d, 4, position[4]);
-			Dict_put_pair(&d, 6, position[6]);
-			Dict_put_pair(&d, 8, position[8]);
-			return d;
-		} else if (node_id == 8) {
-			Dict_put_pair(&d, 7, position[7]);
-			Dict_put_pair(&d, 12, position[12]);
-			return d;
-		} else if (node_id == 9) {
-			Dict_put_pair(&d, 0, position[0]);
-			Dict_put_pair(&d, 10, position[10]);
-			Dict_put_pair(&d, 21, position[21]);
-			return d;
-		} else if (node_id == 10) {
-			Dict_put_pair(&d, 3, position[3]);
-			Dict_put_pair(&d, 9, position[9]);
-			Dict_put_pair(&d, 11, position[11]);
-			Dict_put_pair(&d, 18, position[18]);
-			return d;
-		} else if (node_id == 11) {
-			Dict_put_pair(&d, 6, position[6]);
-			Dict_put_pair(&d, 10, position[10]);
-			Dict_put_pair(&d, 15, position[15]);
-			return d;
-		} else if (node_id == 12) {
-			Dict_put_pair(&d, 8, position[8]);
-			Dict_put_pair(&d, 13, position[13]);
-			Dict_put_pair(&d, 17, position[17]);
-			return d;
-		} else if (node_id == 13) {
-			Dict_put_pair(&d, 5, position[5]);
-			Dict_put_pair(&d, 12, position[12]);
-			Dict_put_pair(&d, 14, position[14]);
-			Dict_put_pair(&d, 20, position[20]);
-			return d;
-		} else if (node_id == 14) {
-			Dict_put_pair(&d, 2, position[2]);
-			Dict_put_pair(&d, 13, position[13]);
-			Dict_put_pair(&d, 23, position[23]);
-			return d;
-		} else if (node_id == 15) {
-			Dict_put_pair(&d, 11, position[11]);
-			Dict_put_pair(&d, 16, position[16]);
-			return d;
-		} else if (node_id == 16) {
-			Dict_put_pair(&d, 15, position[15]);
-			Dict_put_pair(&d, 17, position[17]);
-			Dict_put_pair(&d, 19, position[19]);
-			return d;
-		} else if (node_id == 17) {
-			Dict_put_pair(&d, 12, position[12]);
-			Dict_put_pair(&d, 16, position[16]);
-			return d;
-		} else if (node_id == 18) {
-			Dict_put_pair(&d, 10, position[10]);
-			Dict_put_pair(&d, 19, position[19]);
-			return d;
-		} else if (node_id == 19) {
-			Dict_put_pair(&d, 16, position[16]);
-			Dict_put_pair(&d, 18, position[18]);
-			Dict_put_pair(&d, 20, position[20]);
-			Dict_put_pair(&d, 22, position[22]);
-			return d;
-		} else if (node_id == 20) {
-			Dict_put_pair(&d, 13, position[13]);
-			Dict_put_pair(&d, 19, position[19]);
-			return d;
-		} else if (node_id == 21) {
-			Dict_put_pair(&d, 9, position[9]);
-			Dict_put_pair(&d, 22, position[22]);
-			return d;
-		} else if (node_id == 22) {
-			Dict_put_pair(&d, 19, position[19]);
-			Dict_put_pair(&d, 21, position[21]);
-			Dict_put_pair(&d, 23, position[23]);
-			return d;
-		} else {
-			Dict_put_pair(&d, 14, position[14]);
-			Dict_put_pair(&d, 22, position[22]);
-			return d;
+		for (int i = 0; i < NEIGHBOR_COUNTS[node_id]; i++) {
+			int neighbor = NEIGHBORS[node_id][i];
+			Dict_put_pair(&d, neighbor, position[neighbor]);
 		}
+
+		return d;
 	} else {
 		Dict nodes;
 		Dict_initialize(&nodes);
@@ -595,92 +452,21 @@ List _get_nodes_pieces_to_take(int* position, int color) {
 	List windmill_nodes;
 	List_initialize(&windmill_nodes);
 
-	if (position[0] == color && position[1] == color && position[2] == color) {
-		List_append(&windmill_nodes, 0);
-		List_append(&windmill_nodes, 1);
-		List_append(&windmill_nodes, 2);
-	}
-	if (position[0] == color && position[9] == color && position[21] == color) {
-		List_append(&windmill_nodes, 0);
-		List_append(&windmill_nodes, 9);
-		List_append(&windmill_nodes, 21);
-	}
-	if (position[21] == color && position[22] == color && position[23] == color) {
-		List_append(&windmill_nodes, 21);
-		List_append(&windmill_nodes, 22);
-		List_append(&windmill_nodes, 23);
-	}
-	if (position[23] == color && position[14] == color && position[2] == color) {
-		List_append(&windmill_nodes, 23);
-		List_append(&windmill_nodes, 14);
-		List_append(&windmill_nodes, 2);
-	}
-	if (position[3] == color && position[4] == color && position[5] == color) {
-		List_append(&windmill_nodes, 3);
-		List_append(&windmill_nodes, 4);
-		List_append(&windmill_nodes, 5);
-	}
-	if (position[3] == color && position[10] == color && position[18] == color) {
-		List_append(&windmill_nodes, 3);
-		List_append(&windmill_nodes, 10);
-		List_append(&windmill_nodes, 18);
-	}
-	if (position[18] == color && position[19] == color && position[20] == color) {
-		List_append(&windmill_nodes, 18);
-		List_append(&windmill_nodes, 19);
-		List_append(&windmill_nodes, 20);
-	}
-	if (position[20] == color && position[13] == color && position[5] == color) {
-		List_append(&windmill_nodes, 20);
-		List_append(&windmill_nodes, 13);
-		List_append(&windmill_nodes, 5);
-	}
-	if (position[6] == color && position[7] == color && position[8] == color) {
-		List_append(&windmill_nodes, 6);
-		List_append(&windmill_nodes, 7);
-		List_append(&windmill_nodes, 8);
-	}
-	if (position[6] == color && position[11] == color && position[15] == color) {
-		List_append(&windmill_nodes, 6);
-		List_append(&windmill_nodes, 11);
-		List_append(&windmill_nodes, 15);
-	}
-	if (position[15] == color && position[16] == color && position[17] == color) {
-		List_append(&windmill_nodes, 15);
-		List_append(&windmill_nodes, 16);
-		List_append(&windmill_nodes, 17);
-	}
-	if (position[17] == color && position[12] == color && position[8] == color) {
-		List_append(&windmill_nodes, 17);
-		List_append(&windmill_nodes, 12);
-		List_append(&windmill_nodes, 8);
-	}
-	if (position[1] == color && position[4] == color && position[7] == color) {
-		List_append(&windmill_nodes, 1);
-		List_append(&windmill_nodes, 4);
-		List_append(&windmill_nodes, 7);
-	}
-	if (position[9] == color && position[10] == color && position[11] == color) {
-		List_append(&windmill_nodes, 9);
-		List_append(&windmill_nodes, 10);
-		List_append(&windmill_nodes, 11);
-	}
-	if (position[22] == color && position[19] == color && position[16] == color) {
-		List_append(&windmill_nodes, 22);
-		List_append(&windmill_nodes, 19);
-		List_append(&windmill_nodes, 16);
-	}
-	if (position[12] == color && position[13] == color && position[14] == color) {
-		List_append(&windmill_nodes, 12);
-		List_append(&windmill_nodes, 13);
-		List_append(&windmill_nodes, 14);
+	for (int i = 0; i < MILL_COUNT; i++) {
+		const int* mill = MILLS[i];
+
+		if (position[mill[0]] == color && position[mill[1]] == color && position[mill[2]] == color) {
+			List_append(&windmill_nodes, mill[0]);
+			List_append(&windmill_nodes, mill[1]);
+			List_append(&windmill_nodes, mill[2]);
+		}
 	}
 
 	List nodes;
 	List_initialize(&nodes);
 
 	for (int i = 0; i < 24; i++) {
-		if (position[i] == color && !List_item_in_list(&nodes, i))
+		if (position[i] == color && !List_item_in_list(&windmill_nodes, i))
 			List_append(&nodes, i);
 	}
 
@@ -701,109 +487,23 @@ List _get_nodes_pieces_to_take(int* position, int color) {
 
 
 Tuple _get_number_of_windmills(int* position) {
-    int white_mills = 0;
-    int black_mills = 0;
-
-    if (position[0] == position[1] && position[1] == position[2]) {
-        if (position[0] == WHITE)
-            white_mills++;
-        else if (position[0] == BLACK)
-            black_mills++;
-    }
-    if (position[0] == position[9] && position[9] == position[21]) {
-        if (position[0] == WHITE)
-            white_mills++;
-        else if (position[0] == BLACK)
-            black_mills++;
-    }
-    if (position[21] == position[22] && position[22] == position[23]) {
-        if (position[21] == WHITE)
-            white_mills++;
-        else if (position[21] == BLACK)
-            black_mills++;
-    }
-    if (position[23] == position[14] && position[14] == position[2]) {
-        if (position[23] == WHITE)
-            white_mills++;
-        else if (position[23] == BLACK)
-            black_mills++;
-    }
-    if (position[3] == position[4] && position[4] == position[5]) {
-        if (position[3] == WHITE)
-            white_mills++;
-        else if (position[3] == BLACK)
-            black_mills++;
-    }
-    if (position[3] == position[10] && position[10] == position[18]) {
-        if (position[3] == WHITE)
-            white_mills++;
-        else if (position[3] == BLACK)
-            black_mills++;
-    }
-    if (position[18] == position[19] && position[19] == position[20]) {
-        if(position[18] == WHITE)
-            white_mills++;
-        else if (position[18] == BLACK)
-            black_mills++;
-    }
-    if (position[20] == position[13] && position[13] == position[5]) {
-        if (position[20] == WHITE)
-            white_mills++;
-        else if (position[20] == BLACK)
-            black_mills++;
-    }
-    if (position[6] == position[7] && position[7] == position[8]) {
-        if (position[6] == WHITE)
-            white_mills++;
-        else if (position[6] == BLACK)
-            black_mills++;
-    }
-    if (position[6] == position[11] && position[11] == position[15]) {
-        if (position[6] == WHITE)
-            white_mills++;
-        else if (position[6] == BLACK)
-            black_mills++;
-    }
-    if (position[15] == position[16] && position[16] == position[17]) {
-        if (position[15] == WHITE)
-            white_mills++;
-        else if (position[15] == BLACK)
-            black_mills++;
-    }
-    if (position[17] == position[12] && position[12] == position[8]) {
-        if (position[17] == WHITE)
-            white_mills++;
-        else if (position[17] == BLACK)
-            black_mills++;
-    }
-    if (position[1] == position[4] && position[4] == position[7]) {
-        if (position[1] == WHITE)
-            white_mills++;
-        else if (position[1] == BLACK)
-            black_mills++;
-    }
-    if (position[9] == position[10] && position[10] == position[11]) {
-        if (position[9] == WHITE)
-            white_mills++;
-        else if (position[9] == BLACK)
-            black_mills++;
-    }
-    if (position[22] == position[19] && position[19] == position[16]) {
-        if (position[22] == WHITE)
-            white_mills++;
-        else if (position[22] == BLACK)
-            black_mills++;
-    }
-    if (position[12] == position[13] && position[13] == position[14]) {
-        if (position[12] == WHITE)
-            white_mills++;
-        else if (position[12] == BLACK)
-            black_mills++;
-    }
-
-    Tuple mills = {white_mills, black_mills};
-
-    return mills;
+	int white_mills = 0;
+	int black_mills = 0;
+
+	for (int i = 0; i < MILL_COUNT; i++) {
+		const int* mill = MILLS[i];
+
+		if (position[mill[0]] == position[mill[1]] && position[mill[1]] == position[mill[2]]) {
+			if (position[mill[0]] == WHITE)
+				white_mills++;
+			else if (position[mill[0]] == BLACK)
+				black_mills++;
+		}
+	}
+
+	Tuple mills = {white_mills, black_mills};
+
+	return mills;
 }
 
 
@@ -869,67 +569,264 @@ int _can_jump(int* position, int player) {
 }
 
 
-static PyObject* py_ai_place_piece_at(PyObject* self, PyObject* position) {
-	int position_array[24];
+// Counts the positions at the given depth, for testing and timing the move generation on its own. Like the search,
+// phase 1 doesn't count the pieces in hand and phase 2 ends when a player has less than 3 pieces.
+long long _perft(int* position, int depth, int phase2, int color) {
+	if (depth == 0)
+		return 1;
+
+	if (phase2) {
+		int white_pieces = 0;
+		int black_pieces = 0;
+		for (int i = 0; i < 24; i++) {
+			if (position[i] == WHITE)
+				white_pieces++;
+			else if (position[i] == BLACK)
+				black_pieces++;
+		}
+		if (white_pieces < 3 || black_pieces < 3)
+			return 0;
+	}
+
+	long long count = 0;
 
+	for (int i = 0; i < 24; i++) {
+		if (!phase2 && position[i] == NO_PIECE) {
+			position[i] = color;
+			count += _perft_after_put(position, depth, phase2, color, i);
+			position[i] = NO_PIECE;
+		} else if (phase2 && position[i] == color) {
+			Dict where_can_go = _where_can_go(position, i, color, 0);
+			for (int j = 0; j < where_can_go.count; j++) {
+				int j_ = where_can_go.keys[j];
+				if (position[j_] == NO_PIECE) {
+					position[j_] = color;
+					position[i] = NO_PIECE;
+					count += _perft_after_put(position, depth, phase2, color, j_);
+					position[i] = color;
+					position[j_] = NO_PIECE;
+				}
+			}
+		}
+	}
+
+	return count;
+}
+
+
+long long _perft_after_put(int* position, int depth, int phase2, int color, int node) {
+	int opponent = color == WHITE ? BLACK : WHITE;
+	long long count = 0;
+
+	if (_check_is_windmill_formed(position, color, node)) {
+		List pieces_to_take = _get_nodes_pieces_to_take(position, opponent);
+		for (int k = 0; k < pieces_to_take.count; k++) {
+			int k_ = pieces_to_take.items[k];
+			position[k_] = NO_PIECE;
+			count += _perft(position, depth - 1, phase2, opponent);
+			position[k_] = opponent;
+		}
+	} else {
+		count += _perft(position, depth - 1, phase2, opponent);
+	}
+
+	return count;
+}
+
+
+static int position_from_list(PyObject* position, int* position_array) {
 	for (int i = 0; i < 24; i++) {
 		PyObject* item = PyList_GetItem(position, i);  // Borowed reference
+		if (item == NULL)
+			return -1;
+
 		long item_as_number = PyLong_AsLong(item);
 
 		if (item_as_number < 0 && PyErr_Occurred()) {  // Might not be needed
-			return NULL;
+			return -1;
 		}
 
 		position_array[i] = (int) item_as_number;
 	}
 
-	int node = ai_place_piece_at(position_array);
+	return 0;
+}
+
+
+static PyObject* py_ai_place_piece_at(PyObject* self, PyObject* position) {
+	int position_array[24];
+
+	if (position_from_list(position, position_array) < 0)
+		return NULL;
+
+	int node = ai_place_piece_at(&default_context, position_array);
 
 	return PyLong_FromLong((long) node);
 }
 
 
 static PyObject* py_ai_remove_piece(PyObject* self) {
-	int node = ai_remove_piece();
+	int node = ai_remove_piece(&default_context);
 
 	return PyLong_FromLong((long) node);
 }
 
 
 static PyObject* py_ai_move_piece(PyObject* self, PyObject* position) {
-	PyObject* nodes_tuple;
 	int position_array[24];
 
-	for (int i = 0; i < 24; i++) {
-		PyObject* item = PyList_GetItem(position, i);  // Borowed reference
-		long item_as_number = PyLong_AsLong(item);
+	if (position_from_list(position, position_array) < 0)
+		return NULL;
 
-		if (item_as_number < 0 && PyErr_Occurred()) {  // Might not be needed
-			return NULL;
-		}
+	Tuple nodes = ai_move_piece(&default_context, position_array);
 
-		position_array[i] = (int) item_as_number;
-	}
+	return Py_BuildValue("(ii)", nodes.a, nodes.b);
+}
+
+
+// The Engine type has the same interface as the Engine of the Python version. Every call searches with its own
+// context and without holding the GIL, so many games can be searched at the same time from different threads.
+// Instead of printing, it keeps the counters of its last search, for the caller to read.
+
+typedef struct {
+	PyObject_HEAD
+	long long nodes;
+	long long evaluations;
+} EngineObject;
 
-	Tuple nodes = ai_move_piece(position_array);
 
-	nodes_tuple = PyTuple_New(2);
-	if (nodes_tuple == NULL) {  // Might not be needed
-		PyErr_SetString(PyExc_RuntimeError, "Could not create tuple");
+static PyObject* Engine_place_piece_at(EngineObject* self, PyObject* args, PyObject* kwargs) {
+	static char* keywords[] = {"position", "max_depth", NULL};
+	PyObject* position;
+	int position_array[24];
+	SearchContext ctx = { -1, 0, 4 };
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|i", keywords, &position, &ctx.depth))
+		return NULL;
+
+	if (position_from_list(position, position_array) < 0)
+		return NULL;
+
+	int node;
+	Py_BEGIN_ALLOW_THREADS
+	node = ai_place_piece_at(&ctx, position_array);
+	Py_END_ALLOW_THREADS
+	self->nodes = ctx.node_count;
+	self->evaluations = ctx.computation_count;
+
+	return Py_BuildValue("(ii)", node, ctx.best_node_id_to_take);
+}
+
+
+static PyObject* Engine_move_piece(EngineObject* self, PyObject* args, PyObject* kwargs) {
+	static char* keywords[] = {"position", "max_depth", NULL};
+	PyObject* position;
+	int position_array[24];
+	SearchContext ctx = { -1, 0, 4 };
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|i", keywords, &position, &ctx.depth))
+		return NULL;
+
+	if (position_from_list(position, position_array) < 0)
+		return NULL;
+
+	Tuple nodes;
+	Py_BEGIN_ALLOW_THREADS
+	nodes = ai_move_piece(&ctx, position_array);
+	Py_END_ALLOW_THREADS
+	self->nodes = ctx.node_count;
+	self->evaluations = ctx.computation_count;
+
+	return Py_BuildValue("(iii)", nodes.a, nodes.b, ctx.best_node_id_to_take);
+}
+
+
+static PyObject* Engine_evaluate(EngineObject* self, PyObject* args, PyObject* kwargs) {
+	static char* keywords[] = {"position", "phase2", NULL};
+	PyObject* position;
+	int phase2 = 0;
+	int position_array[24];
+	SearchContext ctx = { -1, 0, 0 };
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|p", keywords, &position, &phase2))
+		return NULL;
+
+	if (position_from_list(position, position_array) < 0)
 		return NULL;
-	}
 
-	PyTuple_SetItem(nodes_tuple, 0, PyLong_FromLong((long) nodes.a));
-	PyTuple_SetItem(nodes_tuple, 1, PyLong_FromLong((long) nodes.b));
+	int evaluation;
+	if (phase2)
+		evaluation = _get_evaluation_of_position_phase2(&ctx, position_array);
+	else
+		evaluation = _get_evaluation_of_position_phase1(&ctx, position_array);
 
-	return nodes_tuple;
+	return PyLong_FromLong((long) evaluation);
 }
 
 
+static PyObject* Engine_close(EngineObject* self) {
+	Py_RETURN_NONE;
+}
+
+
+static PyObject* py_perft(PyObject* self, PyObject* args, PyObject* kwargs) {
+	static char* keywords[] = {"position", "depth", "phase2", "white_to_move", NULL};
+	PyObject* position;
+	int depth;
+	int phase2 = 0;
+	int white_to_move = 1;
+	int position_array[24];
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oi|pp", keywords, &position, &depth, &phase2, &white_to_move))
+		return NULL;
+
+	if (position_from_list(position, position_array) < 0)
+		return NULL;
+
+	long long count;
+	Py_BEGIN_ALLOW_THREADS
+	count = _perft(position_array, depth, phase2, white_to_move ? WHITE : BLACK);
+	Py_END_ALLOW_THREADS
+
+	return PyLong_FromLongLong(count);
+}
+
+
+static PyMethodDef Engine_methods[] = {
+	{"place_piece_at", (PyCFunction) Engine_place_piece_at, METH_VARARGS | METH_KEYWORDS, ""},
+	{"move_piece", (PyCFunction) Engine_move_piece, METH_VARARGS | METH_KEYWORDS, ""},
+	{"evaluate", (PyCFunction) Engine_evaluate, METH_VARARGS | METH_KEYWORDS, ""},
+	{"close", (PyCFunction) Engine_close, METH_NOARGS, ""},
+	{NULL, NULL, 0, NULL}
+};
+
+
+static PyMemberDef Engine_members[] = {
+	{"nodes", T_LONGLONG, offsetof(EngineObject, nodes), READONLY, "Positions searched by the last search"},
+	{"evaluations", T_LONGLONG, offsetof(EngineObject, evaluations), READONLY,
+		"Positions evaluated by the last search"},
+	{NULL}
+};
+
+
+static PyTypeObject EngineType = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	.tp_name = "minimax.Engine",
+	.tp_doc = "",
+	.tp_basicsize = sizeof(EngineObject),
+	.tp_itemsize = 0,
+	.tp_flags = Py_TPFLAGS_DEFAULT,
+	.tp_new = PyType_GenericNew,
+	.tp_methods = Engine_methods,
+	.tp_members = Engine_members
+};
+
+
 static PyMethodDef minimax_methods[] = {
 	{"ai_place_piece_at", (PyCFunction) py_ai_place_piece_at, METH_O, ""},
 	{"ai_remove_piece", (PyCFunction) py_ai_remove_piece, METH_NOARGS, ""},
 	{"ai_move_piece", (PyCFunction) py_ai_move_piece, METH_O, ""},
+	{"perft", (PyCFunction) py_perft, METH_VARARGS | METH_KEYWORDS, ""},
 	{NULL, NULL, 0, NULL}
 };
 
@@ -945,9 +842,19 @@ static struct PyModuleDef minimax_module = {
 PyMODINIT_FUNC PyInit_minimax() {
 	PyObject* m;
 
+	if (PyType_Ready(&EngineType) < 0)
+		return NULL;
+
 	m = PyModule_Create(&minimax_module);
 	if (m == NULL)
 		return NULL;
 
+	Py_INCREF(&EngineType);
+	if (PyModule_AddObject(m, "Engine", (PyObject*) &EngineType) < 0) {
+		Py_DECREF(&EngineType);
+		Py_DECREF(m);
+		return NULL;
+	}
+
 	return m;
 }
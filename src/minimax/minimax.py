@@ -1,6 +1,21 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 from math import inf
 from timeit import default_timer
-from typing import Union
+from typing import Optional, Union
+
+from src.log import get_logger
+from src.topology import NODE_INDICES, FULL_BOARD, BIT, MILL_MASKS, NEIGHBOR_MASKS, NODE_MILL_MASKS, NODE_MILL_PAIRS, \
+    get_nodes, popcount, get_windmills_mask, get_nodes_pieces_to_take
+from src.minimax.transposition import TranspositionTable, zobrist_hash, ZOBRIST_WHITE, ZOBRIST_BLACK, ZOBRIST_TURN, \
+    EXACT, LOWER_BOUND, UPPER_BOUND
+from src.minimax.tablebase import Tablebase, WIN, LOSS
+from src.minimax.book import Book
+from src.minimax.stats import SearchStats, DepthStats
+
+logger = get_logger(__name__)  # Silent below WARNING, unless the application sets a lower level
 
 # Assume maximizing player is WHITE and minimizing player is BLACK.
 # For now the AI is always BLACK.
@@ -9,19 +24,1045 @@ from typing import Union
 
 # TODO on win make the score -infinite
 
+# Internally a position is a bitboard: two 24-bit masks, one for WHITE and one for BLACK, where bit i is set
+# if there is a piece of that color on node i. The public functions still take the list representation.
+
+# The terms of the evaluation are kept up to date while searching, instead of being counted again at every leaf.
+# They are a tuple of: WHITE pieces, BLACK pieces, WHITE windmills, BLACK windmills, WHITE free moves and
+# BLACK free moves. Free moves are always counted as if the pieces could not jump.
+
+# A move is an int: the source node in bits 0-4, the destination node in bits 5-9 and the taken node in bits 10-14.
+# NO_NODE stands for no node; it's the source when putting a piece and the taken node when no windmill is formed.
+# NO_MOVE, with NO_NODE everywhere, stands for no move at all, when BLACK can't move.
+# Use encode_move() and decode_move() to go from and to the (source, destination, taken) tuples with -1 for no node.
+
+# All the state of a search (counters, tables, configuration) belongs to an Engine, so that many games can be searched
+# at the same time, each with its own Engine. The module only has constants and the defaults for new engines.
+
 NO_PIECE = 0
 WHITE = 1
 BLACK = 2
-NODE_INDICES = range(24)
 
-weights = {
+weights = {  # Defaults for new engines
     "mill": 20,
     "piece": 24,
     "free_move": 1
 }
 
-_best_node_id_to_take = -1
-computation_count = 0
+search_limits = {  # Defaults for new engines
+    "max_depth_phase1": 4,  # Ceilings for the iterative deepening; the root moves are searched this deep
+    "max_depth_phase2": 3,
+    "time_budget": 3.0,  # Seconds
+    "workers": 1,  # More than one searches the root moves in parallel, in that many processes
+    "quiescence_plies": 4,  # How far the forcing moves are followed past the leaves; 0 turns it off
+    "quiescence_nodes": 200,  # The most nodes of the quiescence search of one leaf
+    "aspiration_window": 25  # How far from the evaluation of the previous iteration the next one is expected
+}
+
+NO_NODE = 31
+NO_MOVE = NO_NODE | NO_NODE << 5 | NO_NODE << 10
+
+_NO_TAKE = NO_NODE << 10
+_MOVE_BIT = BIT + (0,) * (NO_NODE + 1 - len(BIT))  # BIT where NO_NODE is no bit at all
+
+# Move ordering scores; tactical moves first, then the transposition table move, then the killers, then the rest
+# by their history score, which is kept below _SCORE_KILLER
+_SCORE_MILL = 8_000_000
+_SCORE_BLOCK = 4_000_000
+_SCORE_TT_MOVE = 2_000_000
+_SCORE_KILLER = 1_000_000
+
+_MAX_PLIES = 64
+
+_STOP_POLL_INTERVAL = 0.05  # Seconds between checking if the parallel search was stopped
+
+_TABLEBASE_WIN = 100_000  # The evaluation of a position won according to the tablebase, less the plies to the win
+
+_worker_engine = None  # The engine of a worker process of the parallel search
+_worker_generation = None  # The generation of the parent's transposition table in the last search of the worker
+_default_engine = None  # The engine of the old ai_* functions, made on first use
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class Engine:
+    """Searches positions for the best move of BLACK.
+
+    An engine is meant to be used by one thread at a time; to search many games at once, make an engine for each.
+    The transposition table, killers and history are kept between the searches of the same engine.
+
+    The positions in the opening book and, in the moving phase, the ones with a material that's in the tablebase
+    aren't searched, but looked up.
+
+    While the opponent thinks, the engine can ponder: search in the background the positions after its replies,
+    starting from the expected one. If the opponent then plays one of them, the search carries on as the search of
+    the move (or it's already done); if not, it's stopped and whatever it left in the transposition table is reused.
+
+    """
+
+    def __init__(self, megabytes: int = 32, tablebase: Tablebase = None, book: Book = None):
+        """
+        Args:
+            megabytes (int): The size of the transposition table.
+            tablebase (Tablebase): The endgame tables; by default the ones saved in the default directory, if any.
+            book (Book): The opening book; by default the one saved in the default file, if any.
+
+        """
+        self.weights = dict(weights)
+        self.search_limits = dict(search_limits)
+        self.use_move_ordering = True
+        self.use_book = True
+
+        self.transposition_table = TranspositionTable(megabytes=megabytes)
+        self.tablebase = Tablebase() if tablebase is None else tablebase
+        self.book = Book() if book is None else book
+
+        self.computation_count = 0
+        self.node_count = 0
+        self.tablebase_hits = 0
+        self.quiescence_node_count = 0
+        self.quiescence_cutoffs = 0
+        self.quiescence_limit_hits = 0  # Leaves whose quiescence search ran out of nodes
+        self.null_window_researches = 0  # Moves that turned out better than the null window and were searched again
+        self.aspiration_researches = 0
+        self.leaf_count = 0
+        self.cutoffs_by_index = {}  # The index of the move that caused a cutoff to how many times
+
+        self.stats = None  # SearchStats of the last search; None if the move was looked up in the book
+        self.stats_level = logging.INFO  # The level at which the stats of every search are logged, if it's enabled
+
+        self._deadline = inf
+        self._time_budget = inf
+        self._search_start = 0.0
+        self._depth_done = False  # If the search has completed an iteration, so that the time budget applies
+        self._stop_requested = False
+        self._stop_called = False  # If stop() asked for the stop, and not the end of pondering
+        self._lock = threading.Lock()  # For the time limits of a search that other threads change, when pondering
+        self._quiescence_nodes_left = 0
+        self._killers = [[None, None] for _ in range(_MAX_PLIES)]  # Quiet moves that caused a cutoff, by depth left
+        self._history = {side: [[0] * 24 for _ in range(NO_NODE + 1)] for side in (True, False)}  # [max.][src][dest]
+
+        self._executor = None  # The process pool of the parallel search, made on first use
+        self._executor_workers = 0
+
+        self._ponder_thread = None
+        self._ponder_position = None  # The masks of the position that's being pondered
+        self._ponder_moves = {}  # The masks of the pondered positions to the moves found
+        self._ponder_hit = False
+        self._ponder_stopped = False
+
+    def place_piece_at(self, position: list, max_depth: int = None, time_budget: float = None,
+                       workers: int = None) -> tuple:
+        """
+        Args:
+            position (list): The state of the game.
+            max_depth (int): The deepest iteration to search; search_limits["max_depth_phase1"] by default.
+            time_budget (float): Seconds after which the search is stopped; search_limits["time_budget"] by default.
+            workers (int): Processes in which to search the root moves; search_limits["workers"] by default.
+
+        Returns:
+            tuple: The id of the node on which to put the piece and the id of the node from which to take a piece
+                (or -1, if no windmill is formed).
+
+        Raises:
+            ValueError: If BLACK has no moves.
+
+        """
+        if max_depth is None:
+            max_depth = self.search_limits["max_depth_phase1"]
+
+        white, black = _to_bitboard(position)
+        move = self._finish_pondering(white, black, False, time_budget)
+        if move is None:
+            move = self._probe_book(white, black)
+            if move is None:
+                move = self._iterative_deepening(white, black, False, max_depth, time_budget, workers)
+            else:
+                self.stats = None
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Book move is %s", decode_move(move))
+        if move == NO_MOVE:
+            raise ValueError("BLACK has no moves")
+        _, best_node_id, best_node_id_to_take = decode_move(move)
+
+        assert best_node_id != -1
+        return best_node_id, best_node_id_to_take
+
+    def move_piece(self, position: list, max_depth: int = None, time_budget: float = None,
+                   workers: int = None) -> tuple:
+        """
+        Args:
+            position (list): The state of the game.
+            max_depth (int): The deepest iteration to search; search_limits["max_depth_phase2"] by default.
+            time_budget (float): Seconds after which the search is stopped; search_limits["time_budget"] by default.
+            workers (int): Processes in which to search the root moves; search_limits["workers"] by default.
+
+        Returns:
+            tuple: The id of the source and destination nodes and the id of the node from which to take a piece
+                (or -1, if no windmill is formed).
+
+        Raises:
+            ValueError: If BLACK has no moves, as when it's blocked.
+
+        """
+        if max_depth is None:
+            max_depth = self.search_limits["max_depth_phase2"]
+
+        white, black = _to_bitboard(position)
+        move = self._finish_pondering(white, black, True, time_budget)
+        if move is None:
+            move = self._iterative_deepening(white, black, True, max_depth, time_budget, workers)
+        if move == NO_MOVE:
+            raise ValueError("BLACK has no moves")
+        best_move = decode_move(move)
+
+        assert best_move[0] != -1 or best_move[1] != -1
+        return best_move
+
+    def evaluate(self, position: list, phase2: bool = False) -> Union[int, float]:
+        """Evaluates a position from scratch, like the search does at its leaves.
+
+        Args:
+            position (list): The state of the game.
+            phase2 (bool): If the pieces are moved instead of put.
+
+        Returns:
+            int: The evaluation; positive is good for WHITE and negative is good for BLACK.
+
+        """
+        white, black = _to_bitboard(position)
+        if phase2:
+            return self._evaluate_phase2(_get_terms(white, black))
+        else:
+            return self._evaluate_phase1(_get_terms(white, black))
+
+    def stop(self):
+        """Makes the search running in another thread return as soon as possible, with the best move of the last
+        completed iteration. If no search is running, the next one returns right away. Pondering ends too, unless the
+        opponent already played the pondered reply, whose search then returns its move. Can be called from any thread.
+        """
+        with self._lock:
+            if self._ponder_thread is not None and not self._ponder_hit:
+                self._ponder_stopped = True  # Don't go on to the next reply
+            self._stop_requested = True
+            self._stop_called = True
+
+    def ponder(self, position: list, phase2: bool = False):
+        """Starts pondering in a background thread; it goes on until the next search of a move or close().
+
+        The replies of WHITE are taken from the expected one (the best move in the transposition table) down to the
+        least promising ones, and the position after each is searched like the search of a move would.
+
+        Args:
+            position (list): The state of the game, with WHITE to move.
+            phase2 (bool): If the pieces are moved instead of put.
+
+        """
+        self._stop_pondering()
+        self._ponder_moves.clear()
+
+        white, black = _to_bitboard(position)
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(white, black, phase2), daemon=True)
+        self._ponder_thread.start()
+
+    def close(self):
+        """Stops pondering and the worker processes of the parallel search, if there are any, and closes the
+        tablebase and book."""
+        self._stop_pondering()
+        self._shutdown_executor()
+        self.tablebase.close()
+        self.book.close()
+
+    def _ponder(self, white: int, black: int, phase2: bool):
+        """Runs in the pondering thread."""
+        entry = self.transposition_table.probe(zobrist_hash(white, black, True, phase2))
+        replies = _generate_moves(white, black, phase2)
+        self._order_moves(replies, white, black, None if entry is None else entry.move, 0, True)
+
+        terms = _get_terms(white, black)
+        for reply in replies:
+            new_white, new_black, _, _ = _make_move(white, black, 0, terms, reply, True)
+            with self._lock:
+                if self._ponder_stopped or self._ponder_hit:
+                    return
+                self._ponder_position = (new_white, new_black)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Pondering on %s", decode_move(reply))
+            move = None if phase2 else self._probe_book(new_white, new_black)
+            stats = None
+            if move is None:
+                max_depth = self.search_limits["max_depth_phase2" if phase2 else "max_depth_phase1"]
+                move = self._iterative_deepening(new_white, new_black, phase2, max_depth, inf, None)
+                stats = self.stats
+
+            with self._lock:
+                if self._ponder_stopped:  # It may have been stopped in the middle
+                    return
+                self._ponder_moves[(new_white, new_black)] = (move, stats)
+
+    def _finish_pondering(self, white: int, black: int, phase2: bool, time_budget: Optional[float]) -> Optional[int]:
+        """Ends pondering, now that the position after WHITE's reply is known. If it was pondered, its search is given
+        the time budget, counting from when it started, and waited for.
+
+        Returns:
+            int: The move found while pondering or None if the position wasn't pondered.
+
+        """
+        if self._ponder_thread is None:
+            return None
+        if time_budget is None:
+            time_budget = self.search_limits["time_budget"]
+
+        with self._lock:
+            if (white, black) == self._ponder_position and (white, black) not in self._ponder_moves:
+                self._ponder_hit = True  # Let the search go on
+                self._time_budget = time_budget
+                if self._depth_done:  # Otherwise the budget applies once depth 0 is done
+                    self._deadline = self._search_start + time_budget
+
+        self._stop_pondering()
+        move, stats = self._ponder_moves.get((white, black), (None, None))
+        self._ponder_moves.clear()
+        self._ponder_hit = False
+
+        if move is not None and move in _generate_moves(black, white, phase2):
+            self.stats = stats
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Ponder hit, move is %s", decode_move(move))
+            return move
+        logger.debug("Ponder miss")
+        return None
+
+    def _stop_pondering(self):
+        if self._ponder_thread is None:
+            return
+
+        with self._lock:
+            stopped_here = not self._ponder_hit
+            if stopped_here:
+                self._ponder_stopped = True
+                self._stop_requested = True
+        self._ponder_thread.join()
+
+        with self._lock:
+            # Take back the stop request made here, which the pondering search may not have used up, but not one of
+            # stop(), which is for the next search
+            if stopped_here and not self._stop_called:
+                self._stop_requested = False
+        self._ponder_thread = None
+        self._ponder_position = None
+        self._ponder_stopped = False
+
+    def _probe_book(self, white: int, black: int) -> Optional[int]:
+        """
+        Returns:
+            int: BLACK's move in the opening book or None if the position isn't in it (or the book isn't used).
+
+        """
+        move = self.book.probe(white, black) if self.use_book else None
+        if move is None or move not in _generate_moves(black, white, False):  # Not in the book (or a hash collision)
+            return None
+        return move
+
+    def _iterative_deepening(self, white: int, black: int, phase2: bool, max_depth: int, time_budget: float,
+                             workers: int) -> int:
+        """Searches BLACK's moves deeper and deeper, until max_depth is done or time_budget runs out. What the search
+        did is left in self.stats.
+
+        Every iteration searches the moves in the order of the evaluations from the previous one and leaves its
+        results in the transposition table for the next one. If the time runs out in the middle of an iteration,
+        the best move of the last completed iteration is returned. Depth 0 is always completed, unless the search is
+        stopped.
+
+        Args:
+            white (int): The mask of the WHITE pieces.
+            black (int): The mask of the BLACK pieces.
+            phase2 (bool): If the pieces are moved instead of put.
+            max_depth (int): The depth of the last iteration.
+            time_budget (float): Seconds after which the search is stopped; search_limits["time_budget"] if None.
+            workers (int): If more than one, the root moves are searched in parallel in that many processes;
+                search_limits["workers"] if None.
+
+        Returns:
+            int: The best move, or NO_MOVE if BLACK has no moves.
+
+        """
+        moves = _generate_moves(black, white, phase2)
+        if not moves:
+            self.stats = None
+            return NO_MOVE
+
+        if time_budget is None:
+            time_budget = self.search_limits["time_budget"]
+        if workers is None:
+            workers = self.search_limits["workers"]
+
+        minimax = self._minimax_phase2 if phase2 else self._minimax_phase1
+        hash = zobrist_hash(white, black, False, phase2)
+        terms = _get_terms(white, black)
+        ordered_moves = list(moves)
+        best_move = moves[0]  # In case it's stopped before depth 0 is done
+        previous_evaluation = None
+
+        self.transposition_table.new_search()
+        self._age_history()
+        self._reset_counters()
+        stats = SearchStats()
+        log_stats = logger.isEnabledFor(self.stats_level)
+        start = default_timer()
+        with self._lock:
+            self._search_start = start
+            if not self._ponder_hit:  # Otherwise the search is pondering and the hit has already set the budget
+                self._time_budget = time_budget
+            self._deadline = inf  # Depth 0 only evaluates the children, so let it finish whatever happens
+            self._depth_done = False
+
+        try:
+            for depth in range(max_depth + 1):
+                if workers > 1:
+                    evaluations = self._search_root_in_parallel(white, black, hash, terms, phase2, ordered_moves,
+                                                                depth, workers)
+                else:
+                    self._clear_killers()
+                    evaluations = self._search_root(white, black, hash, terms, minimax, moves, ordered_moves, depth,
+                                                    previous_evaluation)
+
+                # BLACK searches for the lowest evaluation!!! Of equally good moves the first generated one is picked,
+                # so that the move doesn't depend on the order in which they were searched
+                best_move = min(moves, key=evaluations.__getitem__)
+                previous_evaluation = evaluations[best_move]
+                ordered_moves.sort(key=evaluations.__getitem__)
+                stats.depths.append(DepthStats(depth, self.node_count - sum(stats.nodes_per_depth),
+                                               default_timer() - start, decode_move(best_move), previous_evaluation))
+                if log_stats:
+                    logger.log(self.stats_level, "Depth %d done in %.3f seconds, best move is %s, evaluation is %s",
+                               depth, stats.depths[-1].seconds, decode_move(best_move), previous_evaluation)
+                with self._lock:
+                    self._deadline = start + self._time_budget
+                    self._depth_done = True
+        except _SearchTimeout:
+            stats.interrupted_depth = depth
+            if log_stats:
+                logger.log(self.stats_level, f"Stopped at depth {depth}" if self._stop_requested
+                           else f"Ran out of time at depth {depth}")
+        finally:
+            with self._lock:
+                self._deadline = inf
+                self._stop_requested = False
+                self._stop_called = False
+
+        stats.seconds = default_timer() - start
+        self._fill_stats(stats)
+        self.stats = stats
+        if log_stats:
+            logger.log(self.stats_level, stats)
+
+        return best_move
+
+    def _search_root(self, white: int, black: int, hash: int, terms: tuple, minimax, moves: list, ordered_moves: list,
+                     depth: int, previous_evaluation: Optional[float]) -> dict:
+        """Searches the root moves with a principal variation search.
+
+        The first move is searched with an aspiration window around the evaluation of the previous iteration. The
+        others are searched with a null window, which only tells if they are better than the best so far; the ones
+        that are get searched again for their exact evaluation. A move is better if its evaluation is lower, or as
+        low and it was generated first, so the best move is the same as with full windows.
+
+        Args:
+            minimax: The method with which to search the children.
+            moves (list): BLACK's moves, in the order in which they were generated.
+            ordered_moves (list): The same moves, in the order in which to search them.
+            depth (int): The depth to which to search every move.
+            previous_evaluation (float): The evaluation of the best move of the previous iteration or None.
+
+        Returns:
+            dict: The evaluation of every move; for the worse moves it may only be a lower bound.
+
+        """
+        generation_order = {move: i for i, move in enumerate(moves)}
+        evaluations = {}
+        best_evaluation = None
+        best_index = 0
+
+        for move in ordered_moves:
+            new_white, new_black, new_hash, new_terms = _make_move(white, black, hash, terms, move, False)
+
+            if best_evaluation is None:
+                evaluation = self._search_aspiration_window(new_white, new_black, new_hash, new_terms, minimax, depth,
+                                                            previous_evaluation)
+            elif best_evaluation in (inf, -inf):
+                evaluation = minimax(new_white, new_black, new_hash, new_terms, depth, -inf, inf, True)
+            else:
+                # The evaluations are integers, so lower than the threshold means better
+                threshold = best_evaluation + 1 if generation_order[move] < best_index else best_evaluation
+                evaluation = minimax(new_white, new_black, new_hash, new_terms, depth, threshold - 1, threshold, True)
+                if evaluation < threshold:
+                    self.null_window_researches += 1
+                    evaluation = minimax(new_white, new_black, new_hash, new_terms, depth, -inf, threshold, True)
+
+            evaluations[move] = evaluation
+            if best_evaluation is None or evaluation < best_evaluation or \
+                    evaluation == best_evaluation and generation_order[move] < best_index:
+                best_evaluation = evaluation
+                best_index = generation_order[move]
+
+        return evaluations
+
+    def _search_aspiration_window(self, white: int, black: int, hash: int, terms: tuple, minimax, depth: int,
+                                  previous_evaluation: Optional[float]) -> int:
+        """Searches a root move with a window around the previous evaluation and, if the evaluation turns out to be
+        outside of it, again with the window open on that side.
+
+        Returns:
+            int: The exact evaluation.
+
+        """
+        if previous_evaluation is None or previous_evaluation in (inf, -inf):
+            return minimax(white, black, hash, terms, depth, -inf, inf, True)
+
+        alpha = previous_evaluation - self.search_limits["aspiration_window"]
+        beta = previous_evaluation + self.search_limits["aspiration_window"]
+        evaluation = minimax(white, black, hash, terms, depth, alpha, beta, True)
+
+        if evaluation <= alpha:
+            self.aspiration_researches += 1
+            evaluation = minimax(white, black, hash, terms, depth, -inf, alpha + 1, True)
+        elif evaluation >= beta:
+            self.aspiration_researches += 1
+            evaluation = minimax(white, black, hash, terms, depth, beta - 1, inf, True)
+
+        return evaluation
+
+    def _search_root_in_parallel(self, white: int, black: int, hash: int, terms: tuple, phase2: bool, moves: list,
+                                 depth: int, workers: int) -> dict:
+        """Searches the root moves in a pool of processes, handing them out in order as the workers become free.
+
+        Every move is searched with beta just above the best evaluation known when it is handed out. That's enough
+        to prove that a move is worse, but a move that is as good or better still gets its exact evaluation, so the
+        best move (and how ties are broken) is the same as in the serial search. The bound of a move that is already
+        running isn't tightened when a better move is found meanwhile; only the moves handed out later get it.
+
+        Args:
+            moves (list): BLACK's moves, in the order in which to search them.
+            depth (int): The depth to which to search every move.
+            workers (int): The number of processes.
+
+        Returns:
+            dict: The evaluation of every move; for the worse moves it may only be a lower bound.
+
+        """
+        executor = self._get_executor(workers)
+        remaining_moves = iter(moves)
+        running = {}
+        best_evaluation = inf
+
+        def hand_out(count: int):
+            # Beta is one above the best, because the evaluations are integers; at the extremes search the full window
+            beta = best_evaluation + 1 if best_evaluation != -inf else inf
+            for move in islice(remaining_moves, count):
+                future = executor.submit(_search_root_move, self.weights, self.search_limits, self.use_move_ordering,
+                                         self.tablebase.directory, self.book.path, self.transposition_table.generation,
+                                         white, black, hash, terms, phase2, move, depth, beta,
+                                         self._deadline - default_timer())
+                running[future] = move
+
+        evaluations = {}
+        hand_out(workers)
+        try:
+            while running:
+                done, _ = wait(running, timeout=_STOP_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if self._stop_requested or default_timer() > self._deadline:  # The deadline moves on a ponder hit
+                    raise _SearchTimeout
+                for future in done:
+                    move = running.pop(future)
+                    evaluation, counters = future.result()
+                    self._add_counters(counters)
+                    if evaluation is None:
+                        raise _SearchTimeout
+                    evaluations[move] = evaluation
+                    best_evaluation = min(best_evaluation, evaluation)
+                hand_out(len(done))
+        except _SearchTimeout:
+            for future in running:  # The ones already started stop by themselves, as they have the same deadline
+                future.cancel()
+            raise
+
+        return evaluations
+
+    def _get_executor(self, workers: int) -> ProcessPoolExecutor:
+        if self._executor is None or self._executor_workers != workers:
+            self._shutdown_executor()
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._executor_workers = workers
+        return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_workers = 0
+
+    def _evaluate_phase1(self, terms: tuple) -> int:
+        self.computation_count += 1
+
+        white_pieces, black_pieces, white_mills, black_mills, white_mobility, black_mobility = terms
+        weights = self.weights
+
+        evaluation = (white_pieces - black_pieces) * weights["piece"]
+        evaluation += (white_mills - black_mills) * weights["mill"]
+        evaluation += (white_mobility - black_mobility) * weights["free_move"]
+
+        return evaluation
+
+    def _evaluate_phase2(self, terms: tuple) -> Union[int, float]:
+        self.computation_count += 1
+
+        white_pieces, black_pieces, white_mills, black_mills, white_mobility, black_mobility = terms
+        weights = self.weights
+
+        # Return absolute value if it's game over TODO maybe should also check if it's blocked
+        if white_pieces == 2:
+            return -inf
+        elif black_pieces == 2:
+            return inf
+
+        empty_nodes = 24 - white_pieces - black_pieces
+        if white_pieces == 3:
+            white_mobility = 3 * empty_nodes
+        if black_pieces == 3:
+            black_mobility = 3 * empty_nodes
+
+        evaluation = (white_pieces - black_pieces) * weights["piece"]
+        evaluation += (white_mills - black_mills) * weights["mill"]
+        evaluation += (white_mobility - black_mobility) * weights["free_move"]
+
+        return evaluation
+
+    def _minimax_phase1(self, white: int, black: int, hash: int, terms: tuple, depth: int, alpha: float, beta: float,
+                        maximizing_player: bool) -> int:
+        self.node_count += 1
+
+        if depth == 0:
+            return self._search_quiescence(white, black, terms, False, alpha, beta, maximizing_player)
+
+        if self._stop_requested or default_timer() > self._deadline:
+            raise _SearchTimeout
+
+        alpha_original = alpha
+        beta_original = beta
+
+        entry = self.transposition_table.probe(hash)
+        if entry is not None and entry.depth >= depth:
+            if entry.bound == EXACT:
+                return entry.score
+            elif entry.bound == LOWER_BOUND:
+                alpha = max(alpha, entry.score)
+            else:
+                beta = min(beta, entry.score)
+            if beta <= alpha:
+                return entry.score
+
+        if maximizing_player:
+            moves = _generate_moves(white, black, False)  # It's WHITE's turn
+        else:
+            moves = _generate_moves(black, white, False)  # It's BLACK's turn
+        self._order_moves(moves, white, black, None if entry is None else entry.move, depth, maximizing_player)
+
+        return self._search_moves(white, black, hash, terms, depth, alpha, beta, maximizing_player, moves,
+                                  self._minimax_phase1, alpha_original, beta_original)
+
+    def _minimax_phase2(self, white: int, black: int, hash: int, terms: tuple, depth: int, alpha: float, beta: float,
+                        maximizing_player: bool) -> int:
+        self.node_count += 1
+
+        if _is_game_over(terms):
+            return self._evaluate_phase2(terms)
+
+        material = (terms[0], terms[1]) if maximizing_player else (terms[1], terms[0])
+        if material in self.tablebase.materials:
+            evaluation = self._probe_tablebase(white, black, maximizing_player)
+            if evaluation is not None:
+                return evaluation
+
+        if depth == 0:
+            return self._search_quiescence(white, black, terms, True, alpha, beta, maximizing_player)
+
+        if self._stop_requested or default_timer() > self._deadline:
+            raise _SearchTimeout
+
+        alpha_original = alpha
+        beta_original = beta
+
+        entry = self.transposition_table.probe(hash)
+        if entry is not None and entry.depth >= depth:
+            if entry.bound == EXACT:
+                return entry.score
+            elif entry.bound == LOWER_BOUND:
+                alpha = max(alpha, entry.score)
+            else:
+                beta = min(beta, entry.score)
+            if beta <= alpha:
+                return entry.score
+
+        if maximizing_player:
+            moves = _generate_moves(white, black, True)
+        else:
+            moves = _generate_moves(black, white, True)
+        self._order_moves(moves, white, black, None if entry is None else entry.move, depth, maximizing_player)
+
+        return self._search_moves(white, black, hash, terms, depth, alpha, beta, maximizing_player, moves,
+                                  self._minimax_phase2, alpha_original, beta_original)
+
+    def _probe_tablebase(self, white: int, black: int, maximizing_player: bool) -> Optional[int]:
+        """
+        Returns:
+            int: The evaluation of the position according to the tablebase (0 for a draw) or None if the table
+                can't be read.
+
+        """
+        if maximizing_player:
+            probe = self.tablebase.probe(white, black)
+        else:
+            probe = self.tablebase.probe(black, white)
+        if probe is None:
+            return None
+        self.tablebase_hits += 1
+
+        result, distance = probe
+
+        if result == WIN:
+            evaluation = _TABLEBASE_WIN - distance
+        elif result == LOSS:
+            evaluation = distance - _TABLEBASE_WIN
+        else:
+            evaluation = 0
+
+        return evaluation if maximizing_player else -evaluation
+
+    def _search_moves(self, white: int, black: int, hash: int, terms: tuple, depth: int, alpha: float, beta: float,
+                      maximizing_player: bool, moves: list, minimax, alpha_original: float,
+                      beta_original: float) -> int:
+        """The alpha-beta loop over the moves of a position, shared by both phases.
+
+        Args:
+            minimax: The method with which to search the children.
+            alpha_original (float): The alpha before applying the transposition table bounds; for storing the result.
+            beta_original (float): The beta before applying the transposition table bounds; for storing the result.
+
+        Returns:
+            int: The evaluation of the position.
+
+        """
+        best_move = None
+
+        # Principal variation search: after the first move, the others are searched with a null window that only
+        # tells if they are better than alpha (or beta) and searched again if they are
+        if maximizing_player:
+            max_eval = -inf
+            for i, move in enumerate(moves):
+                new_white, new_black, new_hash, new_terms = _make_move(white, black, hash, terms, move, True)
+                if i == 0 or alpha == -inf:
+                    eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, alpha, beta, False)
+                else:
+                    eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, alpha, alpha + 1, False)
+                    if alpha < eval < beta:
+                        self.null_window_researches += 1
+                        eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, alpha, beta, False)
+                if eval > max_eval:
+                    max_eval = eval
+                    best_move = move
+                alpha = max(alpha, eval)
+                if beta <= alpha:
+                    self._record_cutoff(move, i, depth, True)
+                    break
+            self._store(hash, depth, max_eval, alpha_original, beta_original, best_move)
+            return max_eval
+        else:
+            min_eval = inf
+            for i, move in enumerate(moves):
+                new_white, new_black, new_hash, new_terms = _make_move(white, black, hash, terms, move, False)
+                if i == 0 or beta == inf:
+                    eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, alpha, beta, True)
+                else:
+                    eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, beta - 1, beta, True)
+                    if alpha < eval < beta:
+                        self.null_window_researches += 1
+                        eval = minimax(new_white, new_black, new_hash, new_terms, depth - 1, alpha, beta, True)
+                if eval < min_eval:
+                    min_eval = eval
+                    best_move = move
+                beta = min(beta, eval)
+                if beta <= alpha:
+                    self._record_cutoff(move, i, depth, False)
+                    break
+            self._store(hash, depth, min_eval, alpha_original, beta_original, best_move)
+            return min_eval
+
+    def _search_quiescence(self, white: int, black: int, terms: tuple, phase2: bool, alpha: float, beta: float,
+                           maximizing_player: bool) -> int:
+        """Searches the forcing moves from a leaf, so that it isn't evaluated in the middle of a fight.
+
+        Returns:
+            int: The evaluation of the leaf.
+
+        """
+        self.leaf_count += 1
+        self._quiescence_nodes_left = self.search_limits["quiescence_nodes"]
+        evaluation = self._quiescence(white, black, terms, phase2, alpha, beta, maximizing_player,
+                                      self.search_limits["quiescence_plies"])
+        if self._quiescence_nodes_left < 0:
+            self.quiescence_limit_hits += 1
+        return evaluation
+
+    def _quiescence(self, white: int, black: int, terms: tuple, phase2: bool, alpha: float, beta: float,
+                    maximizing_player: bool, plies_left: int) -> int:
+        """Like minimax, but only over the moves that form a windmill or block a windmill the opponent threatens.
+        The player to move can also stand pat, not making any of them, so the evaluation is at least (for WHITE)
+        or at most (for BLACK) the one of the position as it is.
+
+        Args:
+            phase2 (bool): If the pieces are moved instead of put.
+            plies_left (int): How much deeper to follow the forcing moves.
+
+        Returns:
+            int: The evaluation of the position.
+
+        """
+        evaluation = self._evaluate_phase2(terms) if phase2 else self._evaluate_phase1(terms)
+        if plies_left == 0 or phase2 and _is_game_over(terms):
+            return evaluation
+
+        if maximizing_player:
+            if evaluation >= beta:
+                return evaluation
+            moves = _generate_forcing_moves(white, black, phase2)
+        else:
+            if evaluation <= alpha:
+                return evaluation
+            moves = _generate_forcing_moves(black, white, phase2)
+
+        for move in moves:
+            if self._quiescence_nodes_left <= 0:
+                self._quiescence_nodes_left = -1  # Tell the leaf that some moves weren't searched
+                break
+            self._quiescence_nodes_left -= 1
+            self.quiescence_node_count += 1
+            new_white, new_black, _, new_terms = _make_move(white, black, 0, terms, move, maximizing_player)
+            eval = self._quiescence(new_white, new_black, new_terms, phase2, alpha, beta, not maximizing_player,
+                                    plies_left - 1)
+            if maximizing_player:
+                evaluation = max(evaluation, eval)
+                alpha = max(alpha, eval)
+            else:
+                evaluation = min(evaluation, eval)
+                beta = min(beta, eval)
+            if beta <= alpha:
+                self.quiescence_cutoffs += 1
+                break
+
+        return evaluation
+
+    def _add_counters(self, counters: tuple):
+        """Adds the counters of a search in a worker process, the ones of its transposition table included."""
+        (nodes, computations, tablebase_hits, quiescence_nodes, quiescence_cutoffs, quiescence_limit_hits,
+         null_window_researches, aspiration_researches, leaves, cutoffs_by_index, table_counters) = counters
+        self.node_count += nodes
+        self.computation_count += computations
+        self.tablebase_hits += tablebase_hits
+        self.quiescence_node_count += quiescence_nodes
+        self.quiescence_cutoffs += quiescence_cutoffs
+        self.quiescence_limit_hits += quiescence_limit_hits
+        self.null_window_researches += null_window_researches
+        self.aspiration_researches += aspiration_researches
+        self.leaf_count += leaves
+        for index, count in cutoffs_by_index.items():
+            self.cutoffs_by_index[index] = self.cutoffs_by_index.get(index, 0) + count
+
+        table = self.transposition_table
+        probes, hits, stores, replacements = table_counters
+        table.probes += probes
+        table.hits += hits
+        table.stores += stores
+        table.replacements += replacements
+
+    def _get_counters(self) -> tuple:
+        table = self.transposition_table
+        return (self.node_count, self.computation_count, self.tablebase_hits, self.quiescence_node_count,
+                self.quiescence_cutoffs, self.quiescence_limit_hits, self.null_window_researches,
+                self.aspiration_researches, self.leaf_count, self.cutoffs_by_index,
+                (table.probes, table.hits, table.stores, table.replacements))
+
+    def _reset_counters(self):
+        self.node_count = 0
+        self.computation_count = 0
+        self.tablebase_hits = 0
+        self.quiescence_node_count = 0
+        self.quiescence_cutoffs = 0
+        self.quiescence_limit_hits = 0
+        self.null_window_researches = 0
+        self.aspiration_researches = 0
+        self.leaf_count = 0
+        self.cutoffs_by_index = {}
+        self.transposition_table.reset_counters()
+
+    def _order_moves(self, moves: list, white: int, black: int, tt_move: Optional[int], depth: int,
+                     maximizing_player: bool):
+        """Sorts the moves so that the ones most likely to cause a cutoff are searched first.
+
+        The order is: moves that form a mill or block one of the opponent, the move from the transposition table,
+        the killer moves of this depth and then the rest by their history score.
+
+        Args:
+            moves (list): The moves to sort in place.
+            white (int): The mask of the WHITE pieces.
+            black (int): The mask of the BLACK pieces.
+            tt_move (int): The best move stored in the transposition table or None.
+            depth (int): The remaining depth; for the killer moves.
+            maximizing_player (bool): If it's WHITE that makes the moves.
+
+        """
+        if not self.use_move_ordering:
+            _move_to_front(moves, tt_move)
+            return
+
+        opponent_pieces = black if maximizing_player else white
+        killer1, killer2 = self._killers[depth]
+        history = self._history[maximizing_player]
+
+        scored_moves = []
+        for move in moves:
+            dest = move >> 5 & NO_NODE
+            score = history[move & NO_NODE][dest]
+            if move >> 10 != NO_NODE:
+                score += _SCORE_MILL
+            pair1, pair2 = NODE_MILL_PAIRS[dest]
+            if opponent_pieces & pair1 == pair1 or opponent_pieces & pair2 == pair2:
+                score += _SCORE_BLOCK
+            if move == tt_move:
+                score += _SCORE_TT_MOVE
+            elif move == killer1 or move == killer2:
+                score += _SCORE_KILLER
+            scored_moves.append((score, move))
+
+        scored_moves.sort(key=_first, reverse=True)  # Stable, so equally scored moves keep the generation order
+        moves[:] = [move for _, move in scored_moves]
+
+    def _record_cutoff(self, move: int, index: int, depth: int, maximizing_player: bool):
+        self.cutoffs_by_index[index] = self.cutoffs_by_index.get(index, 0) + 1
+        if move >> 10 != NO_NODE:  # Mill moves are searched first anyway
+            return
+
+        killers = self._killers[depth]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        history = self._history[maximizing_player][move & NO_NODE]
+        dest = move >> 5 & NO_NODE
+        history[dest] = min(history[dest] + depth * depth, _SCORE_KILLER - 1)
+
+    def _clear_killers(self):
+        for killers in self._killers:
+            killers[0] = None
+            killers[1] = None
+
+    def _age_history(self):
+        for side in self._history.values():
+            for row in side:
+                for dest in NODE_INDICES:
+                    row[dest] //= 2
+
+    def _store(self, hash: int, depth: int, evaluation: float, alpha: float, beta: float, best_move: int):
+        """
+        Args:
+            hash (int): The Zobrist hash of the position.
+            depth (int): The depth the position was searched to.
+            evaluation (float): The result of the search.
+            alpha (float): The alpha the position was searched with.
+            beta (float): The beta the position was searched with.
+            best_move (int): The best move.
+
+        """
+        if evaluation <= alpha:
+            bound = UPPER_BOUND
+        elif evaluation >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(hash, depth, bound, evaluation, best_move)
+
+    def _fill_stats(self, stats: SearchStats):
+        stats.nodes = self.node_count
+        stats.leaves = self.leaf_count
+        stats.evaluations = self.computation_count
+        stats.quiescence_nodes = self.quiescence_node_count
+        stats.quiescence_cutoffs = self.quiescence_cutoffs
+        stats.quiescence_limit_hits = self.quiescence_limit_hits
+        stats.tablebase_hits = self.tablebase_hits
+        stats.null_window_researches = self.null_window_researches
+        stats.aspiration_researches = self.aspiration_researches
+        stats.cutoffs = dict(self.cutoffs_by_index)
+
+        table = self.transposition_table
+        stats.tt_probes = table.probes
+        stats.tt_hits = table.hits
+        stats.tt_stores = table.stores
+        stats.tt_replacements = table.replacements
+
+
+def _search_root_move(weights: dict, search_limits: dict, use_move_ordering: bool, tablebase_directory: str,
+                      book_path: str, generation: int, white: int, black: int, hash: int, terms: tuple, phase2: bool,
+                      move: int, depth: int, beta: float, seconds_left: float) -> tuple:
+    """Runs in a worker process of the parallel search. The worker has its own engine, whose transposition table,
+    killers and history stay there between the calls. It's made again if the parent engine's tablebase or book
+    change.
+
+    Args:
+        generation (int): The generation of the parent's transposition table, which changes with every search; the
+            worker's table starts a new search when it does too.
+
+    Returns:
+        tuple: The evaluation of the move (None if the time ran out) and the counters of the search.
+
+    """
+    global _worker_engine, _worker_generation
+    if _worker_engine is None or _worker_engine.tablebase.directory != tablebase_directory or \
+            _worker_engine.book.path != book_path:
+        if _worker_engine is not None:
+            _worker_engine.close()
+        _worker_engine = Engine(tablebase=Tablebase(tablebase_directory), book=Book(book_path))
+        _worker_generation = None
+
+    engine = _worker_engine
+    if generation != _worker_generation:
+        engine.transposition_table.new_search()
+        _worker_generation = generation
+    engine.weights = weights
+    engine.search_limits = search_limits
+    engine.use_move_ordering = use_move_ordering
+    engine._reset_counters()
+    minimax = engine._minimax_phase2 if phase2 else engine._minimax_phase1
+
+    engine._clear_killers()
+    engine._deadline = default_timer() + seconds_left
+    try:
+        new_white, new_black, new_hash, new_terms = _make_move(white, black, hash, terms, move, False)
+        evaluation = minimax(new_white, new_black, new_hash, new_terms, depth, -inf, beta, True)
+    except _SearchTimeout:
+        evaluation = None
+    finally:
+        engine._deadline = inf
+
+    return evaluation, engine._get_counters()
+
+
+# The old interface, where the piece to take is asked for in a second call. It uses one shared engine, so it's not
+# safe to use from more than one game at a time; use an Engine instead.
+
+_pending_node_id_to_take = -1
 
 
 def ai_place_piece_at(position: list) -> int:
@@ -33,38 +1074,8 @@ def ai_place_piece_at(position: list) -> int:
         int: The id of the node on which to put the piece.
 
     """
-    global computation_count, _best_node_id_to_take
-    best_evaluation = inf  # BLACK searches for the lowest evaluation!!!
-    best_node_id = -1
-
-    start = default_timer()
-    for i in NODE_INDICES:
-        if position[i] == NO_PIECE:  # If there is no piece
-            position[i] = BLACK  # Put a BLACK piece
-            if _check_is_windmill_formed(position, BLACK, i):
-                best_eval_piece_to_take = inf
-                for j in _get_nodes_pieces_to_take(position, WHITE):
-                    position[j] = NO_PIECE
-                    evaluation = _minimax_phase1(position, 4, -inf, inf, True)
-                    position[j] = WHITE
-                    if evaluation < best_eval_piece_to_take:
-                        _best_node_id_to_take = j
-                        best_eval_piece_to_take = evaluation
-                    if evaluation < best_evaluation:
-                        best_node_id = i
-                        best_evaluation = evaluation
-            else:
-                evaluation = _minimax_phase1(position, 4, -inf, inf, True)  # It's maximizing player now, because we just put
-                if evaluation < best_evaluation:                            # a black piece
-                    best_node_id = i
-                    best_evaluation = evaluation
-            position[i] = NO_PIECE  # Undo the placement
-            print(f"Checked spot {i}, evaluation is {evaluation}")
-    print(f"Took {default_timer() - start} seconds")
-    print(f"Nr. of computations is {computation_count}")
-    computation_count = 0
-
-    assert best_node_id != -1
+    global _pending_node_id_to_take
+    best_node_id, _pending_node_id_to_take = _get_default_engine().place_piece_at(position)
     return best_node_id
 
 
@@ -74,10 +1085,10 @@ def ai_remove_piece() -> int:
         int: The id of the node from which to take the piece.
 
     """
-    global _best_node_id_to_take
-    assert _best_node_id_to_take != -1
-    id = _best_node_id_to_take
-    _best_node_id_to_take = -1
+    global _pending_node_id_to_take
+    assert _pending_node_id_to_take != -1
+    id = _pending_node_id_to_take
+    _pending_node_id_to_take = -1
     return id
 
 
@@ -90,582 +1101,318 @@ def ai_move_piece(position: list) -> tuple:
         tuple: The id of the source and destination nodes.
 
     """
-    global computation_count, _best_node_id_to_take
-    best_evaluation = inf
-    best_node_id_src = -1
-    best_node_id_dest = -1
-
-    start = default_timer()
-    for i in NODE_INDICES:
-        if position[i] == BLACK:
-            for j in _where_can_go(position, i, 2):
-                if position[j] == NO_PIECE:
-                    position[j] = BLACK
-                    position[i] = NO_PIECE
-                    if _check_is_windmill_formed(position, BLACK, j):
-                        best_eval_piece_to_take = inf
-                        for k in _get_nodes_pieces_to_take(position, WHITE):
-                            position[k] = NO_PIECE
-                            evaluation = _minimax_phase2(position, 3, -inf, inf, True)
-                            position[k] = WHITE
-                            if evaluation < best_eval_piece_to_take:
-                                _best_node_id_to_take = k
-                                best_eval_piece_to_take = evaluation
-                            if evaluation < best_evaluation:
-                                best_node_id_src = i
-                                best_node_id_dest = j
-                                best_evaluation = evaluation
-                    else:
-                        evaluation = _minimax_phase2(position, 3, -inf, inf, True)
-                        if evaluation < best_evaluation:
-                            best_node_id_src = i
-                            best_node_id_dest = j
-                            best_evaluation = evaluation
-                    position[i] = BLACK  # Undo the taking
-                    position[j] = NO_PIECE
-                    print(f"Checked spot {j} for piece node {i}, evaluation is {evaluation}")
-    print(f"Took {default_timer() - start} seconds")
-    print(f"Nr. of computations is {computation_count}")
-    computation_count = 0
-
-    assert best_node_id_src != -1 or best_node_id_dest != -1
+    global _pending_node_id_to_take
+    best_node_id_src, best_node_id_dest, _pending_node_id_to_take = _get_default_engine().move_piece(position)
     return best_node_id_src, best_node_id_dest
 
 
-def _get_evaluation_of_position_phase1(position: list) -> int:
-    global computation_count
-    computation_count += 1
+def _get_default_engine() -> Engine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = Engine()
+    return _default_engine
 
-    evaluation = 0
 
-    for node in position:
-        if node == WHITE:
-            evaluation += weights["piece"]
-        elif node == BLACK:
-            evaluation -= weights["piece"]
+def _get_terms(white: int, black: int) -> tuple:
+    """Counts the terms of the evaluation from scratch.
 
-    white_mills, black_mills = _get_number_of_windmills(position)
-    for _ in range(white_mills):
-        evaluation += weights["mill"]
-    for _ in range(black_mills):
-        evaluation -= weights["mill"]
+    Args:
+        white (int): The mask of the WHITE pieces.
+        black (int): The mask of the BLACK pieces.
 
-    for i, node in enumerate(position):
-        if node == WHITE:
-            positions = _where_can_go(position, i, 1, phase1_evaluation=True)
-            assert len(positions) < 5
-            for node_ in positions.values():
-                if node_ == NO_PIECE:
-                    evaluation += weights["free_move"]
-        elif node == BLACK:
-            positions = _where_can_go(position, i, 2, phase1_evaluation=True)
-            assert len(positions) < 5
-            for node_ in positions.values():
-                if node_ == NO_PIECE:
-                    evaluation -= weights["free_move"]
+    Returns:
+        tuple: The terms of the evaluation.
 
-    return evaluation
+    """
+    empty = ~(white | black) & FULL_BOARD
+    white_mills, black_mills = _get_number_of_windmills(white, black)
 
+    return (popcount(white), popcount(black), white_mills, black_mills, _get_mobility(white, empty, False),
+            _get_mobility(black, empty, False))
 
-def _get_evaluation_of_position_phase2(position: list) -> Union[int, float]:
-    global computation_count
-    computation_count += 1
 
-    white_pieces = 0  # Return absolute value if it's game over TODO maybe should also check if it's blocked
-    black_pieces = 0
-    for node in position:
-        if node == WHITE:
-            white_pieces += 1
-        elif node == BLACK:
-            black_pieces += 1
-    if white_pieces == 2:
-        return -inf
-    elif black_pieces == 2:
-        return inf
+def encode_move(src: int, dest: int, take: int) -> int:
+    """
+    Args:
+        src (int): The source node or -1, when putting a piece.
+        dest (int): The destination node or -1, only for NO_MOVE.
+        take (int): The taken node or -1, when no windmill is formed.
 
-    evaluation = 0
+    Returns:
+        int: The move.
 
-    for node in position:
-        if node == WHITE:
-            evaluation += weights["piece"]
-        elif node == BLACK:
-            evaluation -= weights["piece"]
+    """
+    return (src & NO_NODE) | (dest & NO_NODE) << 5 | (take & NO_NODE) << 10
 
-    white_mills, black_mills = _get_number_of_windmills(position)
-    for _ in range(white_mills):
-        evaluation += weights["mill"]
-    for _ in range(black_mills):
-        evaluation -= weights["mill"]
 
-    for i, node in enumerate(position):
-        if node == WHITE:
-            positions = _where_can_go(position, i, 1)
-            for node_ in positions.values():
-                if node_ == NO_PIECE:
-                    evaluation += weights["free_move"]
-        elif node == BLACK:
-            positions = _where_can_go(position, i, 2)
-            for node_ in positions.values():
-                if node_ == NO_PIECE:
-                    evaluation -= weights["free_move"]
+def decode_move(move: int) -> tuple:
+    """
+    Args:
+        move (int): The move.
+
+    Returns:
+        tuple: The source (or -1), destination and taken (or -1) nodes; all -1 for NO_MOVE.
 
-    return evaluation
+    """
+    src = move & NO_NODE
+    dest = move >> 5 & NO_NODE
+    take = move >> 10
+    return -1 if src == NO_NODE else src, -1 if dest == NO_NODE else dest, -1 if take == NO_NODE else take
 
 
-def _minimax_phase1(position: list, depth: int, alpha: float, beta: float, maximizing_player: bool) -> int:
-    if depth == 0:
-        return _get_evaluation_of_position_phase1(position)
-
-    if maximizing_player:
-        max_eval = -inf
-        for i in NODE_INDICES:
-            if position[i] == NO_PIECE:
-                position[i] = WHITE  # It's WHITE's turn
-                if _check_is_windmill_formed(position, WHITE, i):
-                    for j in _get_nodes_pieces_to_take(position, BLACK):
-                        position[j] = NO_PIECE
-                        eval = _minimax_phase1(position, depth - 1, alpha, beta, False)
-                        position[j] = BLACK
-                        max_eval = max(max_eval, eval)
-                        new_alpha = max(alpha, eval)
-                        if beta <= new_alpha:
-                            position[i] = NO_PIECE  # Remove the piece before breaking
-                            return max_eval
-                else:
-                    eval = _minimax_phase1(position, depth - 1, alpha, beta, False)
-                    max_eval = max(max_eval, eval)
-                    new_alpha = max(alpha, eval)
-                    if beta <= new_alpha:
-                        position[i] = NO_PIECE  # Remove the piece before breaking
-                        return max_eval
-                position[i] = NO_PIECE
-        return max_eval
+def perft(position: list, depth: int, phase2: bool = False, white_to_move: bool = True) -> int:
+    """Counts the positions at the given depth, for testing and timing the move generator on its own.
+
+    Like the search, phase 1 doesn't count the pieces in hand and phase 2 ends when a player has less than 3 pieces.
+
+    Args:
+        position (list): The state of the game.
+        depth (int): How many moves to make.
+        phase2 (bool): If the pieces are moved instead of put.
+        white_to_move (bool): If it's WHITE that makes the first move.
+
+    Returns:
+        int: The number of positions.
+
+    """
+    white, black = _to_bitboard(position)
+    if white_to_move:
+        return _perft(white, black, depth, phase2)
     else:
-        min_eval = inf
-        for i in NODE_INDICES:
-            if position[i] == NO_PIECE:
-                position[i] = BLACK  # It's BLACK's turn
-                if _check_is_windmill_formed(position, BLACK, i):
-                    for j in _get_nodes_pieces_to_take(position, WHITE):
-                        position[j] = NO_PIECE
-                        eval = _minimax_phase1(position, depth - 1, alpha, beta, True)
-                        position[j] = WHITE
-                        min_eval = min(min_eval, eval)
-                        new_beta = min(beta, eval)
-                        if new_beta <= alpha:
-                            position[i] = NO_PIECE  # Remove the piece before breaking
-                            return min_eval
-                else:
-                    eval = _minimax_phase1(position, depth - 1, alpha, beta, True)
-                    min_eval = min(min_eval, eval)
-                    new_beta = min(beta, eval)
-                    if new_beta <= alpha:
-                        position[i] = NO_PIECE  # Remove the piece before breaking
-                        return min_eval
-                position[i] = NO_PIECE
-        return min_eval
-
-
-def _minimax_phase2(position: list, depth: int, alpha: float, beta: float, maximizing_player: bool) -> int:
-    if depth == 0 or _is_game_over(position):
-        return _get_evaluation_of_position_phase2(position)
-
-    if maximizing_player:
-        max_eval = -inf
-        for i in NODE_INDICES:
-            if position[i] == WHITE:
-                for j in _where_can_go(position, i, 1):
-                    if position[j] == NO_PIECE:
-                        position[j] = WHITE
-                        position[i] = NO_PIECE
-                        if _check_is_windmill_formed(position, WHITE, i):
-                            for k in _get_nodes_pieces_to_take(position, BLACK):
-                                position[k] = NO_PIECE
-                                eval = _minimax_phase2(position, depth - 1, alpha, beta, False)
-                                position[k] = BLACK
-                                max_eval = max(max_eval, eval)
-                                new_alpha = max(alpha, eval)
-                                if beta <= new_alpha:
-                                    position[i] = WHITE  # Do the thing before breaking
-                                    position[j] = NO_PIECE
-                                    return max_eval
-                        else:
-                            eval = _minimax_phase2(position, depth - 1, alpha, beta, False)
-                            max_eval = max(max_eval, eval)
-                            new_alpha = max(alpha, eval)
-                            if beta <= new_alpha:
-                                position[i] = WHITE  # Do the thing before breaking
-                                position[j] = NO_PIECE
-                                return max_eval
-                        position[i] = WHITE
-                        position[j] = NO_PIECE
-        return max_eval
+        return _perft(black, white, depth, phase2)
+
+
+def _perft(pieces: int, opponent_pieces: int, depth: int, phase2: bool) -> int:
+    if depth == 0:
+        return 1
+    if phase2 and (popcount(pieces) < 3 or popcount(opponent_pieces) < 3):
+        return 0
+
+    moves = _generate_moves(pieces, opponent_pieces, phase2)
+    if depth == 1:
+        return len(moves)
+
+    count = 0
+    for move in moves:
+        new_pieces = pieces & ~_MOVE_BIT[move & NO_NODE] | BIT[move >> 5 & NO_NODE]
+        count += _perft(opponent_pieces & ~_MOVE_BIT[move >> 10], new_pieces, depth - 1, phase2)
+
+    return count
+
+
+def _generate_moves(pieces: int, opponent_pieces: int, phase2: bool) -> list:
+    """Generates the moves of both phases, flying included, sorted by source, destination and taken node.
+
+    Args:
+        pieces (int): The mask of the pieces of the player to move.
+        opponent_pieces (int): The mask of the pieces of the other player.
+        phase2 (bool): If the pieces are moved instead of put.
+
+    Returns:
+        list: The moves.
+
+    """
+    empty = ~(pieces | opponent_pieces) & FULL_BOARD
+    nodes_to_take = None  # Only find them if there is a windmill
+
+    if phase2:
+        sources = get_nodes(pieces)
+        can_jump = len(sources) == 3
     else:
-        min_eval = inf
-        for i in NODE_INDICES:
-            if position[i] == BLACK:
-                for j in _where_can_go(position, i, 2):
-                    if position[j] == NO_PIECE:
-                        position[j] = BLACK
-                        position[i] = NO_PIECE
-                        if _check_is_windmill_formed(position, BLACK, i):
-                            for k in _get_nodes_pieces_to_take(position, WHITE):
-                                position[k] = NO_PIECE
-                                eval = _minimax_phase2(position, depth - 1, alpha, beta, True)
-                                position[k] = WHITE
-                                min_eval = min(min_eval, eval)
-                                new_beta = min(beta, eval)
-                                if new_beta <= alpha:
-                                    position[i] = BLACK  # Do the thing before breaking
-                                    position[j] = NO_PIECE
-                                    return min_eval
-                        else:
-                            eval = _minimax_phase2(position, depth - 1, alpha, beta, True)
-                            min_eval = min(min_eval, eval)
-                            new_beta = min(beta, eval)
-                            if new_beta <= alpha:
-                                position[i] = BLACK  # Do the thing before breaking
-                                position[j] = NO_PIECE
-                                return min_eval
-                        position[i] = BLACK
-                        position[j] = NO_PIECE
-        return min_eval
-
-
-def _check_is_windmill_formed(position: list, color: int, node: int) -> bool:
-    if position[0] == position[1] == position[2] == color:
-        if node == 0 or node == 1 or node == 2:
-            return True
-    if position[0] == position[9] == position[21] == color:
-        if node == 0 or node == 9 or node == 21:
-            return True
-    if position[21] == position[22] == position[23] == color:
-        if node == 21 or node == 22 or node == 23:
-            return True
-    if position[23] == position[14] == position[2] == color:
-        if node == 23 or node == 14 or node == 2:
-            return True
-    if position[3] == position[4] == position[5] == color:
-        if node == 3 or node == 4 or node == 5:
-            return True
-    if position[3] == position[10] == position[18] == color:
-        if node == 3 or node == 10 or node == 18:
-            return True
-    if position[18] == position[19] == position[20] == color:
-        if node == 18 or node == 19 or node == 20:
-            return True
-    if position[20] == position[13] == position[5] == color:
-        if node == 20 or node == 13 or node == 5:
-            return True
-    if position[6] == position[7] == position[8] == color:
-        if node == 6 or node == 7 or node == 8:
-            return True
-    if position[6] == position[11] == position[15] == color:
-        if node == 6 or node == 11 or node == 15:
-            return True
-    if position[15] == position[16] == position[17] == color:
-        if node == 15 or node == 16 or node == 17:
-            return True
-    if position[17] == position[12] == position[8] == color:
-        if node == 17 or node == 12 or node == 8:
-            return True
-    if position[1] == position[4] == position[7] == color:
-        if node == 1 or node == 4 or node == 7:
-            return True
-    if position[9] == position[10] == position[11] == color:
-        if node == 9 or node == 10 or node == 11:
-            return True
-    if position[22] == position[19] == position[16] == color:
-        if node == 22 or node == 19 or node == 16:
-            return True
-    if position[12] == position[13] == position[14] == color:
-        if node == 12 or node == 13 or node == 14:
-            return True
-
-    return False
-
-
-def _where_can_go(position: list, node_id: int, player: int, phase1_evaluation: bool = False) -> dict:
+        sources = (NO_NODE,)
+        can_jump = True  # Anywhere empty
+
+    moves = []
+    for src in sources:
+        remaining_pieces = pieces & ~_MOVE_BIT[src]
+        destinations = empty if can_jump else NEIGHBOR_MASKS[src] & empty
+        for dest in get_nodes(destinations):
+            move = src | dest << 5
+            pair1, pair2 = NODE_MILL_PAIRS[dest]
+            if remaining_pieces & pair1 == pair1 or remaining_pieces & pair2 == pair2:
+                if nodes_to_take is None:
+                    nodes_to_take = get_nodes_pieces_to_take(opponent_pieces)
+                for take in nodes_to_take:
+                    moves.append(move | take << 10)
+            else:
+                moves.append(move | _NO_TAKE)
+
+    return moves
+
+
+def _generate_forcing_moves(pieces: int, opponent_pieces: int, phase2: bool) -> list:
+    """Generates the moves that form a windmill, first, and then the ones that block a windmill the opponent could
+    form with its next move.
+
+    Args:
+        pieces (int): The mask of the pieces of the player to move.
+        opponent_pieces (int): The mask of the pieces of the other player.
+        phase2 (bool): If the pieces are moved instead of put.
+
+    Returns:
+        list: The moves.
+
     """
+    mill_moves = []
+    block_moves = []
+    opponent_can_jump = not phase2 or popcount(opponent_pieces) == 3
+
+    for move in _generate_moves(pieces, opponent_pieces, phase2):
+        if move >> 10 != NO_NODE:
+            mill_moves.append(move)
+            continue
+
+        dest = move >> 5 & NO_NODE
+        for pair in NODE_MILL_PAIRS[dest]:
+            # The opponent has the other two nodes of the windmill and some other piece that can get to this one
+            if opponent_pieces & pair == pair and (opponent_can_jump or NEIGHBOR_MASKS[dest] & opponent_pieces & ~pair):
+                block_moves.append(move)
+                break
+
+    return mill_moves + block_moves
+
+
+def _make_move(white: int, black: int, hash: int, terms: tuple, move: int, white_to_move: bool) -> tuple:
+    """Makes a move and updates the hash and the terms of the evaluation by what changed around the nodes involved.
+
     Args:
-        position (list): The state of the game.
-        node_id (int): Id of the node from where to go.
-        player (int): PLAYER1 or PLAYER2; for deciding if the player can jump.
+        white (int): The mask of the WHITE pieces.
+        black (int): The mask of the BLACK pieces.
+        hash (int): The Zobrist hash of the position.
+        terms (tuple): The terms of the evaluation of the position.
+        move (int): The move.
+        white_to_move (bool): If it's WHITE that makes the move.
 
     Returns:
-        dict: Contains the id of the nodes as the key and the node itself (0, 1 or 2) as the value.
+        tuple: The WHITE mask, the BLACK mask, the hash and the terms after the move.
 
     """
-    if (player == 1 and not _can_jump(position, 1) or player == 2 and not _can_jump(position, 2)) or phase1_evaluation:
-        if node_id == 0:
-            return {1: position[1], 9: position[9]}
-        elif node_id == 1:
-            return {0: position[0], 2: position[2], 4: position[4]}
-        elif node_id == 2:
-            return {1: position[1], 14: position[14]}
-        elif node_id == 3:
-            return {4: position[4], 10: position[10]}
-        elif node_id == 4:
-            return {1: position[1], 3: position[3], 5: position[5], 7: position[7]}
-        elif node_id == 5:
-            return {4: position[4], 13: position[13]}
-        elif node_id == 6:
-            return {7: position[7], 11: position[11]}
-        elif node_id == 7:
-            return {4: position[4], 6: position[6], 8: position[8]}
-        elif node_id == 8:
-            return {7: position[7], 12: position[12]}
-        elif node_id == 9:
-            return {0: position[0], 10: position[10], 21: position[21]}
-        elif node_id == 10:
-            return {3: position[3], 9: position[9], 11: position[11], 18: position[18]}
-        elif node_id == 11:
-            return {6: position[6], 10: position[10], 15: position[15]}
-        elif node_id == 12:
-            return {8: position[8], 13: position[13], 17: position[17]}
-        elif node_id == 13:
-            return {5: position[5], 12: position[12], 14: position[14], 20: position[20]}
-        elif node_id == 14:
-            return {2: position[2], 13: position[13], 23: position[23]}
-        elif node_id == 15:
-            return {11: position[11], 16: position[16]}
-        elif node_id == 16:
-            return {15: position[15], 17: position[17], 19: position[19]}
-        elif node_id == 17:
-            return {12: position[12], 16: position[16]}
-        elif node_id == 18:
-            return {10: position[10], 19: position[19]}
-        elif node_id == 19:
-            return {16: position[16], 18: position[18], 20: position[20], 22: position[22]}
-        elif node_id == 20:
-            return {13: position[13], 19: position[19]}
-        elif node_id == 21:
-            return {9: position[9], 22: position[22]}
-        elif node_id == 22:
-            return {19: position[19], 21: position[21], 23: position[23]}
-        else:
-            return {14: position[14], 22: position[22]}
+    src = move & NO_NODE
+    dest = move >> 5 & NO_NODE
+    take = move >> 10
+    if white_to_move:
+        own, opponent = white, black
+        own_keys, opponent_keys = ZOBRIST_WHITE, ZOBRIST_BLACK
+        own_count, opponent_count, own_mills, opponent_mills, own_mobility, opponent_mobility = terms
+    else:
+        own, opponent = black, white
+        own_keys, opponent_keys = ZOBRIST_BLACK, ZOBRIST_WHITE
+        opponent_count, own_count, opponent_mills, own_mills, opponent_mobility, own_mobility = terms
+
+    if src != NO_NODE:  # Lift the piece; its neighbors get a free node and it loses its own free moves
+        own_mills -= _count_windmills_through(own, src)
+        own &= ~BIT[src]
+        hash ^= own_keys[src]
+        neighbors = NEIGHBOR_MASKS[src]
+        own_mobility += popcount(neighbors & own) - popcount(neighbors & ~(own | opponent))
+        opponent_mobility += popcount(neighbors & opponent)
     else:
-        nodes = {i: node for i, node in enumerate(position)}
-        del nodes[node_id]
-        return nodes
+        own_count += 1
+
+    neighbors = NEIGHBOR_MASKS[dest]  # Put the piece; its neighbors lose a free node
+    own_mobility -= popcount(neighbors & own)
+    opponent_mobility -= popcount(neighbors & opponent)
+    own |= BIT[dest]
+    hash ^= own_keys[dest]
+    own_mobility += popcount(neighbors & ~(own | opponent))
+    own_mills += _count_windmills_through(own, dest)
+
+    if take != NO_NODE:
+        opponent_mills -= _count_windmills_through(opponent, take)
+        opponent &= ~BIT[take]
+        hash ^= opponent_keys[take]
+        opponent_count -= 1
+        neighbors = NEIGHBOR_MASKS[take]
+        opponent_mobility += popcount(neighbors & opponent) - popcount(neighbors & ~(own | opponent))
+        own_mobility += popcount(neighbors & own)
+
+    hash ^= ZOBRIST_TURN
+    if white_to_move:
+        return own, opponent, hash, (own_count, opponent_count, own_mills, opponent_mills, own_mobility,
+                                     opponent_mobility)
+    else:
+        return opponent, own, hash, (opponent_count, own_count, opponent_mills, own_mills, opponent_mobility,
+                                     own_mobility)
+
+
+def _move_to_front(moves: list, move: int):
+    try:
+        moves.insert(0, moves.pop(moves.index(move)))
+    except ValueError:  # Not a move in this position (or None)
+        pass
 
 
-def _get_nodes_pieces_to_take(position: list, color: int) -> list:
+def _first(item: tuple):
+    return item[0]
+
+
+def _to_bitboard(position: list) -> tuple:
     """
     Args:
-        position (list): The state of the game.
-        color (int): The color of the pieces to take.
+        position (list): The state of the game as a list of 24 numbers (0, 1 or 2).
 
     Returns:
-        list: The id of the nodes.
+        tuple: The WHITE mask and the BLACK mask.
 
     """
-    windmill_nodes = []
-    if position[0] == position[1] == position[2] == color:
-        windmill_nodes.append(0)
-        windmill_nodes.append(1)
-        windmill_nodes.append(2)
-    if position[0] == position[9] == position[21] == color:
-        windmill_nodes.append(0)
-        windmill_nodes.append(9)
-        windmill_nodes.append(21)
-    if position[21] == position[22] == position[23] == color:
-        windmill_nodes.append(21)
-        windmill_nodes.append(22)
-        windmill_nodes.append(23)
-    if position[23] == position[14] == position[2] == color:
-        windmill_nodes.append(23)
-        windmill_nodes.append(14)
-        windmill_nodes.append(2)
-    if position[3] == position[4] == position[5] == color:
-        windmill_nodes.append(3)
-        windmill_nodes.append(4)
-        windmill_nodes.append(5)
-    if position[3] == position[10] == position[18] == color:
-        windmill_nodes.append(3)
-        windmill_nodes.append(10)
-        windmill_nodes.append(18)
-    if position[18] == position[19] == position[20] == color:
-        windmill_nodes.append(18)
-        windmill_nodes.append(19)
-        windmill_nodes.append(20)
-    if position[20] == position[13] == position[5] == color:
-        windmill_nodes.append(20)
-        windmill_nodes.append(13)
-        windmill_nodes.append(5)
-    if position[6] == position[7] == position[8] == color:
-        windmill_nodes.append(6)
-        windmill_nodes.append(7)
-        windmill_nodes.append(8)
-    if position[6] == position[11] == position[15] == color:
-        windmill_nodes.append(6)
-        windmill_nodes.append(11)
-        windmill_nodes.append(15)
-    if position[15] == position[16] == position[17] == color:
-        windmill_nodes.append(15)
-        windmill_nodes.append(16)
-        windmill_nodes.append(17)
-    if position[17] == position[12] == position[8] == color:
-        windmill_nodes.append(17)
-        windmill_nodes.append(12)
-        windmill_nodes.append(8)
-    if position[1] == position[4] == position[7] == color:
-        windmill_nodes.append(1)
-        windmill_nodes.append(4)
-        windmill_nodes.append(7)
-    if position[9] == position[10] == position[11] == color:
-        windmill_nodes.append(9)
-        windmill_nodes.append(10)
-        windmill_nodes.append(11)
-    if position[22] == position[19] == position[16] == color:
-        windmill_nodes.append(22)
-        windmill_nodes.append(19)
-        windmill_nodes.append(16)
-    if position[12] == position[13] == position[14] == color:
-        windmill_nodes.append(12)
-        windmill_nodes.append(13)
-        windmill_nodes.append(14)
-
-    nodes = []
+    white = 0
+    black = 0
     for i, node in enumerate(position):
-        if node == color and i not in windmill_nodes:
-            nodes.append(i)
+        if node == WHITE:
+            white |= BIT[i]
+        elif node == BLACK:
+            black |= BIT[i]
+
+    return white, black
+
+
+def _count_windmills_through(pieces: int, node: int) -> int:
+    mill1, mill2 = NODE_MILL_MASKS[node]
+    return (pieces & mill1 == mill1) + (pieces & mill2 == mill2)
+
+
+def _get_mobility(pieces: int, empty: int, can_jump: bool) -> int:
+    """
+    Args:
+        pieces (int): The mask of the pieces of one color.
+        empty (int): The mask of the empty nodes.
+        can_jump (bool): If the pieces can go anywhere.
+
+    Returns:
+        int: The number of free moves of all the pieces.
+
+    """
+    if can_jump:
+        return popcount(pieces) * popcount(empty)
 
-    # If there are no nodes, then they all must be in windmills, so return them all.
-    if not nodes:
-        return [i for i, node in enumerate(position) if node == color]
+    mobility = 0
+    for i in get_nodes(pieces):
+        mobility += popcount(NEIGHBOR_MASKS[i] & empty)
 
-    return nodes
+    return mobility
 
 
-def _get_number_of_windmills(position: list) -> tuple:
+def _get_number_of_windmills(white: int, black: int) -> tuple:
     white_mills = 0
     black_mills = 0
 
-    if position[0] == position[1] == position[2]:
-        if position[0] == WHITE:
-            white_mills += 1
-        elif position[0] == BLACK:
-            black_mills += 1
-    if position[0] == position[9] == position[21]:
-        if position[0] == WHITE:
-            white_mills += 1
-        elif position[0] == BLACK:
-            black_mills += 1
-    if position[21] == position[22] == position[23]:
-        if position[21] == WHITE:
-            white_mills += 1
-        elif position[21] == BLACK:
-            black_mills += 1
-    if position[23] == position[14] == position[2]:
-        if position[23] == WHITE:
-            white_mills += 1
-        elif position[23] == BLACK:
-            black_mills += 1
-    if position[3] == position[4] == position[5]:
-        if position[3] == WHITE:
-            white_mills += 1
-        elif position[3] == BLACK:
-            black_mills += 1
-    if position[3] == position[10] == position[18]:
-        if position[3] == WHITE:
-            white_mills += 1
-        elif position[3] == BLACK:
-            black_mills += 1
-    if position[18] == position[19] == position[20]:
-        if position[18] == WHITE:
-            white_mills += 1
-        elif position[18] == BLACK:
-            black_mills += 1
-    if position[20] == position[13] == position[5]:
-        if position[20] == WHITE:
-            white_mills += 1
-        elif position[20] == BLACK:
-            black_mills += 1
-    if position[6] == position[7] == position[8]:
-        if position[6] == WHITE:
-            white_mills += 1
-        elif position[6] == BLACK:
-            black_mills += 1
-    if position[6] == position[11] == position[15]:
-        if position[6] == WHITE:
-            white_mills += 1
-        elif position[6] == BLACK:
-            black_mills += 1
-    if position[15] == position[16] == position[17]:
-        if position[15] == WHITE:
-            white_mills += 1
-        elif position[15] == BLACK:
-            black_mills += 1
-    if position[17] == position[12] == position[8]:
-        if position[17] == WHITE:
-            white_mills += 1
-        elif position[17] == BLACK:
-            black_mills += 1
-    if position[1] == position[4] == position[7]:
-        if position[1] == WHITE:
-            white_mills += 1
-        elif position[1] == BLACK:
-            black_mills += 1
-    if position[9] == position[10] == position[11]:
-        if position[9] == WHITE:
-            white_mills += 1
-        elif position[9] == BLACK:
-            black_mills += 1
-    if position[22] == position[19] == position[16]:
-        if position[22] == WHITE:
-            white_mills += 1
-        elif position[22] == BLACK:
-            black_mills += 1
-    if position[12] == position[13] == position[14]:
-        if position[12] == WHITE:
+    for mill in MILL_MASKS:
+        if white & mill == mill:
             white_mills += 1
-        elif position[12] == BLACK:
+        elif black & mill == mill:
             black_mills += 1
 
     return white_mills, black_mills
 
 
-def _is_game_over(position: list) -> bool:  # TODO check if player is blocked; better make a "check player" method
-    black_pieces = 0
-    white_pieces = 0
-    for node in position:
-        if node == WHITE:
-            white_pieces += 1
-        elif node == BLACK:
-            black_pieces += 1
+def _is_game_over(terms: tuple) -> bool:  # TODO check if player is blocked; better make a "check player" method
+    white_pieces, black_pieces, _, _, white_mobility, black_mobility = terms
 
     if white_pieces < 3 or black_pieces < 3:  # Test if player has no more pieces
         return True
 
-    for i in NODE_INDICES:  # Test if player has any moves to make
-        if position[i] == WHITE:
-            white_can_go = _where_can_go(position, i, 1)
-            if not all(map(lambda node: node != NO_PIECE, white_can_go.values())):
-                return False
-        elif position[i] == BLACK:
-            black_can_go = _where_can_go(position, i, 2)
-            if not all(map(lambda node: node != NO_PIECE, black_can_go.values())):
-                return False
-
-    return True
-
-
-def _can_jump(position: list, player: int) -> bool:
-    if player == 1:
-        white_pieces = 0
-        for node in position:
-            if node == WHITE:
-                white_pieces += 1
-        if white_pieces == 3:
-            return True
-    else:
-        black_pieces = 0
-        for node in position:
-            if node == BLACK:
-                black_pieces += 1
-        if black_pieces == 3:
-            return True
+    empty_nodes = 24 - white_pieces - black_pieces
+    white_can_move = white_mobility > 0 or white_pieces == 3 and empty_nodes > 0
+    black_can_move = black_mobility > 0 or black_pieces == 3 and empty_nodes > 0
 
-    return False
+    return not (white_can_move or black_can_move)
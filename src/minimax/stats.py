@@ -0,0 +1,124 @@
+"""Statistics of a search of the engine.
+
+The search counts what it does in plain attributes of the engine, which are cheap to increment, and at the end of
+the search they are gathered in a SearchStats (Engine.stats). Turning them into text is only done if the logger is
+enabled for the level the engine logs them at, which it isn't by default; to see them, lower the level of the
+src.minimax.minimax logger to Engine.stats_level (INFO).
+
+"""
+
+from typing import NamedTuple, Optional
+
+
+class DepthStats(NamedTuple):
+    depth: int
+    nodes: int  # Searched in this iteration alone
+    seconds: float  # Since the search started, when the iteration was done
+    best_move: tuple  # Decoded
+    evaluation: float
+
+
+class SearchStats:
+    """What one search did, iteration by iteration."""
+
+    def __init__(self):
+        self.nodes = 0  # Positions searched, the leaves included
+        self.leaves = 0  # Positions reached at depth 0, from where the quiescence search starts
+        self.evaluations = 0
+        self.quiescence_nodes = 0
+        self.quiescence_cutoffs = 0
+        self.quiescence_limit_hits = 0  # Leaves whose quiescence search ran out of nodes
+        self.tablebase_hits = 0
+        self.null_window_researches = 0
+        self.aspiration_researches = 0
+        self.cutoffs = {}  # The index of the move that caused a cutoff (0 is the first one searched) to how many times
+
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_stores = 0
+        self.tt_replacements = 0
+
+        self.depths = []  # DepthStats of the completed iterations
+        self.seconds = 0.0
+        self.interrupted_depth = None  # The iteration that was stopped or ran out of time, if any
+
+    @property
+    def nodes_per_depth(self) -> list:
+        return [depth.nodes for depth in self.depths]
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def effective_branching_factor(self) -> Optional[float]:
+        """
+        Returns:
+            float: How many times more nodes the last completed iteration searched than the one before it, or None if
+                there aren't two iterations with nodes.
+
+        """
+        if len(self.depths) < 2 or self.depths[-2].nodes == 0:
+            return None
+        return self.depths[-1].nodes / self.depths[-2].nodes
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """The share of the cutoffs caused by the first move searched; the closer to 1, the better the move ordering."""
+        total = sum(self.cutoffs.values())
+        return self.cutoffs.get(0, 0) / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: Everything, in a form that can be saved as JSON.
+
+        """
+        return {
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "evaluations": self.evaluations,
+            "quiescence_nodes": self.quiescence_nodes,
+            "quiescence_cutoffs": self.quiescence_cutoffs,
+            "quiescence_limit_hits": self.quiescence_limit_hits,
+            "tablebase_hits": self.tablebase_hits,
+            "null_window_researches": self.null_window_researches,
+            "aspiration_researches": self.aspiration_researches,
+            "cutoffs": {str(index): count for index, count in sorted(self.cutoffs.items())},
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_stores": self.tt_stores,
+            "tt_replacements": self.tt_replacements,
+            "depths": [depth._asdict() for depth in self.depths],
+            "seconds": self.seconds,
+            "interrupted_depth": self.interrupted_depth,
+            "nodes_per_second": self.nodes_per_second,
+            "effective_branching_factor": self.effective_branching_factor
+        }
+
+    def __str__(self) -> str:
+        lines = [f"Took {self.seconds:.3f} seconds, {self.nodes} nodes ({self.nodes_per_second:.0f} per second), "
+                 f"{self.leaves} leaves, {self.evaluations} evaluations"]
+        if self.interrupted_depth is not None:
+            lines.append(f"Depth {self.interrupted_depth} wasn't finished")
+        if self.effective_branching_factor is not None:
+            lines.append(f"Effective branching factor is {self.effective_branching_factor:.2f}")
+        for depth in self.depths:
+            lines.append(f"Depth {depth.depth}: {depth.nodes} nodes, done at {depth.seconds:.3f} seconds, "
+                         f"best move is {depth.best_move}, evaluation is {depth.evaluation}")
+        if self.cutoffs:
+            first_cutoffs = ", ".join(f"{index}: {self.cutoffs[index]}" for index in sorted(self.cutoffs)[:8])
+            lines.append(f"Cutoffs by move index {{{first_cutoffs}}}, {self.first_move_cutoff_rate:.1%} by the first")
+        if self.tablebase_hits:
+            lines.append(f"Tablebase hits: {self.tablebase_hits}")
+        lines.append(f"Quiescence: {self.quiescence_nodes} nodes, {self.quiescence_cutoffs} cutoffs, "
+                     f"{self.quiescence_limit_hits} leaves ran out of nodes")
+        lines.append(f"Re-searches: {self.null_window_researches} after a null window, "
+                     f"{self.aspiration_researches} after an aspiration window")
+        lines.append(f"Transposition table: {self.tt_hits} hits out of {self.tt_probes} probes "
+                     f"({self.tt_hit_rate:.1%}), {self.tt_stores} stores, {self.tt_replacements} replacements")
+        return "\n".join(lines)
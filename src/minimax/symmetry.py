@@ -0,0 +1,89 @@
+"""Canonical forms of positions under the 16 symmetries of the board (see topology.SYMMETRIES).
+
+Positions that are symmetric to each other have the same canonical key, which is the smallest of the keys of their
+16 images. The key of a position is the WHITE mask in the low 24 bits and the BLACK mask above it, so it can be
+turned back into the position. Masks are moved around with a table per byte instead of node by node.
+
+The transform that goes with a canonical key takes the position to the canonical one; to play a move found for the
+canonical position, take it back with transform_move(move, INVERSES[symmetry]).
+
+"""
+
+from src.topology import FULL_BOARD, BIT, SYMMETRIES
+
+# INVERSES[s] undoes SYMMETRIES[s]
+INVERSES = tuple(SYMMETRIES.index(tuple(permutation.index(i) for i in range(24))) for permutation in SYMMETRIES)
+
+# The images of every byte of a mask, for every symmetry and for the low, middle and high byte
+_BYTE_IMAGES = tuple(
+    tuple(
+        tuple(sum(BIT[permutation[offset + i]] for i in range(8) if byte >> i & 1) for byte in range(256))
+        for offset in (0, 8, 16)
+    )
+    for permutation in SYMMETRIES
+)
+
+# The same for keys: the images of the bytes of the WHITE mask and then of the BLACK one, already shifted
+_KEY_BYTE_IMAGES = tuple(images + tuple(tuple(image << 24 for image in byte_images) for byte_images in images)
+                         for images in _BYTE_IMAGES)
+
+# Where every field of a move goes; the values past the last node (no node) stay as they are
+_MOVE_NODES = tuple(permutation + tuple(range(24, 32)) for permutation in SYMMETRIES)
+
+
+def canonicalize(white: int, black: int) -> tuple:
+    """
+    Args:
+        white (int): The mask of the WHITE pieces.
+        black (int): The mask of the BLACK pieces.
+
+    Returns:
+        tuple: The canonical key and the symmetry that takes the position to the canonical one.
+
+    """
+    white_low, white_middle, white_high = white & 0xff, white >> 8 & 0xff, white >> 16
+    black_low, black_middle, black_high = black & 0xff, black >> 8 & 0xff, black >> 16
+
+    keys = [low[white_low] | middle[white_middle] | high[white_high]
+            | black_low_images[black_low] | black_middle_images[black_middle] | black_high_images[black_high]
+            for low, middle, high, black_low_images, black_middle_images, black_high_images in _KEY_BYTE_IMAGES]
+    key = min(keys)
+
+    return key, keys.index(key)
+
+
+def key_to_position(key: int) -> tuple:
+    """
+    Returns:
+        tuple: The WHITE mask and the BLACK mask of the position with the given key.
+
+    """
+    return key & FULL_BOARD, key >> 24
+
+
+def transform(mask: int, symmetry: int) -> int:
+    """
+    Args:
+        mask (int): A set of nodes.
+        symmetry (int): The index of the symmetry.
+
+    Returns:
+        int: Where the nodes go.
+
+    """
+    low, middle, high = _BYTE_IMAGES[symmetry]
+    return low[mask & 0xff] | middle[mask >> 8 & 0xff] | high[mask >> 16]
+
+
+def transform_move(move: int, symmetry: int) -> int:
+    """
+    Args:
+        move (int): A move, encoded like in the search.
+        symmetry (int): The index of the symmetry.
+
+    Returns:
+        int: The same move on the transformed board.
+
+    """
+    nodes = _MOVE_NODES[symmetry]
+    return nodes[move & 31] | nodes[move >> 5 & 31] << 5 | nodes[move >> 10] << 10
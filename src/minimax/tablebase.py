@@ -0,0 +1,470 @@
+"""Endgame tablebases: the exact result of every position of the moving phase with few pieces left.
+
+A table has all the positions with a given number of pieces of the player to move and of the other player; 4v3 is
+the player to move with 4 pieces against 3. Every position is one byte:
+
+    0                 a draw; neither player can force a win
+    d + 1, d odd      the player to move wins in d plies
+    d + 1, d even     the player to move loses in d plies (in 0, if it can't move)
+
+Wins are as fast as possible and losses as slow as possible. The rules are those of Board: a player with 3 pieces
+jumps anywhere, a player with 2 pieces loses and a player that can't move loses. The draw rules (repetitions and
+MAX_TURNS_WO_MILLS) are not taken into account.
+
+The tables are built by retrograde analysis. Every move either stays in the tables of the same material (with the
+players swapped) or takes a piece and goes into smaller tables, which are built first. The positions that are lost
+at once are found first, then the ones that can move into them are won, the ones whose every move goes into a won
+position are lost, and so on, one ply at a time. Run it from the game folder with:
+
+    python -m src.minimax.tablebase 3v3 4v3 --workers 4
+
+The tables that the ones asked for depend on are built too. Every table is saved as soon as it's done and the ones
+already saved are skipped, so the generation can be stopped and started again. Pure Python is slow at this: 3v3
+takes minutes and every piece more makes it more than ten times longer.
+
+The index of a position is the rank of the nodes of the player to move among the 24 nodes, times the number of ways
+to put the other pieces, plus the rank of the nodes of the other player among the nodes left. The ranks are those of
+the combinatorial number system.
+
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+from timeit import default_timer
+from typing import Optional
+
+from src.log import get_logger
+from src.topology import FULL_BOARD, BIT, NEIGHBOR_MASKS, NODE_MILL_MASKS, NODE_MILL_PAIRS, get_nodes, popcount, \
+    get_nodes_pieces_to_take
+
+logger = get_logger(__name__)
+
+DIRECTORY = os.path.join("data", "tablebase")
+
+DRAW = 0
+WIN = 1
+LOSS = 2
+
+_MAGIC = b"MILL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBBxI")  # Magic, version, pieces of the player to move, pieces of the other, positions
+
+_MAX_DISTANCE = 254  # In plies, so that it fits in a byte with the draw
+_CHUNKS_PER_WORKER = 4
+
+_BINOMIAL = tuple(tuple(comb(n, k) for k in range(10)) for n in range(25))
+
+
+class Tablebase:
+    """The tables saved in a directory, opened the first time they are needed and read through mmap."""
+
+    def __init__(self, directory: Optional[str] = DIRECTORY):
+        """
+        Args:
+            directory (str): Where the tables are; it's fine if it doesn't exist. None for no tables at all.
+
+        """
+        self.directory = directory
+        # The (pieces, opponent pieces) there are tables of
+        self.materials = set() if directory is None else set(_saved_materials(directory))
+        self._tables = {}  # (pieces, opponent pieces) to the mmap of the table or None if it's not valid
+
+    def probe(self, pieces: int, opponent_pieces: int) -> Optional[tuple]:
+        """
+        Args:
+            pieces (int): The mask of the pieces of the player to move.
+            opponent_pieces (int): The mask of the pieces of the other player.
+
+        Returns:
+            tuple: WIN, LOSS or DRAW for the player to move and in how many plies, or None if there is no table.
+
+        """
+        piece_count = popcount(pieces)
+        opponent_count = popcount(opponent_pieces)
+        try:
+            table = self._tables[piece_count, opponent_count]
+        except KeyError:
+            table = self._tables[piece_count, opponent_count] = self._open(piece_count, opponent_count)
+
+        if table is None:
+            return None
+        index = _index(pieces, opponent_pieces, _BINOMIAL[24 - piece_count][opponent_count])
+        return _decode(table[_HEADER.size + index])
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+    def _open(self, piece_count: int, opponent_count: int) -> Optional[mmap.mmap]:
+        if self.directory is None:
+            return None
+        try:
+            with open(_path(self.directory, piece_count, opponent_count), "rb") as file:
+                table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError if it's empty
+            self.materials.discard((piece_count, opponent_count))
+            return None
+
+        magic, version, *material, size = _HEADER.unpack_from(table)
+        if magic != _MAGIC or version != _VERSION or material != [piece_count, opponent_count] or \
+                len(table) != _HEADER.size + size:
+            path = _path(self.directory, piece_count, opponent_count)
+            logger.warning(f"Ignoring the tablebase {path}; it's not valid")
+            table.close()
+            self.materials.discard((piece_count, opponent_count))
+            return None
+
+        return table
+
+
+def generate(materials: list, directory: str = DIRECTORY, workers: int = 1):
+    """Builds the tables of the given materials and of the ones they depend on, skipping the ones already saved.
+
+    Args:
+        materials (list): Tuples of the pieces of the player to move and of the other player, at least 3 each. The
+            table with the players swapped is always built too, as they depend on each other.
+        directory (str): Where to save the tables.
+        workers (int): The number of processes that go over the positions at the start of every table.
+
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    pairs = set()
+    pending = [tuple(sorted(material, reverse=True)) for material in materials]
+    while pending:
+        pair = pending.pop()
+        if pair in pairs:
+            continue
+        assert min(pair) >= 3 and sum(pair) <= 24, f"Can't build a table for {pair[0]}v{pair[1]}"
+        pairs.add(pair)
+        pending.extend(_dependencies(pair))
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for pair in sorted(pairs, key=lambda pair: (sum(pair), pair)):  # The smaller tables first
+            if all(os.path.exists(_path(directory, *material)) for material in _materials(pair)):
+                print(f"{pair[0]}v{pair[1]} is already done")
+                continue
+            _solve(pair, directory, executor, workers)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _solve(pair: tuple, directory: str, executor: Optional[ProcessPoolExecutor], workers: int):
+    """Builds and saves the tables of a material and of the one with the players swapped.
+
+    Args:
+        pair (tuple): The material, with the larger number of pieces first.
+        directory (str): Where the tables are saved; the smaller tables must be there already.
+        executor (ProcessPoolExecutor): The pool in which to go over the positions, or None to do it here.
+        workers (int): The number of processes in the pool.
+
+    """
+    start = default_timer()
+    materials = _materials(pair)
+    tables = []
+
+    # First every position gets the number of its moves that stay in these tables, and the best result of the ones
+    # that take a piece, as these are already known
+    for piece_count, opponent_count in materials:
+        mover_ranks = comb(24, piece_count)
+        chunk_size = max(1, mover_ranks // (workers * _CHUNKS_PER_WORKER))
+        chunks = [(directory, piece_count, opponent_count, first, min(first + chunk_size, mover_ranks))
+                  for first in range(0, mover_ranks, chunk_size)]
+
+        if executor is not None:
+            results = list(executor.map(_count_moves, *zip(*chunks)))
+        else:
+            results = [_count_moves(*chunk) for chunk in chunks]
+
+        counters = array("H")
+        wins = bytearray()
+        losses = bytearray()
+        for chunk_counters, chunk_wins, chunk_losses in results:
+            counters.frombytes(chunk_counters)
+            wins += chunk_wins
+            losses += chunk_losses
+
+        tables.append(_Table(piece_count, opponent_count, counters, wins, losses))
+    print(f"{pair[0]}v{pair[1]}: counted the moves in {default_timer() - start:.1f} seconds")
+
+    # Then go through the results by distance
+    buckets = [[] for _ in range(_MAX_DISTANCE + 2)]  # Positions found at that distance, as index * 2 + table
+    won_by_taking = [[] for _ in range(_MAX_DISTANCE + 2)]  # Positions that win at that distance by taking a piece
+
+    for t, table in enumerate(tables):
+        for index, (counter, win, loss) in enumerate(zip(table.counters, table.wins, table.losses)):
+            if win:
+                won_by_taking[win].append(index * 2 + t)
+            elif counter == 0:  # Every move takes a piece and loses, or there are no moves at all
+                table.values[index] = loss + 1
+                buckets[loss].append(index * 2 + t)
+        table.wins = None
+
+    for distance in range(_MAX_DISTANCE + 1):
+        bucket = buckets[distance]
+        for entry in won_by_taking[distance]:
+            values = tables[entry & 1].values
+            if values[entry >> 1] == 0:  # Unless it already wins faster without taking
+                values[entry >> 1] = distance + 1
+                bucket.append(entry)
+        won_by_taking[distance] = None
+
+        for entry in bucket:
+            t = entry & 1
+            p = (t + 1) % len(tables)  # The table of the predecessors
+            table = tables[p]
+            values = table.values
+            for index in _unmake_moves(tables[t], entry >> 1):
+                if values[index]:
+                    continue
+                if distance % 2 == 0:  # Lost, so whoever can move into it wins
+                    values[index] = distance + 2
+                    buckets[distance + 1].append(index * 2 + p)
+                else:
+                    table.counters[index] -= 1
+                    if table.counters[index] == 0:  # Every move goes into a won position
+                        loss = max(distance + 1, table.losses[index])
+                        values[index] = loss + 1
+                        buckets[loss].append(index * 2 + p)
+        buckets[distance] = None
+
+    assert not buckets[_MAX_DISTANCE + 1], "The distances don't fit in a byte"
+
+    for table in tables:
+        _save(directory, table)
+        draws = table.values.count(0)
+        print(f"{table.piece_count}v{table.opponent_count}: {len(table.values)} positions, {draws} draws")
+    print(f"{pair[0]}v{pair[1]}: done in {default_timer() - start:.1f} seconds")
+
+
+class _Table:
+    """A table while it's being built."""
+
+    def __init__(self, piece_count: int, opponent_count: int, counters: array, wins: bytearray, losses: bytearray):
+        self.piece_count = piece_count
+        self.opponent_count = opponent_count
+        self.counters = counters  # The moves that aren't known yet to go into a won position
+        self.wins = wins  # The distance of the fastest win by taking a piece or 0
+        self.losses = losses  # The distance of the slowest loss by taking a piece or 0
+        self.values = bytearray(len(counters))
+
+        self.other_size = _BINOMIAL[24 - piece_count][opponent_count]
+        self.mover_combinations = _combinations(24, piece_count)
+        self.other_combinations = _combinations(24 - piece_count, opponent_count)
+
+
+def _count_moves(directory: str, piece_count: int, opponent_count: int, first: int, last: int) -> tuple:
+    """Goes over the positions whose pieces of the player to move have a rank from first to last (excluded).
+
+    Runs in a worker process, if there are any.
+
+    Returns:
+        tuple: The bytes of the counters, the wins and the losses of _Table.
+
+    """
+    smaller = Tablebase(directory)
+    jumps = piece_count == 3
+    other_combinations = _combinations(24 - piece_count, opponent_count)
+
+    counters = array("H")
+    wins = bytearray()
+    losses = bytearray()
+
+    for mover_nodes in _combinations(24, piece_count)[first:last]:
+        pieces = _mask(mover_nodes)
+        free_nodes = [node for node in range(24) if not pieces & BIT[node]]
+
+        for other_nodes in other_combinations:
+            opponent_pieces = 0
+            for i in other_nodes:
+                opponent_pieces |= BIT[free_nodes[i]]
+            empty = ~(pieces | opponent_pieces) & FULL_BOARD
+
+            counter = 0
+            win = 0
+            loss = 0
+            nodes_to_take = None
+            for src in get_nodes(pieces):
+                remaining_pieces = pieces & ~BIT[src]
+                for dest in get_nodes(empty if jumps else NEIGHBOR_MASKS[src] & empty):
+                    pair1, pair2 = NODE_MILL_PAIRS[dest]
+                    if remaining_pieces & pair1 != pair1 and remaining_pieces & pair2 != pair2:
+                        counter += 1
+                        continue
+
+                    if opponent_count == 3:  # Taking a piece wins at once
+                        win = 1
+                        break
+                    if nodes_to_take is None:
+                        nodes_to_take = get_nodes_pieces_to_take(opponent_pieces)
+                    new_pieces = remaining_pieces | BIT[dest]
+                    for take in nodes_to_take:
+                        result, distance = smaller.probe(opponent_pieces & ~BIT[take], new_pieces)
+                        if result == WIN:
+                            loss = max(loss, distance + 1)
+                            continue
+                        if result == LOSS:
+                            win = min(win or _MAX_DISTANCE, distance + 1)
+                        counter += 1  # It never goes into a won position
+                if win == 1:
+                    break
+
+            counters.append(counter)
+            wins.append(win)
+            losses.append(loss)
+
+    smaller.close()
+    return counters.tobytes(), bytes(wins), bytes(losses)
+
+
+def _unmake_moves(table: _Table, index: int):
+    """Yields the index of the positions that go into the given one by a move that doesn't take a piece.
+
+    Args:
+        table (_Table): The table of the position.
+        index (int): The index of the position.
+
+    """
+    mover_rank, other_rank = divmod(index, table.other_size)
+    pieces = _mask(table.mover_combinations[mover_rank])
+    free_nodes = [node for node in range(24) if not pieces & BIT[node]]
+    opponent_pieces = 0
+    for i in table.other_combinations[other_rank]:
+        opponent_pieces |= BIT[free_nodes[i]]
+
+    # It's the opponent that moved; it can't have formed a windmill, or it would have taken a piece
+    empty = ~(pieces | opponent_pieces) & FULL_BOARD
+    jumped = table.opponent_count == 3
+    size = _BINOMIAL[24 - table.opponent_count][table.piece_count]
+    for dest in get_nodes(opponent_pieces):
+        mill1, mill2 = NODE_MILL_MASKS[dest]
+        if opponent_pieces & mill1 == mill1 or opponent_pieces & mill2 == mill2:
+            continue
+        remaining_pieces = opponent_pieces & ~BIT[dest]
+        for src in get_nodes(empty if jumped else NEIGHBOR_MASKS[dest] & empty):
+            yield _index(remaining_pieces | BIT[src], pieces, size)
+
+
+def _save(directory: str, table: _Table):
+    path = _path(directory, table.piece_count, table.opponent_count)
+    with open(path + ".tmp", "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, table.piece_count, table.opponent_count, len(table.values)))
+        file.write(table.values)
+    os.replace(path + ".tmp", path)  # So that a table is either all there or not at all
+
+
+def _dependencies(pair: tuple) -> list:
+    """
+    Returns:
+        list: The materials, larger number of pieces first, into which a piece is taken from the given one.
+
+    """
+    return [tuple(sorted((pieces, opponent_pieces - 1), reverse=True)) for pieces, opponent_pieces in _materials(pair)
+            if opponent_pieces > 3]
+
+
+def _materials(pair: tuple) -> list:
+    pieces, opponent_pieces = pair
+    if pieces == opponent_pieces:
+        return [pair]
+    return [(pieces, opponent_pieces), (opponent_pieces, pieces)]
+
+
+def _saved_materials(directory: str) -> list:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    materials = []
+    for name in names:
+        material, extension = os.path.splitext(name)
+        if extension == ".tb":
+            try:
+                materials.append(_parse_material(material))
+            except ValueError:
+                pass
+    return materials
+
+
+def _path(directory: str, piece_count: int, opponent_count: int) -> str:
+    return os.path.join(directory, f"{piece_count}v{opponent_count}.tb")
+
+
+def _index(pieces: int, opponent_pieces: int, other_size: int) -> int:
+    """
+    Args:
+        pieces (int): The mask of the pieces of the player to move.
+        opponent_pieces (int): The mask of the pieces of the other player.
+        other_size (int): The number of ways to put the pieces of the other player.
+
+    Returns:
+        int: The index of the position in its table.
+
+    """
+    rank = 0
+    k = 1
+    for node in get_nodes(pieces):
+        rank += _BINOMIAL[node][k]
+        k += 1
+
+    other_rank = 0
+    k = 1
+    for node in get_nodes(opponent_pieces):
+        other_rank += _BINOMIAL[node - popcount(pieces & BIT[node] - 1)][k]  # Skipping the nodes of the other player
+        k += 1
+
+    return rank * other_size + other_rank
+
+
+def _decode(value: int) -> tuple:
+    if value == 0:
+        return DRAW, 0
+    distance = value - 1
+    return (WIN if distance % 2 else LOSS), distance
+
+
+def _combinations(n: int, k: int) -> list:
+    """
+    Returns:
+        list: The combinations of k of the numbers below n, in the order of their rank.
+
+    """
+    return sorted(combinations(range(n), k), key=lambda combination: combination[::-1])
+
+
+def _mask(nodes: tuple) -> int:
+    mask = 0
+    for node in nodes:
+        mask |= BIT[node]
+    return mask
+
+
+def _parse_material(text: str) -> tuple:
+    pieces, _, opponent_pieces = text.partition("v")
+    return int(pieces), int(opponent_pieces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build endgame tablebases by retrograde analysis.")
+    parser.add_argument("materials", nargs="+", type=_parse_material, metavar="MvN",
+                        help="the pieces of the player to move and of the other player, like 3v3 or 4v3")
+    parser.add_argument("--directory", default=DIRECTORY, help="where to save the tables")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="the number of processes")
+    args = parser.parse_args()
+
+    generate(args.materials, args.directory, args.workers)
+
+
+if __name__ == "__main__":
+    main()
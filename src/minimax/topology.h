@@ -0,0 +1,52 @@
+/* Generated by src/topology.py, don't edit by hand. */
+
+#define NODE_COUNT 24
+#define MILL_COUNT 16
+
+static const int NEIGHBOR_COUNTS[NODE_COUNT] = {2, 3, 2, 2, 4, 2, 2, 3, 2, 3, 4, 3, 3, 4, 3, 2, 3, 2, 2, 4, 2, 2, 3, 2};
+
+static const int NEIGHBORS[NODE_COUNT][4] = {
+	{1, 9, -1, -1},
+	{0, 2, 4, -1},
+	{1, 14, -1, -1},
+	{4, 10, -1, -1},
+	{1, 3, 5, 7},
+	{4, 13, -1, -1},
+	{7, 11, -1, -1},
+	{4, 6, 8, -1},
+	{7, 12, -1, -1},
+	{0, 10, 21, -1},
+	{3, 9, 11, 18},
+	{6, 10, 15, -1},
+	{8, 13, 17, -1},
+	{5, 12, 14, 20},
+	{2, 13, 23, -1},
+	{11, 16, -1, -1},
+	{15, 17, 19, -1},
+	{12, 16, -1, -1},
+	{10, 19, -1, -1},
+	{16, 18, 20, 22},
+	{13, 19, -1, -1},
+	{9, 22, -1, -1},
+	{19, 21, 23, -1},
+	{14, 22, -1, -1},
+};
+
+static const int MILLS[MILL_COUNT][3] = {
+	{0, 1, 2},
+	{0, 9, 21},
+	{21, 22, 23},
+	{23, 14, 2},
+	{3, 4, 5},
+	{3, 10, 18},
+	{18, 19, 20},
+	{20, 13, 5},
+	{6, 7, 8},
+	{6, 11, 15},
+	{15, 16, 17},
+	{17, 12, 8},
+	{1, 4, 7},
+	{9, 10, 11},
+	{22, 19, 16},
+	{12, 13, 14},
+};
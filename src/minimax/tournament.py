@@ -0,0 +1,355 @@
+"""Plays engine configurations against each other, without any windows, to measure if a change is an improvement.
+Run it from the game folder with:
+
+    python -m src.minimax.tournament engines.json --openings 50 --workers 4 --output results.json
+    python -m src.minimax.tournament engines.json --sprt 0 10      # Stop once it's clear if B is 10 Elo better
+
+The JSON file is a list of configurations, each with a name and what it changes in a new Engine:
+
+    [
+        {"name": "base"},
+        {"name": "deeper", "search_limits": {"max_depth_phase2": 4}, "weights": {"mill": 25}, "use_book": false}
+    ]
+
+Every pair of configurations plays every opening twice, once with each color. The openings are random legal moves from
+the empty board, the same for every pair. The games follow the rules of GameState, and an engine that makes an illegal
+move loses. The games are spread over a pool of processes, each with its own engines.
+
+For every pair, the results are the wins, draws and losses of the second configuration against the first, its Elo
+difference with the 95% error and, with exactly two configurations, the result of a sequential probability ratio test,
+which can stop the match early. For every configuration, there are also the average time and nodes per move.
+
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import combinations
+from math import log, log10, sqrt
+from random import Random
+from timeit import default_timer
+from typing import Optional
+
+from src.game.game_state import GameState
+from src.minimax.minimax import Engine, NO_PIECE, WHITE, BLACK, logger
+from src.constants import PLAYER1, PHASE2, TIE as NO_WINNER
+
+WHITE_WINS = "1-0"
+BLACK_WINS = "0-1"
+TIE = "1/2-1/2"
+
+_CONFIGURATION_KEYS = ("name", "weights", "search_limits", "use_move_ordering", "use_book")
+
+_SWAPPED_COLORS = {NO_PIECE: NO_PIECE, WHITE: BLACK, BLACK: WHITE}
+
+
+def run(configurations: list, openings: int, opening_plies: int, seed: int, workers: int,
+        sprt: Optional[tuple] = None) -> dict:
+    """
+    Args:
+        configurations (list): The configurations of the engines, as in the JSON file.
+        openings (int): How many openings every pair plays, each twice.
+        opening_plies (int): How many random plies every opening has.
+        seed (int): For the openings.
+        workers (int): The number of processes that play the games.
+        sprt (tuple): The Elo of the null and the alternative hypothesis and the alpha and beta of the test, or
+            None to play every game; only with two configurations.
+
+    Returns:
+        dict: The results, as saved in JSON.
+
+    """
+    names = [configuration["name"] for configuration in configurations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"The names of the configurations must be different: {names}")
+    for configuration in configurations:
+        for key in configuration:
+            if key not in _CONFIGURATION_KEYS:
+                raise ValueError(f"Unknown key {key!r} in the configuration {configuration['name']}")
+    if sprt is not None and len(configurations) != 2:
+        raise ValueError("The test needs exactly two configurations")
+
+    random = Random(seed)
+    opening_moves = [_make_opening(random, opening_plies) for _ in range(openings)]
+
+    games = []
+    for first, second in combinations(configurations, 2):
+        for moves in opening_moves:
+            games.append((first, second, moves))
+            games.append((second, first, moves))
+
+    pairs = {(first["name"], second["name"]): _PairResults() for first, second in combinations(configurations, 2)}
+    engines = {name: {"moves": 0, "seconds": 0.0, "searched_moves": 0, "nodes": 0} for name in names}
+    played = []
+    sprt_result = None
+
+    start = default_timer()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, white, black, moves) for white, black, moves in games]
+        for future in as_completed(futures):
+            game = future.result()
+            played.append(game)
+
+            for color in ("white", "black"):
+                totals = engines[game[color]]
+                for key in totals:
+                    totals[key] += game["engines"][color][key]
+
+            for (first, second), results in pairs.items():
+                if {game["white"], game["black"]} == {first, second}:
+                    results.add(game, second)
+
+            print(f"{len(played)}/{len(games)}: {game['white']} - {game['black']} {game['result']} "
+                  f"({game['reason']}, {game['plies']} plies)")
+
+            if sprt is not None:
+                sprt_result = next(iter(pairs.values())).sprt(*sprt)
+                if sprt_result["decision"] is not None:
+                    print(f"The test accepted {sprt_result['decision']} after {len(played)} games")
+                    for other in futures:
+                        other.cancel()
+                    break
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "configurations": configurations,
+        "openings": openings,
+        "opening_plies": opening_plies,
+        "seed": seed,
+        "seconds": default_timer() - start,
+        "pairs": [],
+        "engines": {},
+        "games": played
+    }
+
+    for (first, second), pair_results in pairs.items():
+        results["pairs"].append({"first": first, "second": second, **pair_results.to_dict()})
+    if sprt_result is not None:
+        results["pairs"][0]["sprt"] = sprt_result
+
+    for name, totals in engines.items():
+        results["engines"][name] = {
+            "moves": totals["moves"],
+            "seconds_per_move": totals["seconds"] / totals["moves"] if totals["moves"] else None,
+            "nodes_per_move": totals["nodes"] / totals["searched_moves"] if totals["searched_moves"] else None
+        }
+
+    return results
+
+
+def play_game(white_configuration: dict, black_configuration: dict, opening: list) -> dict:
+    """Plays one game; runs in a worker process.
+
+    Args:
+        white_configuration (dict): The engine that plays WHITE.
+        black_configuration (dict): The engine that plays BLACK.
+        opening (list): The moves with which the game starts, WHITE's first.
+
+    Returns:
+        dict: The game: who played, the result and why, the moves and the time and nodes of the engines.
+
+    """
+    logger.setLevel(logging.WARNING)  # The stats of every search would be too much
+
+    engines = (_make_engine(white_configuration), _make_engine(black_configuration))
+    totals = ({"moves": 0, "seconds": 0.0, "searched_moves": 0, "nodes": 0},
+              {"moves": 0, "seconds": 0.0, "searched_moves": 0, "nodes": 0})
+
+    game = GameState()
+    for move in opening:
+        game.apply(move)
+    moves = list(opening)
+    illegal_move = None
+
+    try:
+        while not game.game_over:
+            side = game.side  # 0 for WHITE
+            engine = engines[side]
+
+            state = game.get_current_state()
+            if side == 0:  # The engines play BLACK, so swap the colors
+                state = [_SWAPPED_COLORS[node] for node in state]
+
+            start = default_timer()
+            if game.phase == PHASE2:
+                move = engine.move_piece(state)
+            else:
+                move = (-1, *engine.place_piece_at(state))
+            totals[side]["seconds"] += default_timer() - start
+            totals[side]["moves"] += 1
+            if engine.stats is not None:
+                totals[side]["searched_moves"] += 1
+                totals[side]["nodes"] += engine.stats.nodes
+
+            moves.append(move)
+            if not game.is_legal(move):
+                illegal_move = move
+                break
+            game.apply(move)
+    finally:
+        for engine in engines:
+            engine.close()
+
+    if illegal_move is not None:  # The player to move loses
+        result = BLACK_WINS if game.side == 0 else WHITE_WINS
+        reason = f"illegal move {illegal_move}"
+    else:
+        result = TIE if game.winner == NO_WINNER else WHITE_WINS if game.winner == PLAYER1 else BLACK_WINS
+        reason = game.reason
+
+    return {
+        "white": white_configuration["name"],
+        "black": black_configuration["name"],
+        "opening": list(opening),
+        "result": result,
+        "reason": reason,
+        "plies": len(moves),
+        "moves": moves,
+        "engines": {"white": totals[0], "black": totals[1]}
+    }
+
+
+class _PairResults:
+    """The results of the games between two configurations, from the point of view of the second one."""
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, game: dict, name: str):
+        if game["result"] == TIE:
+            self.draws += 1
+        elif (game["result"] == WHITE_WINS) == (game["white"] == name):
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def elo(self) -> tuple:
+        """
+        Returns:
+            tuple: The Elo difference and the half-width of its 95% confidence interval; None for what can't be
+                told yet, as when every game was won.
+
+        """
+        score = self.score
+        if not 0 < score < 1:
+            return None, None
+
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / \
+            self.games
+        error = 1.96 * sqrt(variance / self.games)
+        low, high = score - error, score + error
+        if low <= 0 or high >= 1:
+            return _elo(score), None
+        return _elo(score), (_elo(high) - _elo(low)) / 2
+
+    def sprt(self, elo0: float, elo1: float, alpha: float, beta: float) -> dict:
+        """A sequential probability ratio test of whether the second configuration is elo0 or elo1 stronger, with
+        the log-likelihood ratio approximated from the mean and variance of the scores.
+
+        Returns:
+            dict: The log-likelihood ratio, its bounds and the hypothesis accepted ("H0", "H1" or None).
+
+        """
+        lower = log(beta / (1 - alpha))
+        upper = log((1 - beta) / alpha)
+        llr = 0.0
+
+        score = self.score
+        if self.games and 0 < score < 1:
+            variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 +
+                        self.losses * score ** 2) / self.games
+            if variance > 0:
+                score0 = 1 / (1 + 10 ** (-elo0 / 400))
+                score1 = 1 / (1 + 10 ** (-elo1 / 400))
+                llr = (score1 - score0) * (2 * score - score0 - score1) / (2 * variance / self.games)
+
+        decision = "H0" if llr <= lower else "H1" if llr >= upper else None
+        return {"elo0": elo0, "elo1": elo1, "alpha": alpha, "beta": beta, "llr": llr, "lower_bound": lower,
+                "upper_bound": upper, "decision": decision}
+
+    def to_dict(self) -> dict:
+        elo, error = self.elo()
+        return {"games": self.games, "wins": self.wins, "draws": self.draws, "losses": self.losses,
+                "score": self.score, "elo": elo, "elo_error": error}
+
+
+def _elo(score: float) -> float:
+    return -400 * log10(1 / score - 1) + 0.0  # Adding 0.0 turns the -0.0 of an even score into 0.0
+
+
+def _make_engine(configuration: dict) -> Engine:
+    engine = Engine()
+    engine.weights.update(configuration.get("weights", {}))
+    engine.search_limits.update(configuration.get("search_limits", {}))
+    engine.search_limits["workers"] = 1  # The games are already played in parallel
+    engine.use_move_ordering = configuration.get("use_move_ordering", engine.use_move_ordering)
+    engine.use_book = configuration.get("use_book", engine.use_book)
+    return engine
+
+
+def _make_opening(random: Random, plies: int) -> list:
+    """
+    Returns:
+        list: Random legal moves from the empty board, after which the game isn't over.
+
+    """
+    while True:
+        game = GameState()
+        for _ in range(plies):
+            game.apply(random.choice(game.legal_moves()))
+            if game.game_over:
+                break
+        else:
+            return game.moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine configurations against each other.")
+    parser.add_argument("configurations", help="a JSON file with the list of configurations")
+    parser.add_argument("--openings", type=int, default=20, help="how many openings every pair plays, each twice")
+    parser.add_argument("--opening-plies", type=int, default=4, help="how many random plies every opening has")
+    parser.add_argument("--seed", type=int, default=0, help="for the openings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="the number of processes")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"),
+                        help="stop once a test tells if the second configuration is ELO0 or ELO1 stronger")
+    parser.add_argument("--alpha", type=float, default=0.05, help="the false positive rate of the test")
+    parser.add_argument("--beta", type=float, default=0.05, help="the false negative rate of the test")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.configurations) as file:
+        configurations = json.load(file)
+    sprt = None if args.sprt is None else (*args.sprt, args.alpha, args.beta)
+
+    results = run(configurations, args.openings, args.opening_plies, args.seed, args.workers, sprt)
+
+    for pair in results["pairs"]:
+        elo = "?" if pair["elo"] is None else f"{pair['elo']:+.1f}"
+        error = "?" if pair["elo_error"] is None else f"{pair['elo_error']:.1f}"
+        print(f"{pair['second']} against {pair['first']}: +{pair['wins']} ={pair['draws']} -{pair['losses']}, "
+              f"Elo {elo} +- {error}")
+    for name, engine in results["engines"].items():
+        seconds = engine["seconds_per_move"] or 0.0
+        nodes = engine["nodes_per_move"] or 0.0
+        print(f"{name}: {engine['moves']} moves, {seconds:.3f} seconds and {nodes:.0f} nodes per move")
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
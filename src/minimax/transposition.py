@@ -0,0 +1,136 @@
+from random import Random
+from typing import NamedTuple, Optional
+
+# Zobrist keys: one random 64-bit number for every (color, node), one for WHITE to move and one for the second phase.
+# The hash of a position is the XOR of the keys of everything in it, so it can be updated incrementally with a
+# couple of XORs every time a piece is put, moved or taken.
+
+_random = Random(0x5EED)
+
+ZOBRIST_WHITE = tuple(_random.getrandbits(64) for _ in range(24))
+ZOBRIST_BLACK = tuple(_random.getrandbits(64) for _ in range(24))
+ZOBRIST_TURN = _random.getrandbits(64)  # XOR-ed in when it's WHITE's turn
+ZOBRIST_PHASE2 = _random.getrandbits(64)
+
+EXACT = 0
+LOWER_BOUND = 1  # The score is at least this (fail high)
+UPPER_BOUND = 2  # The score is at most this (fail low)
+
+_BYTES_PER_ENTRY = 160  # Rough size of one filled slot in CPython (the slot pointer, the tuple and its items)
+
+
+class Entry(NamedTuple):
+    key: int
+    depth: int
+    bound: int
+    score: float
+    move: Optional[int]  # Packed like the moves of the search
+    generation: int
+
+
+def zobrist_hash(white: int, black: int, white_to_move: bool, phase2: bool) -> int:
+    """
+    Args:
+        white (int): The mask of the WHITE pieces.
+        black (int): The mask of the BLACK pieces.
+        white_to_move (bool): If it's WHITE's turn.
+        phase2 (bool): If the pieces are moved instead of put.
+
+    Returns:
+        int: The hash of the position.
+
+    """
+    key = 0
+    for i in range(24):
+        if white >> i & 1:
+            key ^= ZOBRIST_WHITE[i]
+        elif black >> i & 1:
+            key ^= ZOBRIST_BLACK[i]
+    if white_to_move:
+        key ^= ZOBRIST_TURN
+    if phase2:
+        key ^= ZOBRIST_PHASE2
+
+    return key
+
+
+class TranspositionTable:
+    """Fixed size hash table of search results, indexed by the Zobrist hash of the positions.
+
+    Every slot holds one entry. A new entry replaces the old one if the old one is from a previous search
+    (an older generation) or if it was not searched deeper than the new one (depth-preferred replacement).
+
+    """
+
+    def __init__(self, entries: Optional[int] = None, megabytes: Optional[float] = None):
+        """
+        Args:
+            entries (int): The maximum number of entries.
+            megabytes (float): The approximate maximum memory to use; used if entries is not given.
+
+        """
+        if entries is None:
+            if megabytes is None:
+                raise ValueError("Either entries or megabytes must be given")
+            entries = int(megabytes * 1024 * 1024) // _BYTES_PER_ENTRY
+        if entries < 1:
+            raise ValueError(f"The table must have at least one entry, not {entries}")
+
+        self.size = entries
+        self.generation = 0
+        self._slots = [None] * entries
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def probe(self, key: int) -> Optional[Entry]:
+        self.probes += 1
+        entry = self._slots[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: float, move: Optional[int]):
+        """
+        Args:
+            key (int): The Zobrist hash of the position.
+            depth (int): How deep the position was searched.
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            score (float): The evaluation found.
+            move (int): The best move found, packed like the moves of the search, or None if there is none.
+
+        """
+        index = key % self.size
+        old = self._slots[index]
+        if old is not None:
+            if old.key != key and old.generation == self.generation and old.depth > depth:
+                return  # Keep the deeper entry
+            if old.key != key:
+                self.replacements += 1
+        self._slots[index] = Entry(key, depth, bound, score, move, self.generation)
+        self.stores += 1
+
+    def new_search(self):
+        """Mark the entries stored so far as old, so that they are the first to be replaced."""
+        self.generation += 1
+
+    def clear(self):
+        self._slots = [None] * self.size
+        self.generation = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
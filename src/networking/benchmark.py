@@ -0,0 +1,136 @@
+"""Throughput of the binary protocol against pickle, which the messages were sent with before.
+
+Run it from the game folder with:
+
+    python -m src.networking.benchmark
+    python -m src.networking.benchmark --messages 200000 --output results.json
+
+Pickle has no framing, so its decoding is measured one message at a time from separate bytes, which is the best case
+for it; the protocol is also measured decoding a whole stream that arrives in chunks that split the frames.
+
+"""
+
+import argparse
+import json
+import pickle
+import platform
+from datetime import datetime
+from timeit import default_timer
+
+from src.networking.message import Message
+from src.networking.protocol import Decoder, encode
+from src.constants import PLACE_PIECE, MOVE_PIECE, REMOVE_PIECE
+
+CHUNK_SIZE = 512  # The size of the chunks of the stream, like the recv size of the old protocol
+
+
+def make_messages(count: int) -> list:
+    """
+    Returns:
+        list: Messages like the ones of a game, from both clients.
+
+    """
+    messages = []
+    for i in range(count):
+        client_id = i % 2
+        node = i % 24
+        if i % 3 == 0:
+            messages.append(Message(client_id, PLACE_PIECE, (node,), i // 2))
+        elif i % 3 == 1:
+            messages.append(Message(client_id, MOVE_PIECE, (node, (node + 1) % 24), i // 2))
+        else:
+            messages.append(Message(client_id, REMOVE_PIECE, (node,), i // 2))
+    return messages
+
+
+def run(count: int, repeat: int) -> dict:
+    """
+    Args:
+        count (int): How many messages to encode and decode for one measurement.
+        repeat (int): How many times to measure everything; the fastest time is kept.
+
+    Returns:
+        dict: The results, as saved in JSON.
+
+    """
+    messages = make_messages(count)
+    frames = [encode(message) for message in messages]
+    pickles = [pickle.dumps(message) for message in messages]
+    stream = b"".join(frames)
+    chunks = [stream[i:i + CHUNK_SIZE] for i in range(0, len(stream), CHUNK_SIZE)]
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "messages": count,
+        "bytes_per_message": {
+            "protocol": len(stream) / count,
+            "pickle": sum(map(len, pickles)) / count
+        },
+        "seconds": {}
+    }
+    seconds = results["seconds"]
+
+    seconds["encode/protocol"] = _best_of(repeat, lambda: [encode(message) for message in messages])
+    seconds["encode/pickle"] = _best_of(repeat, lambda: [pickle.dumps(message) for message in messages])
+
+    def decode_frames():
+        decoder = Decoder()
+        return [decoder.feed(frame) for frame in frames]
+
+    def decode_stream():
+        decoder = Decoder()
+        decoded = []
+        for chunk in chunks:
+            decoded.extend(decoder.feed(chunk))
+        return decoded
+
+    seconds["decode/protocol"] = _best_of(repeat, decode_frames)
+    seconds["decode/protocol stream"] = _best_of(repeat, decode_stream)
+    seconds["decode/pickle"] = _best_of(repeat, lambda: [pickle.loads(serialized) for serialized in pickles])
+
+    if decode_stream() != messages:
+        raise AssertionError("The decoded stream isn't the messages that were encoded")
+
+    return results
+
+
+def print_results(results: dict):
+    count = results["messages"]
+    print(f"{count} messages, {results['bytes_per_message']['protocol']:.1f} bytes each with the protocol and "
+          f"{results['bytes_per_message']['pickle']:.1f} with pickle")
+    for key, seconds in results["seconds"].items():
+        print(f"    {key:24} {count / seconds:>14,.0f} messages/s    {seconds / count * 1_000_000:.3f} us each")
+
+    for operation in ("encode", "decode"):
+        speedup = results["seconds"][f"{operation}/pickle"] / results["seconds"][f"{operation}/protocol"]
+        print(f"The protocol {operation}s {speedup:.1f} times as fast as pickle")
+
+
+def _best_of(repeat: int, function) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = default_timer()
+        function()
+        best = min(best, default_timer() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the throughput of the binary protocol and pickle.")
+    parser.add_argument("--messages", type=int, default=100_000, help="how many messages to encode and decode")
+    parser.add_argument("--repeat", type=int, default=5, help="measure everything this many times and keep the best")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.messages, args.repeat)
+    print_results(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import socket
-import pickle
 
 from src.networking.message import Message
+from src.networking.protocol import Receiver, encode
+from src.constants import CONNECT, JOIN_ROOM, ROOM_NOT_FOUND
 from src.log import get_logger
 
 logger = get_logger(__name__)
@@ -15,6 +16,8 @@ class Client:
         self.closed = False
 
         self._socket = None
+        self._receiver = None
+        self._sequence = 0
 
     def __del__(self):
         print("Client object destroyed")
@@ -38,20 +41,47 @@ class Client:
             self._socket.close()
             raise
 
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Send the moves right away
         logger.info(f"Connected to ({ip}, {port})")
 
-        self._socket.send(str(self.id).encode())  # fail
+        self._receiver = Receiver(self._socket)
+        self.send_event(CONNECT)  # fail
+
+    def join_room(self, code: str = None) -> str:
+        """
+        For a RoomServer only. Takes the seat the server gives as the id of the client.
+
+        Args:
+            code (str): The code of the room of the other player, or None to make a new room.
+
+        Returns:
+            str: The code of the room.
+
+        Raises:
+            LookupError: If there's no room with that code and a free seat.
+
+        """
+        self.send_event(JOIN_ROOM, *(() if code is None else (int(digit) for digit in code)))
+        message = self.receive_event()  # fail
+        if message.action == ROOM_NOT_FOUND:
+            raise LookupError(f"There's no room {code} with a free seat")
+
+        self.id = message.client_id
+        return "".join(str(digit) for digit in message.args)
 
     def send_event(self, event: int, *args):
-        message = Message(self.id, event, args)
-        serialized_message = pickle.dumps(message)
-        self._socket.send(serialized_message)  # fail
+        message = Message(self.id, event, args, self._sequence)
+        self._socket.sendall(encode(message))  # fail
+        self._sequence += 1
 
     def receive_event(self) -> Message:
-        serialized_message = self._socket.recv(512)  # fail
-        message = pickle.loads(serialized_message)  # fail
+        """
+        Raises:
+            EOFError: If the connection was closed.
+            ProtocolError: If what was received isn't a message.
 
-        return message
+        """
+        return self._receiver.receive()  # fail
 
     def close(self):
         """
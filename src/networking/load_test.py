@@ -0,0 +1,309 @@
+"""Load test of the room server on one machine, without any windows.
+
+Starts a RoomServer in its own process and connects pairs of simulated clients to it, which all play scripted games
+at the same time: the moves are random but legal (the server checks them), and every pair sends one move at the given
+rate, which the other client of the pair waits for before answering. Every game starts with NEW_GAME, as the scripted
+games may stop before they are over. Run it from the game folder with:
+
+    python -m src.networking.load_test --pairs 500 --move-rate 5
+    python -m src.networking.load_test --pairs 50 --max-p99 50 --output results.json    # For CI
+
+It reports how fast the connections were made (every client connects and joins its room), how many messages the
+server relayed per second, the latency of the relays (from the send of one client to the receive of the other, both
+in this process) and the peak memory and the CPU time of the server process. It reads those from /proc, so it only
+runs on Linux. With --max-p99, it exits with status 1 if the p99 latency is higher or if a game went wrong.
+
+Server only holds one game, so it isn't load tested; its relay latency is measured by tests/test_relay_latency.py.
+
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from random import Random
+from timeit import default_timer
+
+from src.networking.message import Message
+from src.networking.protocol import Decoder, encode
+from src.game.game_state import GameState
+from src.constants import *
+
+CONNECTIONS_AT_ONCE = 64  # Connecting all the clients at once would overflow the listen backlog of the server
+READ_SIZE = 4096
+SAMPLE_INTERVAL = 0.1  # Seconds between the samples of the memory of the server
+
+
+class _SimulatedClient:
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, sent_at: dict):
+        self.reader = reader
+        self.writer = writer
+        self.decoder = Decoder()
+        self.messages = deque()
+        self.sequence = 0
+        self.sent_at = sent_at  # (client, sequence) to when it was sent, shared by the pair
+
+    @classmethod
+    async def connect(cls, port: int, sent_at: dict):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer, sent_at)
+
+    def send(self, action: int, *args):
+        self.sent_at[(id(self), self.sequence)] = default_timer()
+        self.writer.write(encode(Message(0, action, args, self.sequence)))
+        self.sequence += 1
+
+    async def receive(self) -> Message:
+        while not self.messages:
+            data = await self.reader.read(READ_SIZE)
+            if not data:
+                raise EOFError("The server closed the connection")
+            self.messages.extend(self.decoder.feed(data))
+        return self.messages.popleft()
+
+    def close(self):
+        self.writer.close()
+
+
+def make_scripts(count: int, max_plies: int, seed: int) -> list:
+    """
+    Returns:
+        list: Games of random legal moves, each a list of moves, and every move a list of (action, args) to send.
+
+    """
+    random = Random(seed)
+    scripts = []
+    for _ in range(count):
+        game = GameState()
+        while not game.game_over and game.plies < max_plies:
+            game.apply(random.choice(game.legal_moves()))
+
+        script = []
+        for src, dest, take in game.moves:
+            messages = [(PLACE_PIECE, (dest,))] if src == -1 else [(MOVE_PIECE, (src, dest))]
+            if take != -1:
+                messages.append((REMOVE_PIECE, (take,)))
+            script.append(messages)
+        scripts.append(script)
+
+    return scripts
+
+
+def run(pairs: int, move_rate: float, games: int, max_plies: int, seed: int, port: int) -> dict:
+    """
+    Args:
+        pairs (int): How many pairs of clients play at the same time.
+        move_rate (float): The moves per second of every pair.
+        games (int): How many games every pair plays.
+        max_plies (int): Where the scripted games stop, if they aren't over yet.
+        seed (int): For the moves.
+        port (int): For the server.
+
+    Returns:
+        dict: The results, as saved in JSON.
+
+    """
+    scripts = make_scripts(min(pairs * games, 64), max_plies, seed)
+
+    # -O turns off the logging of the server, which would otherwise log every room
+    server = subprocess.Popen([sys.executable, "-O", "-m", "src.networking.room_server", "--ip", "127.0.0.1",
+                               "--port", str(port)])
+    try:
+        _wait_for_server(port, server)
+        results = asyncio.run(_run_clients(server.pid, pairs, move_rate, games, scripts, port))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "pairs": pairs,
+        "move_rate": move_rate,
+        "games": games,
+        **results
+    }
+    return results
+
+
+async def _run_clients(server_pid: int, pairs: int, move_rate: float, games: int, scripts: list, port: int) -> dict:
+    connection_slots = asyncio.Semaphore(CONNECTIONS_AT_ONCE)
+    connected = asyncio.Event()
+    latencies = []
+    counts = {"connected_pairs": 0, "messages": 0, "moves": 0, "errors": 0}
+
+    peak_rss = _get_rss(server_pid)
+    cpu_start = _get_cpu_seconds(server_pid)
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, _get_rss(server_pid))
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    async def play(pair: int):
+        sent_at = {}
+        clients = []
+        try:
+            async with connection_slots:
+                host = await _SimulatedClient.connect(port, sent_at)
+                clients.append(host)
+                host.send(CONNECT)
+                host.send(JOIN_ROOM)
+                code = (await host.receive()).args
+
+                guest = await _SimulatedClient.connect(port, sent_at)
+                clients.append(guest)
+                guest.send(CONNECT)
+                guest.send(JOIN_ROOM, *code)
+                if (await guest.receive()).action != JOIN_ROOM or (await host.receive()).action != JOIN_ROOM:
+                    raise RuntimeError("Couldn't join the room")
+
+            counts["connected_pairs"] += 1
+            if counts["connected_pairs"] == pairs:
+                connected.set()
+            await connected.wait()  # Play only once everyone is connected
+
+            for game in range(games):
+                # The scripted games stop at max_plies, so the server has to be told that a new one starts
+                host.send(NEW_GAME)
+                message = await guest.receive()
+                latencies.append(default_timer() - sent_at.pop((id(host), message.sequence)))
+                if message.action != NEW_GAME:
+                    raise RuntimeError(f"Expected {NEW_GAME}, but got {message}")
+                counts["messages"] += 1
+
+                script = scripts[(pair * games + game) % len(scripts)]
+                for ply, messages in enumerate(script):
+                    sender, receiver = (host, guest) if ply % 2 == 0 else (guest, host)
+                    for action, args in messages:
+                        sender.send(action, *args)
+                    for action, args in messages:
+                        message = await receiver.receive()
+                        latencies.append(default_timer() - sent_at.pop((id(sender), message.sequence)))
+                        if message.action != action or message.args != args:
+                            raise RuntimeError(f"Expected {action} {args}, but got {message}")
+                    counts["messages"] += len(messages)
+                    counts["moves"] += 1
+                    await asyncio.sleep(1 / move_rate)
+        except (OSError, EOFError, RuntimeError, KeyError):
+            counts["errors"] += 1
+            connected.set()  # Don't keep the others waiting for this pair
+        finally:
+            for client in clients:
+                client.close()
+
+    sampler = asyncio.create_task(sample_memory())
+
+    start = default_timer()
+    players = [asyncio.create_task(play(pair)) for pair in range(pairs)]
+    await connected.wait()
+    connect_seconds = default_timer() - start
+
+    start = default_timer()
+    await asyncio.gather(*players)
+    play_seconds = default_timer() - start
+
+    sampler.cancel()
+    cpu_seconds = _get_cpu_seconds(server_pid) - cpu_start
+
+    latencies.sort()
+    return {
+        "connections_per_second": 2 * counts["connected_pairs"] / connect_seconds,
+        "messages": counts["messages"],
+        "messages_per_second": counts["messages"] / play_seconds,
+        "moves": counts["moves"],
+        "errors": counts["errors"],
+        "latency_ms": {name: _percentile(latencies, fraction) * 1000 for name, fraction in
+                       (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+        "server": {
+            "peak_rss_mb": peak_rss / 1024 / 1024,
+            "cpu_seconds": cpu_seconds,
+            "cpu_percent": 100 * cpu_seconds / (connect_seconds + play_seconds)
+        },
+        "seconds": {"connect": connect_seconds, "play": play_seconds}
+    }
+
+
+def print_results(results: dict):
+    latency = results["latency_ms"]
+    server = results["server"]
+    print(f"{results['pairs']} pairs at {results['move_rate']} moves per second, {results['games']} games each")
+    print(f"Connections: {results['connections_per_second']:,.0f} per second")
+    print(f"Relayed {results['messages']} messages, {results['messages_per_second']:,.0f} per second, "
+          f"in {results['moves']} moves; {results['errors']} pairs failed")
+    print(f"Latency: p50 {latency['p50']:.3f} ms, p90 {latency['p90']:.3f} ms, p99 {latency['p99']:.3f} ms, "
+          f"max {latency['max']:.3f} ms")
+    print(f"Server: peak RSS {server['peak_rss_mb']:.1f} MB, {server['cpu_seconds']:.2f} CPU seconds "
+          f"({server['cpu_percent']:.0f}% of one core)")
+
+
+def _wait_for_server(port: int, server: subprocess.Popen, timeout: float = 10.0):
+    deadline = default_timer() + timeout
+    while True:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with status {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return  # The server drops this connection once it sees it's not a client
+        except OSError:
+            if default_timer() > deadline:
+                raise
+        time.sleep(0.05)
+
+
+def _get_rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _get_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()  # The name of the process can have spaces
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # User and system time
+
+
+def _percentile(latencies: list, fraction: float) -> float:
+    if not latencies:
+        return 0.0
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the room server with simulated games on this machine.")
+    parser.add_argument("--pairs", type=int, default=100, help="how many pairs of clients play at the same time")
+    parser.add_argument("--move-rate", type=float, default=10.0, help="the moves per second of every pair")
+    parser.add_argument("--games", type=int, default=1, help="how many games every pair plays")
+    parser.add_argument("--max-plies", type=int, default=60, help="where the scripted games stop")
+    parser.add_argument("--seed", type=int, default=0, help="for the moves")
+    parser.add_argument("--port", type=int, default=5551, help="the port of the server")
+    parser.add_argument("--max-p99", type=float, metavar="MS", help="fail if the p99 latency is higher than this")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.pairs, args.move_rate, args.games, args.max_plies, args.seed, args.port)
+    print_results(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if args.max_p99 is not None and (results["latency_ms"]["p99"] > args.max_p99 or results["errors"] > 0):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
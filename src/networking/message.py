@@ -6,3 +6,4 @@ class Message:
     client_id: int
     action: int
     args: tuple
+    sequence: int = 0  # The number of the message among the ones of its client
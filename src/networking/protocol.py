@@ -0,0 +1,116 @@
+"""The wire format of the messages between the clients and the server.
+
+Every message is a frame of a length and then what it says, all big-endian:
+
+    length      uint16  The size of the rest of the frame
+    action      int8    One of the actions in src.constants (CLOSE_CONNECTION is -1)
+    client id   uint8
+    sequence    uint32  Counts the messages of a client, starting from 0
+    args        int8    Node ids (or -1); as many as fit in the length
+
+TCP is a stream, so a recv can return part of a frame or many frames at once; Decoder keeps what's left of a frame
+until the rest of it arrives. Nothing received is ever executed, unlike with pickle: a frame that doesn't fit the
+format raises ProtocolError and the connection should be closed.
+
+"""
+
+import socket
+import struct
+from collections import deque
+
+from src.networking.message import Message
+
+MAX_ARGS = 8
+
+_LENGTH = struct.Struct("!H")
+_FIELDS_SIZE = 6  # Action, client id and sequence
+_FRAMES = tuple(struct.Struct(f"!HbBI{count}b") for count in range(MAX_ARGS + 1))  # By the number of args
+
+_RECEIVE_SIZE = 4096
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode(message: Message) -> bytes:
+    """
+    Returns:
+        bytes: The frame of the message.
+
+    """
+    if len(message.args) > MAX_ARGS:
+        raise ProtocolError(f"A message can have at most {MAX_ARGS} args, not {len(message.args)}")
+    try:
+        return _FRAMES[len(message.args)].pack(_FIELDS_SIZE + len(message.args), message.action, message.client_id,
+                                               message.sequence, *message.args)
+    except struct.error as error:
+        raise ProtocolError(f"Can't encode {message}: {error}") from None
+
+
+class Decoder:
+    """Turns the bytes received from a stream back into messages."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """
+        Args:
+            data (bytes): What was received, which may end in the middle of a frame.
+
+        Returns:
+            list: The messages whose frames are now complete, in order.
+
+        """
+        if self._buffer:
+            self._buffer += data
+            buffer = self._buffer
+        else:
+            buffer = data  # Most of the time there's nothing left from before, so don't copy what arrived
+
+        messages = []
+        offset = 0
+        while len(buffer) - offset >= _LENGTH.size:
+            length, = _LENGTH.unpack_from(buffer, offset)
+            if not _FIELDS_SIZE <= length <= _FIELDS_SIZE + MAX_ARGS:
+                raise ProtocolError(f"Invalid frame length {length}")
+            if len(buffer) - offset < _LENGTH.size + length:
+                break  # The rest of the frame hasn't arrived yet
+
+            fields = _FRAMES[length - _FIELDS_SIZE].unpack_from(buffer, offset)  # Length, action, id, sequence, args
+            messages.append(Message(fields[2], fields[1], fields[4:], fields[3]))
+            offset += _LENGTH.size + length
+
+        self._buffer = bytearray(buffer[offset:])
+        return messages
+
+    @property
+    def pending(self) -> int:
+        """The number of bytes of a frame that isn't complete yet."""
+        return len(self._buffer)
+
+
+class Receiver:
+    """Receives the messages from a socket one at a time."""
+
+    def __init__(self, sock: socket.socket):
+        self._socket = sock
+        self._decoder = Decoder()
+        self._messages = deque()
+
+    def receive(self) -> Message:
+        """Blocks until a whole message arrives.
+
+        Raises:
+            EOFError: If the connection was closed.
+            ProtocolError: If what arrived isn't a message.
+
+        """
+        while not self._messages:
+            data = self._socket.recv(_RECEIVE_SIZE)  # fail
+            if not data:
+                raise EOFError("The connection was closed")
+            self._messages.extend(self._decoder.feed(data))
+
+        return self._messages.popleft()
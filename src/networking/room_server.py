@@ -0,0 +1,259 @@
+"""A long-running server that hosts many games at once, each in its own room.
+
+Unlike Server, which one of the players starts for a single game, this runs on its own with asyncio, so the
+connections don't need a thread each. Run it from the game folder with:
+
+    python -m src.networking.room_server --ip 0.0.0.0 --port 5550
+
+The messages are the ones of src.networking.protocol. A client sends CONNECT, like with Server, and then JOIN_ROOM:
+without args to make a new room, or with the digits of a room code to join the room of another player. The server
+answers JOIN_ROOM with the seat of the client (0 made the room, 1 joined it) and the code, which the first player
+tells the second one, or ROOM_NOT_FOUND. When the second player joins, the first one gets a JOIN_ROOM too. After that
+the moves of every player are relayed to the other one, and when one of them leaves, the other one gets
+CLOSE_CONNECTION and the room is gone.
+
+Every room keeps a GameState, in which seat 0 plays WHITE, and checks the moves before relaying them. A player who
+moves out of turn or breaks the rules is disconnected, so the other one gets CLOSE_CONNECTION. The players can play
+many games in the same room: the next one starts once a game is over or when either player sends NEW_GAME, which is
+relayed too.
+
+What a room can hold is bounded: frames are at most a few bytes, a client reads at most READ_SIZE bytes at a time and
+a client that lets more than MAX_BUFFERED_BYTES pile up unsent is dropped.
+
+"""
+
+import argparse
+import asyncio
+import secrets
+import socket
+from collections import deque
+
+from src.networking.message import Message
+from src.networking.protocol import Decoder, ProtocolError, encode
+from src.game.game_state import GameState, IllegalMoveError
+from src.constants import *
+from src.log import get_logger
+
+logger = get_logger(__name__)
+logger.setLevel(10)
+
+ROOM_CODE_DIGITS = 6
+JOIN_TIMEOUT = 10.0  # Seconds a client has to join a room after connecting
+READ_SIZE = 4096
+MAX_BUFFERED_BYTES = 64 * 1024  # Waiting to be sent to a client that doesn't read them
+
+RELAYED_ACTIONS = (PLACE_PIECE, MOVE_PIECE, REMOVE_PIECE, CHANGE_TURN, NEW_GAME)
+_ARG_COUNTS = {PLACE_PIECE: 1, MOVE_PIECE: 2, REMOVE_PIECE: 1}
+
+
+class _Connection:
+    """A client and the messages received from it, but not handled yet."""
+
+    __slots__ = ("reader", "writer", "decoder", "messages")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.decoder = Decoder()
+        self.messages = deque()
+
+    async def receive(self) -> Message:
+        """
+        Raises:
+            EOFError: If the connection was closed.
+            ProtocolError: If what arrived isn't a message.
+
+        """
+        while not self.messages:
+            data = await self.reader.read(READ_SIZE)  # fail
+            if not data:
+                raise EOFError("The connection was closed")
+            self.messages.extend(self.decoder.feed(data))
+
+        return self.messages.popleft()
+
+    def send(self, message: Message):
+        """Sends without waiting; drops the client if it has too much waiting to be sent already."""
+        if self.writer.is_closing():
+            return
+        self.writer.write(encode(message))
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+            logger.warning(f"Dropping {self.writer.get_extra_info('peername')}, which doesn't read its messages")
+            self.writer.transport.abort()
+
+
+class Room:
+
+    __slots__ = ("code", "players", "state")
+
+    def __init__(self, code: str):
+        self.code = code
+        self.players = [None, None]  # The connection in every seat
+        self.state = GameState()
+
+    @property
+    def code_digits(self) -> tuple:
+        return tuple(int(digit) for digit in self.code)
+
+    def make_move(self, seat: int, message: Message):
+        """Makes the step of a move that the message stands for, or starts a new game.
+
+        Raises:
+            IllegalMoveError: If it's not the turn of that seat or the move breaks the rules.
+
+        """
+        if message.action == NEW_GAME:
+            self.state = GameState()
+            return
+        if message.action not in _ARG_COUNTS:  # CHANGE_TURN doesn't change anything
+            return
+        if seat != self.state.side:
+            raise IllegalMoveError(f"It's not the turn of seat {seat}")
+        if len(message.args) != _ARG_COUNTS[message.action]:
+            raise IllegalMoveError(f"Wrong args for action {message.action}: {message.args}")
+
+        if message.action == PLACE_PIECE:
+            self.state.put(*message.args)
+        elif message.action == MOVE_PIECE:
+            self.state.move(*message.args)
+        else:
+            self.state.remove(*message.args)
+
+        if self.state.game_over:  # The next move is the first one of a new game
+            self.state = GameState()
+
+
+class RoomServer:
+
+    def __init__(self, ip: str, port: int):
+        self.ip = ip
+        self.port = port
+
+        self.rooms = {}  # By code
+
+        self._server = None
+
+    async def start(self):
+        """Starts listening; the clients are then served by the running event loop."""
+        self._server = await asyncio.start_server(self._serve_client, self.ip, self.port, limit=READ_SIZE)  # fail
+        self.port = self._server.sockets[0].getsockname()[1]  # In case it was 0, for any free port
+        logger.info(f"Room server started on ({self.ip}, {self.port})")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        for room in list(self.rooms.values()):
+            for connection in room.players:
+                if connection is not None:
+                    connection.writer.close()
+        self.rooms.clear()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        connection = _Connection(reader, writer)
+        room = None
+        seat = None
+
+        try:
+            room, seat = await asyncio.wait_for(self._join_room(connection), JOIN_TIMEOUT)
+            if room is not None:
+                await self._relay(connection, room, seat)
+        except (EOFError, ProtocolError, ConnectionError, asyncio.TimeoutError):
+            pass  # The client left, doesn't speak the protocol or never joined
+        except IllegalMoveError as error:
+            logger.info(f"Disconnecting {writer.get_extra_info('peername')} from room {room.code}: {error}")
+        finally:
+            if room is not None:
+                self._leave_room(room, seat)
+            writer.close()
+
+    async def _join_room(self, connection: _Connection) -> tuple:
+        """
+        Returns:
+            tuple: The room and the seat of the client, or (None, None) if it couldn't join one.
+
+        """
+        message = await connection.receive()
+        if message.action != CONNECT:
+            raise ProtocolError(f"Expected a CONNECT message first, not {message}")
+
+        message = await connection.receive()
+        if message.action != JOIN_ROOM:
+            raise ProtocolError(f"Expected a JOIN_ROOM message, not {message}")
+
+        if not message.args:
+            room = Room(self._new_room_code())
+            self.rooms[room.code] = room
+            seat = 0
+        else:
+            room = self.rooms.get("".join(str(digit) for digit in message.args))
+            if room is None or room.players[1] is not None:
+                connection.send(Message(message.client_id, ROOM_NOT_FOUND, message.args))
+                return None, None
+            seat = 1
+
+        room.players[seat] = connection
+        connection.send(Message(seat, JOIN_ROOM, room.code_digits))
+        if seat == 1:
+            room.players[0].send(Message(seat, JOIN_ROOM, room.code_digits))  # Tell the first player who joined
+
+        logger.debug(f"Client {connection.writer.get_extra_info('peername')} joined room {room.code} at seat {seat}")
+        return room, seat
+
+    async def _relay(self, connection: _Connection, room: Room, seat: int):
+        while True:
+            message = await connection.receive()
+            if message.action == CLOSE_CONNECTION:
+                return
+            if message.action not in RELAYED_ACTIONS:
+                continue
+
+            other = room.players[1 - seat]
+            if other is None:  # The game hasn't started and there's no one to tell
+                continue
+            room.make_move(seat, message)
+            other.send(Message(seat, message.action, message.args, message.sequence))
+
+    def _leave_room(self, room: Room, seat: int):
+        room.players[seat] = None
+        other = room.players[1 - seat]
+        if other is not None:
+            other.send(Message(seat, CLOSE_CONNECTION, ()))
+            other.writer.close()  # The game is over; its relay stops when the connection closes
+            room.players[1 - seat] = None
+
+        if self.rooms.get(room.code) is room:
+            del self.rooms[room.code]
+            logger.debug(f"Room {room.code} closed")
+
+    def _new_room_code(self) -> str:
+        while True:
+            code = "".join(str(secrets.randbelow(10)) for _ in range(ROOM_CODE_DIGITS))
+            if code not in self.rooms:
+                return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many games at once, in rooms that players join with a code.")
+    parser.add_argument("--ip", default="0.0.0.0", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=5550, help="the port to listen on")
+    args = parser.parse_args()
+
+    server = RoomServer(args.ip, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
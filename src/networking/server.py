@@ -1,9 +1,9 @@
+import queue
 import socket
 import threading
-import pickle
-import time
 
 from src.networking.message import Message
+from src.networking.protocol import Receiver, ProtocolError, encode
 from src.constants import *
 from src.log import get_logger
 
@@ -22,7 +22,7 @@ class Server:
         self._serving_sockets = []  # This is to force closing the sockets
 
         self._running = True
-        self._send_to_client = -1
+        self._outbound = {0: queue.Queue(), 1: queue.Queue()}  # The frames waiting to be sent to every client
 
         self._server_socket = socket.socket()  # Listening socket
 
@@ -32,6 +32,7 @@ class Server:
             raise
         except OSError:  # Address already in use or some other error
             raise
+        self.port = self._server_socket.getsockname()[1]  # In case it was 0, for any free port
 
         self._server_socket.settimeout(30)
         self._server_socket.listen(3)
@@ -39,9 +40,6 @@ class Server:
         logger.info(f"Server started on ({self.ip}, {self.port})")
         threading.Thread(target=self._listen, daemon=True).start()
 
-        self._lock = threading.Lock()
-        self._message_to_send = None
-
     def __del__(self):
         print("Server object destroyed")
 
@@ -56,12 +54,18 @@ class Server:
                 self._server_socket.close()
                 raise
 
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Don't hold back the small frames
+            receiver = Receiver(connection)
             try:
-                client_id = int(connection.recv(64).decode())  # fail
-            except ValueError:  # Connection sent nothing
+                message = receiver.receive()  # fail
+            except (EOFError, ProtocolError):  # Connection sent nothing or garbage
                 self._server_socket.close()
                 raise
-            threading.Thread(target=self._serve_client, daemon=True, args=(connection, client_id)).start()
+            if message.action != CONNECT:
+                self._server_socket.close()
+                raise ProtocolError(f"Expected a CONNECT message first, not {message}")
+            client_id = message.client_id
+            threading.Thread(target=self._serve_client, daemon=True, args=(connection, receiver, client_id)).start()
             self._serving_sockets.append(connection)
 
             logger.info(f"Client {address} connected to server")
@@ -69,39 +73,42 @@ class Server:
         self.finished_listening = True
         self._server_socket.close()
 
-    def _serve_client(self, sock: socket.socket, client_id: int):
+    def _serve_client(self, sock: socket.socket, receiver: Receiver, client_id: int):
         threading.Thread(target=self._check_for_sending, daemon=True, args=(sock, client_id)).start()
 
         with sock:
             while self._running:
-                serialized_message = sock.recv(512)  # fail
                 try:
-                    message = pickle.loads(serialized_message)  # fail
-                except EOFError:  # serialized_message was empty
+                    message = receiver.receive()  # fail
+                except (EOFError, ProtocolError):  # The connection was closed or is of no use anymore
                     message = Message(client_id, CLOSE_CONNECTION, ())
-                    serialized_message = pickle.dumps(message)
 
-                with self._lock:
-                    if message.client_id == 0:
-                        self._send_to_client = 1
-                        self._message_to_send = serialized_message
-                    elif message.client_id == 1:
-                        self._send_to_client = 0
-                        self._message_to_send = serialized_message
+                if message.client_id == 0:
+                    self._outbound[1].put(encode(message))
+                elif message.client_id == 1:
+                    self._outbound[0].put(encode(message))
+
+                if message.action == CLOSE_CONNECTION:
+                    break
 
     def _check_for_sending(self, sock: socket.socket, client_id: int):
-        while self._running:
-            with self._lock:
-                if self._send_to_client == 0 and client_id == 0:
-                    sock.send(self._message_to_send)  # fail
-                    self._send_to_client = -1
-                elif self._send_to_client == 1 and client_id == 1:
-                    sock.send(self._message_to_send)  # fail
-                    self._send_to_client = -1
-            time.sleep(0.2)
+        outbound = self._outbound[client_id]
+        while True:
+            frames = [outbound.get()]  # Wait for a message, without any polling
+            while not outbound.empty():  # And send the ones that arrived with it together
+                frames.append(outbound.get_nowait())
+            if None in frames:  # The server was closed
+                return
+
+            try:
+                sock.sendall(b"".join(frames))  # fail
+            except OSError:  # The client is gone
+                return
 
     def close(self):
         self._running = False
+        for outbound in self._outbound.values():
+            outbound.put(None)  # Wake up the sending threads to stop them
         for sock in self._serving_sockets:
             try:
                 sock.shutdown(socket.SHUT_RDWR)
@@ -0,0 +1,181 @@
+"""The shape of the board: which nodes are neighbors and which lines of nodes form windmills.
+
+Everything is precomputed once, as tuples indexed by node id and as bit masks where bit i stands for node i, along
+with the few helpers that turn masks back into nodes.
+Can be imported anywhere. The C extension gets the same tables through a header generated by running this module:
+
+    python -m src.topology > src/minimax/topology.h
+
+"""
+
+NODE_INDICES = range(24)
+FULL_BOARD = (1 << 24) - 1
+
+# The lines of three nodes (windmills)
+MILLS = (
+    (0, 1, 2),
+    (0, 9, 21),
+    (21, 22, 23),
+    (23, 14, 2),
+    (3, 4, 5),
+    (3, 10, 18),
+    (18, 19, 20),
+    (20, 13, 5),
+    (6, 7, 8),
+    (6, 11, 15),
+    (15, 16, 17),
+    (17, 12, 8),
+    (1, 4, 7),
+    (9, 10, 11),
+    (22, 19, 16),
+    (12, 13, 14)
+)
+
+NEIGHBORS = (
+    (1, 9),
+    (0, 2, 4),
+    (1, 14),
+    (4, 10),
+    (1, 3, 5, 7),
+    (4, 13),
+    (7, 11),
+    (4, 6, 8),
+    (7, 12),
+    (0, 10, 21),
+    (3, 9, 11, 18),
+    (6, 10, 15),
+    (8, 13, 17),
+    (5, 12, 14, 20),
+    (2, 13, 23),
+    (11, 16),
+    (15, 17, 19),
+    (12, 16),
+    (10, 19),
+    (16, 18, 20, 22),
+    (13, 19),
+    (9, 22),
+    (19, 21, 23),
+    (14, 22)
+)
+
+# Where every node is on a 7 by 7 grid, (0, 0) being the top left corner
+NODE_COORDINATES = (
+    (0, 0), (3, 0), (6, 0),
+    (1, 1), (3, 1), (5, 1),
+    (2, 2), (3, 2), (4, 2),
+    (0, 3), (1, 3), (2, 3), (4, 3), (5, 3), (6, 3),
+    (2, 4), (3, 4), (4, 4),
+    (1, 5), (3, 5), (5, 5),
+    (0, 6), (3, 6), (6, 6)
+)
+
+BIT = tuple(1 << i for i in NODE_INDICES)
+MILL_MASKS = tuple(BIT[a] | BIT[b] | BIT[c] for a, b, c in MILLS)
+NEIGHBOR_MASKS = tuple(sum(BIT[j] for j in neighbors) for neighbors in NEIGHBORS)
+
+NODE_MILLS = tuple(tuple(m for m, mill in enumerate(MILLS) if i in mill) for i in NODE_INDICES)  # Two per node
+NODE_MILL_MASKS = tuple(tuple(MILL_MASKS[m] for m in NODE_MILLS[i]) for i in NODE_INDICES)
+NODE_MILL_PAIRS = tuple(tuple(mask & ~BIT[i] for mask in NODE_MILL_MASKS[i]) for i in NODE_INDICES)  # The other two
+
+# The ids of the set bits of every byte, for turning masks back into node ids without looping over all 24 nodes
+_BYTE_NODES = tuple(
+    tuple(tuple(offset + i for i in range(8) if byte >> i & 1) for byte in range(256)) for offset in (0, 8, 16)
+)
+
+
+def get_nodes(mask: int) -> tuple:
+    """
+    Args:
+        mask (int): A set of nodes.
+
+    Returns:
+        tuple: The id of the nodes in the mask, in increasing order.
+
+    """
+    return _BYTE_NODES[0][mask & 0xff] + _BYTE_NODES[1][mask >> 8 & 0xff] + _BYTE_NODES[2][mask >> 16]
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def get_windmills_mask(pieces: int) -> int:
+    """
+    Args:
+        pieces (int): The mask of the pieces of one color.
+
+    Returns:
+        int: The mask of the pieces that are inside windmills.
+
+    """
+    windmills = 0
+    for mill in MILL_MASKS:
+        if pieces & mill == mill:
+            windmills |= mill
+
+    return windmills
+
+
+def get_nodes_pieces_to_take(pieces: int) -> tuple:
+    """The pieces in windmills can only be taken when all of them are.
+
+    Args:
+        pieces (int): The mask of the pieces to take.
+
+    Returns:
+        tuple: The id of the nodes.
+
+    """
+    return get_nodes(pieces & ~get_windmills_mask(pieces) or pieces)
+
+
+def _make_symmetries() -> tuple:
+    """The 16 symmetries of the board: 4 rotations, with or without a reflection, with or without swapping the inner
+    and outer rings. Every one is a tuple with where every node goes; the first one leaves the board as it is.
+    """
+    nodes = {coordinates: i for i, coordinates in enumerate(NODE_COORDINATES)}
+    symmetries = []
+
+    for swap_rings in (False, True):
+        for reflect in (False, True):
+            for rotations in range(4):
+                permutation = []
+                for x, y in NODE_COORDINATES:
+                    dx, dy = x - 3, y - 3  # From the center
+                    if swap_rings:
+                        ring = max(abs(dx), abs(dy))
+                        dx, dy = dx // ring * (4 - ring), dy // ring * (4 - ring)
+                    if reflect:
+                        dx = -dx
+                    for _ in range(rotations):
+                        dx, dy = -dy, dx
+                    permutation.append(nodes[dx + 3, dy + 3])
+                symmetries.append(tuple(permutation))
+
+    return tuple(symmetries)
+
+
+SYMMETRIES = _make_symmetries()
+
+
+def _write_c_header():
+    print("/* Generated by src/topology.py, don't edit by hand. */")
+    print()
+    print("#define NODE_COUNT 24")
+    print(f"#define MILL_COUNT {len(MILLS)}")
+    print()
+    print("static const int NEIGHBOR_COUNTS[NODE_COUNT] = {" + ", ".join(str(len(n)) for n in NEIGHBORS) + "};")
+    print()
+    print("static const int NEIGHBORS[NODE_COUNT][4] = {")
+    for neighbors in NEIGHBORS:
+        print("\t{" + ", ".join(str(n) for n in neighbors + (-1,) * (4 - len(neighbors))) + "},")
+    print("};")
+    print()
+    print("static const int MILLS[MILL_COUNT][3] = {")
+    for mill in MILLS:
+        print("\t{" + ", ".join(str(n) for n in mill) + "},")
+    print("};")
+
+
+if __name__ == "__main__":
+    _write_c_header()
@@ -0,0 +1,203 @@
+"""The rules of GameState, without any windows."""
+
+from random import Random
+
+import pytest
+
+from src.game.game_state import GameState, IllegalMoveError, MAX_TURNS_WO_MILLS, PIECES_PER_PLAYER
+from src.topology import BIT
+from src.constants import PLAYER1, PLAYER2, PHASE1, PHASE2, TIE
+
+
+def make_state(white: tuple, black: tuple, side: int = 0, pieces_to_put: tuple = (0, 0)) -> GameState:
+    """
+    Returns:
+        GameState: With the pieces on the given nodes; in the moving phase, unless there are pieces to put.
+
+    """
+    state = GameState()
+    state.pieces = [sum(BIT[node] for node in white), sum(BIT[node] for node in black)]
+    state.pieces_to_put = list(pieces_to_put)
+    state.side = side
+    return state
+
+
+def snapshot(state: GameState) -> tuple:
+    return (tuple(state.pieces), tuple(state.pieces_to_put), state.side, state.plies, state.turns_without_windmills,
+            dict(state.history), state.game_over, state.winner, state.reason)
+
+
+def test_apply_and_undo_round_trip():
+    random = Random(0)
+    windmills = 0
+    for _ in range(50):
+        state = GameState()
+        snapshots = []
+        while not state.game_over:
+            snapshots.append(snapshot(state))
+            move = random.choice(state.legal_moves())
+            windmills += move[2] != -1
+            state.apply(move)
+
+        while snapshots:
+            state.undo()
+            assert snapshot(state) == snapshots.pop()
+        assert state.undo() is None
+
+    assert windmills > 0  # The windmills, which reset the history, were taken back too
+
+
+def test_undo_of_a_pending_windmill():
+    state = make_state((0, 1), (), pieces_to_put=(7, 9))
+    state.put(2)
+    assert state.must_remove and state.turn == PLAYER1
+    assert state.undo() == (-1, 2, -1)
+    assert not state.must_remove and state.pieces[0] == BIT[0] | BIT[1]
+
+
+def test_two_step_moves_match_legal_moves():
+    random = Random(1)
+    for _ in range(20):
+        state = GameState()
+        while not state.game_over:
+            src, dest, take = random.choice(state.legal_moves())
+            if src == -1:
+                state.put(dest)
+            else:
+                state.move(src, dest)
+            assert state.must_remove == (take != -1)
+            if take != -1:
+                state.remove(take)
+        assert state.plies == len(state.moves)
+
+
+def test_placing_then_moving_phase():
+    state = GameState()
+    for ply in range(2 * PIECES_PER_PLAYER):
+        assert state.phase == PHASE1
+        state.apply((-1, (0, 3, 6, 9, 12, 15, 18, 21, 23, 1, 4, 7, 10, 13, 16, 19, 22, 2)[ply], -1))
+    assert state.phase == PHASE2
+    assert state.count_pieces(PLAYER1) == state.count_pieces(PLAYER2) == PIECES_PER_PLAYER
+
+
+def test_threefold_repetition():
+    state = make_state((0, 10, 12, 17), (23, 15, 5, 7))
+    moves = [(0, 1, -1), (23, 22, -1), (1, 0, -1), (22, 23, -1)]
+    for ply in range(8):
+        state.apply(moves[ply % 4])
+        assert not state.game_over
+
+    state.apply(moves[0])  # The position after the first move, for the third time
+    assert state.game_over and state.winner == TIE and state.reason == "threefold repetition"
+
+
+def test_too_many_turns_without_windmills():
+    state = make_state((0, 10, 12, 17), (23, 15, 5, 7))
+    state.turns_without_windmills = MAX_TURNS_WO_MILLS - 1
+    state.apply((0, 1, -1))
+    assert not state.game_over
+
+    state.apply((23, 22, -1))
+    assert state.game_over and state.winner == TIE and state.reason == "too many turns without windmills"
+
+
+def test_windmill_resets_the_draw_counts():
+    state = make_state((0, 1, 14, 17), (23, 15, 5, 7))
+    state.turns_without_windmills = 40
+    state.history = {12345: 2}
+    state.move(14, 2)
+    state.remove(23)
+    assert state.turns_without_windmills == 0 and state.history == {}
+
+    state.undo()
+    assert state.turns_without_windmills == 40 and state.history == {12345: 2}
+
+
+def test_blocked_player_loses():
+    state = make_state((0, 2, 3, 5), (1, 9, 14, 10, 13, 7), side=1)
+    state.apply((7, 4, -1))
+    assert state.game_over and state.winner == PLAYER2 and state.reason == "blocked"
+    assert state.legal_moves() == []
+
+
+def test_two_pieces_left_loses():
+    state = make_state((0, 1, 10), (23, 14, 5), side=1)
+    state.move(5, 2)  # Jumps, as BLACK has 3 pieces
+    state.remove(10)
+    assert state.game_over and state.winner == PLAYER2 and state.reason == "two pieces left"
+
+
+def test_three_pieces_jump():
+    state = make_state((0, 10, 17), (23, 15, 5, 7))
+    assert state.can_jump
+    state.move(0, 20)
+    assert state.pieces[0] & BIT[20]
+
+
+def test_put_rules():
+    state = make_state((0,), (3,), pieces_to_put=(8, 8))
+    with pytest.raises(IllegalMoveError):
+        state.put(3)  # Taken by BLACK
+    with pytest.raises(IllegalMoveError):
+        state.put(0)  # Taken by WHITE
+    with pytest.raises(IllegalMoveError):
+        state.put(24)  # Not a node
+    with pytest.raises(IllegalMoveError):
+        state.move(0, 1)  # Before all the pieces are put
+
+    state = make_state((0, 10, 12, 17), (23, 15, 5, 7))
+    with pytest.raises(IllegalMoveError):
+        state.put(1)  # All the pieces are put
+
+
+def test_move_rules():
+    state = make_state((0, 10, 12, 17), (23, 15, 5, 7))
+    with pytest.raises(IllegalMoveError):
+        state.move(23, 22)  # A piece of the other player
+    with pytest.raises(IllegalMoveError):
+        state.move(1, 2)  # No piece there
+    with pytest.raises(IllegalMoveError):
+        state.move(0, 2)  # Not a neighbor
+    with pytest.raises(IllegalMoveError):
+        state.move(17, 12)  # Taken
+    with pytest.raises(IllegalMoveError):
+        state.move(0, 24)  # Not a node
+
+    state.move(0, 1)
+    assert state.turn == PLAYER2
+
+
+def test_remove_rules():
+    state = make_state((0, 1, 14), (23, 15, 5, 7, 6, 8))  # BLACK has a windmill on 6, 7 and 8
+    with pytest.raises(IllegalMoveError):
+        state.remove(23)  # No windmill was formed
+
+    state.move(14, 2)
+    assert state.must_remove
+    with pytest.raises(IllegalMoveError):
+        state.move(0, 9)  # The piece has to be taken first
+    with pytest.raises(IllegalMoveError):
+        state.put(9)
+    with pytest.raises(IllegalMoveError):
+        state.remove(7)  # In a windmill, while there are pieces outside of windmills
+    with pytest.raises(IllegalMoveError):
+        state.remove(0)  # Not a piece of the other player
+    with pytest.raises(IllegalMoveError):
+        state.remove(9)  # No piece at all
+
+    state.remove(23)
+    assert not state.must_remove and state.turn == PLAYER2
+
+
+def test_remove_from_a_windmill_when_all_are():
+    state = make_state((0, 1, 14), (6, 7, 8))
+    state.move(14, 2)
+    assert set(state.nodes_to_take()) == {6, 7, 8}
+    state.remove(7)
+
+
+def test_no_moves_after_game_over():
+    state = make_state((0, 2, 3, 5), (1, 9, 14, 10, 13, 7), side=1)
+    state.apply((7, 4, -1))
+    with pytest.raises(IllegalMoveError):
+        state.move(0, 9)
@@ -0,0 +1,64 @@
+"""Measures how long the server takes to relay a message from one client to the other on localhost.
+
+Run it with pytest or on its own, to print the percentiles:
+
+    python -m tests.test_relay_latency
+
+"""
+
+import statistics
+from timeit import default_timer
+
+from src.networking.server import Server
+from src.networking.client import Client
+from src.constants import *
+
+ip = "127.0.0.1"
+
+MESSAGES = 2000
+MAX_P99 = 0.05  # Seconds; relaying used to wait for a poll of up to 200 ms
+
+
+def measure_relay_latency(messages: int = MESSAGES) -> list:
+    """
+    Returns:
+        list: The seconds every message took from the send of one client to the receive of the other, sorted.
+
+    """
+    server = Server(ip, 0)  # Any free port
+    client1 = Client(0)
+    client1.connect(ip, server.port)
+    client2 = Client(1)
+    client2.connect(ip, server.port)
+
+    latencies = []
+    try:
+        for i in range(messages):
+            sender, receiver = (client1, client2) if i % 2 == 0 else (client2, client1)
+            start = default_timer()
+            sender.send_event(PLACE_PIECE, i % 24)
+            message = receiver.receive_event()
+            latencies.append(default_timer() - start)
+            assert message.action == PLACE_PIECE and message.args == (i % 24,)
+    finally:
+        client1.close()
+        client2.close()
+        server.close()
+
+    return sorted(latencies)
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def test_relay_latency():
+    latencies = measure_relay_latency()
+    assert percentile(latencies, 0.99) < MAX_P99
+
+
+if __name__ == "__main__":
+    latencies = measure_relay_latency()
+    print(f"{len(latencies)} messages relayed, mean {statistics.mean(latencies) * 1000:.3f} ms")
+    print(f"p50 {percentile(latencies, 0.5) * 1000:.3f} ms, p99 {percentile(latencies, 0.99) * 1000:.3f} ms, "
+          f"max {latencies[-1] * 1000:.3f} ms")
@@ -0,0 +1,102 @@
+"""Plays games through a RoomServer on localhost, with the server checking every move."""
+
+import asyncio
+import threading
+
+from src.networking.room_server import RoomServer
+from src.networking.client import Client
+from src.networking.load_test import make_scripts
+from src.constants import *
+
+ip = "127.0.0.1"
+
+
+def start_server() -> tuple:
+    """
+    Returns:
+        tuple: The server, already listening on a free port, and the event loop running it in another thread.
+
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = RoomServer(ip, 0)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    return server, loop
+
+
+def stop_server(server: RoomServer, loop: asyncio.AbstractEventLoop):
+    asyncio.run_coroutine_threadsafe(_close(server), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+async def _close(server: RoomServer):
+    """Closes the server and waits for it to be done with the clients."""
+    server.close()
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def join_room(port: int) -> tuple:
+    """
+    Returns:
+        tuple: The clients in seat 0 and seat 1 of a new room.
+
+    """
+    host = Client(0)
+    host.connect(ip, port)
+    code = host.join_room()
+    guest = Client(1)
+    guest.connect(ip, port)
+    guest.join_room(code)
+    assert host.receive_event().action == JOIN_ROOM  # That the guest joined
+    return host, guest
+
+
+def play(host: Client, guest: Client, script: list):
+    """Sends the moves of the script from both players, in turns, and checks that the other one gets them."""
+    for ply, messages in enumerate(script):
+        sender, receiver = (host, guest) if ply % 2 == 0 else (guest, host)
+        for action, args in messages:
+            sender.send_event(action, *args)
+            message = receiver.receive_event()
+            assert message.action == action and message.args == args
+
+
+def test_two_games_in_one_room():
+    server, loop = start_server()
+    host, guest = join_room(server.port)
+    first_game, second_game = make_scripts(2, 1000, seed=1)  # Played to the end
+    try:
+        play(host, guest, first_game)
+        play(host, guest, second_game)  # A new game starts once the first one is over
+    finally:
+        host.close()
+        guest.close()
+        stop_server(server, loop)
+
+
+def test_new_game_in_the_middle_of_a_game():
+    server, loop = start_server()
+    host, guest = join_room(server.port)
+    first_game, second_game = make_scripts(2, 10, seed=2)  # Stopped after 10 plies
+    try:
+        play(host, guest, first_game)
+        host.send_event(NEW_GAME)
+        assert guest.receive_event().action == NEW_GAME
+        play(host, guest, second_game)
+    finally:
+        host.close()
+        guest.close()
+        stop_server(server, loop)
+
+
+def test_illegal_move_disconnects():
+    server, loop = start_server()
+    host, guest = join_room(server.port)
+    try:
+        guest.send_event(PLACE_PIECE, 0)  # WHITE, in seat 0, starts
+        assert host.receive_event().action == CLOSE_CONNECTION
+    finally:
+        host.close()
+        guest.close()
+        stop_server(server, loop)